@@ -1,14 +1,59 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
 import os
+import time
+from typing import Optional
 
-from pydantic import BaseModel
+import numpy as np
+from pydantic import BaseModel, ValidationError
 from predictor import Predictor
-from schemas import PredictionRequest, PredictionResponse
+from rollup import BASE_INTERVAL, ROLLUP_ROWS, SERVED_INTERVALS
+from backtest import DEFAULT_HORIZONS, DEFAULT_STARTS, SERVED_HORIZONS, SERVED_STARTS, backtest_coin
+from http_client import UpstreamClient
+from indicators import FEATURE_COLS
+from precompute import DEFAULT_STEPS, PrecomputeScheduler
+from streaming import ForecastBroadcaster
+import metrics
+from metrics import UPSTREAM_FAILURES, CounterFunc, RequestMetricsMiddleware, stage
+from monte_carlo import DEFAULT_PATHS, max_paths
+from http_cache import ResponseCache, cache_headers, etag_matches, make_etag, version_tag
+from news_cache import NewsCache
+from sentiment import SentimentEngine
+from serialization import FastJSONResponse, dumps
+from static_assets import StaticIndex
+from schemas import (
+    PredictionRequest, PredictionResponse,
+    BatchPredictionRequest, BatchPredictionResponse,
+)
+
+CRYPTOCOMPARE_API_URL = os.getenv("CRYPTOCOMPARE_API_URL", "https://min-api.cryptocompare.com")
+
+# Background refresh of every coin after each candle close (disable with PRECOMPUTE=0)
+PRECOMPUTE = os.getenv("PRECOMPUTE", "1") == "1"
+# Extra stream updates every STREAM_TICK seconds (0 = only at candle close)
+STREAM_TICK = float(os.getenv("STREAM_TICK", "0"))
+
+# One keep-alive pool for every upstream call (Binance klines, CryptoCompare news)
+http_client = UpstreamClient()
 
-app = FastAPI(title="Crypto Price Predictor API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load every model before serving so no request pays the unpickling cost
+    await asyncio.to_thread(predictor.registry.preload)
+    predictor.registry.start()
+    if PRECOMPUTE:
+        precompute.start()
+    broadcaster.start(STREAM_TICK)
+    yield
+    await broadcaster.stop()
+    await precompute.stop()
+    await predictor.registry.stop()
+    await http_client.aclose()
+
+app = FastAPI(title="Crypto Price Predictor API", lifespan=lifespan)
 
 # --- CORS Configuration ---
 origins = ["*"]
@@ -20,23 +65,119 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request latency by route, plus the optional slow-request log (SLOW_REQUEST_MS)
+app.add_middleware(RequestMetricsMiddleware)
+
+predictor = Predictor(http=http_client)
+precompute = PrecomputeScheduler(predictor)
+# Encoded /latest and /forecast bodies, keyed by ETag (last candle, model version, parameters)
+RESPONSE_CACHE = ResponseCache()
+# Stream subscribers get every snapshot without recomputing it
+broadcaster = ForecastBroadcaster(precompute.compute)
+precompute.listeners.append(lambda snapshot: broadcaster.publish_entries(snapshot.coins))
+
+def _on_models_swapped(coins):
+    # Results computed with the previous model version are recomputed right away
+    if PRECOMPUTE and precompute.snapshot is not None:
+        precompute.refresh_soon()
 
-predictor = Predictor()
+predictor.registry.listeners.append(_on_models_swapped)
+
+# Hit/miss counters kept by the kline cache, read at scrape time
+CounterFunc("market_cache_requests_total", "Kline cache lookups by result", ["result"],
+            lambda: {(result,): predictor.market_cache.stats()[key]
+                     for result, key in [("hit", "hits"), ("miss", "misses"), ("wait", "waits")]})
+CounterFunc("response_cache_requests_total", "Encoded prediction response lookups by result", ["result"],
+            lambda: {(result,): RESPONSE_CACHE.stats()[key]
+                     for result, key in [("hit", "hits"), ("miss", "misses"), ("not_modified", "not_modified")]})
+CounterFunc("news_cache_requests_total", "News cache lookups by result", ["result"],
+            lambda: {(result,): NEWS_CACHE.stats()[key]
+                     for result, key in [("hit", "hits"), ("stale", "stale"), ("miss", "misses"), ("wait", "waits")]})
+CounterFunc("shared_cache_requests_total", "Cross-worker kline cache lookups by result", ["result"],
+            lambda: {(result,): predictor.shared.stats()[key] if predictor.shared is not None else 0
+                     for result, key in [("hit", "hits"), ("miss", "misses")]})
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "message": "Service is running"}
+    return {
+        "status": "ok",
+        "message": "Service is running",
+        "market_cache": predictor.market_cache.stats(),
+        "shared_cache": predictor.shared.stats() if predictor.shared is not None else None,
+        "snapshot": precompute.status(),
+        "models": predictor.registry.versions(),
+    }
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics: request/stage latency histograms, cache and upstream counters."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 # @app.get("/")
 # def read_root():
 #     return {"message": "Welcome to the Crypto Price Predictor API. Visit /docs for documentation."}
 
+# Upper bound on rows scored by a single /predict/batch call
+MAX_BATCH_ROWS = 10000
+
+# Declared before /predict/{coin} so "batch" is not captured as a coin
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(request: BatchPredictionRequest):
+    if len(request.rows) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=400, detail=f"Batch too large (max {MAX_BATCH_ROWS} rows)")
+
+    results = [{"index": i} for i in range(len(request.rows))]
+
+    # 1. Validate each row on its own and group the valid ones by coin
+    groups = {}
+    for i, row in enumerate(request.rows):
+        if not isinstance(row, dict):
+            results[i]["error"] = "Row must be an object of features"
+            continue
+        coin = row.get("coin", request.coin)
+        if not coin:
+            results[i]["error"] = "Missing coin"
+            continue
+        if not isinstance(coin, str):
+            results[i]["error"] = "coin must be a string"
+            continue
+        coin = coin.upper()
+        results[i]["coin"] = coin
+        try:
+            features = PredictionRequest(**{k: v for k, v in row.items() if k != "coin"})
+        except ValidationError as e:
+            results[i]["error"] = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            continue
+        values = features.model_dump()
+        groups.setdefault(coin, ([], []))
+        groups[coin][0].append(i)
+        groups[coin][1].append([values[f] for f in FEATURE_COLS])
+
+    # 2. One vectorized scale+predict per coin
+    for coin, (indices, rows) in groups.items():
+        try:
+            predictions = predictor.predict_matrix(coin, np.array(rows, dtype=float))
+        except FileNotFoundError:
+            error = f"Model for {coin} not found"
+        except Exception as e:
+            error = str(e)
+        else:
+            for i, price in zip(indices, predictions):
+                results[i]["predicted_price"] = round(float(price), 2)
+            continue
+        for i in indices:
+            results[i]["error"] = error
+
+    return {"results": results}
+
 @app.post("/predict/{coin}", response_model=PredictionResponse)
 def predict_price(coin: str, request: PredictionRequest):
     coin = coin.upper()
     try:
         # Convert Pydantic model to dict
-        features = request.dict()
+        features = request.model_dump()
         predicted_price = predictor.predict(coin, features)
         return {"coin": coin, "predicted_price": round(predicted_price, 2)}
     except FileNotFoundError:
@@ -44,17 +185,68 @@ def predict_price(coin: str, request: PredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _candle_and_model(coin: str, entry) -> tuple:
+    """(last candle open_time ms, model version) that a response for the coin is computed from."""
+    if entry is not None:
+        return entry["candle"], entry["model"]
+    candle = await predictor.last_candle_async(coin)
+    return candle, version_tag(predictor.registry.get(coin))
+
+def _conditional_headers(etag: str, entry) -> dict:
+    headers = cache_headers(etag, time.time())
+    if entry is not None:
+        headers["X-Snapshot-Age"] = f"{precompute.age():.0f}"
+    return headers
+
+def _cached_response(request: Request, etag: str, headers: dict) -> Optional[Response]:
+    """304 if the client already has this ETag, the stored body if the server has it, otherwise None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        RESPONSE_CACHE.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    body = RESPONSE_CACHE.get(etag)
+    if body is not None:
+        return Response(body, media_type="application/json", headers=headers)
+    return None
+
+def _store_response(etag: str, headers: dict, payload) -> Response:
+    # Encoded here (not by FastAPI) so the time shows up as its own stage
+    with stage("serialize"):
+        body = dumps(payload)
+    RESPONSE_CACHE.put(etag, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+def _check_interval(interval: str) -> None:
+    if interval not in SERVED_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(SERVED_INTERVALS)}")
+
 @app.get("/predict/{coin}/latest", response_model=PredictionResponse)
-def predict_latest_price(coin: str):
+async def predict_latest_price(coin: str, request: Request, interval: str = BASE_INTERVAL):
+    """interval=4h/1d/1w predicts from features of candles rolled up from the hourly klines."""
     coin = coin.upper()
+    _check_interval(interval)
+    # Serve the precomputed snapshot for the current candle when there is one
+    entry = precompute.get(coin) if interval == BASE_INTERVAL else None
     try:
-        features = predictor.get_latest_features(coin)
-        predicted_price = predictor.predict(coin, features)
-        return {"coin": coin, "predicted_price": round(predicted_price, 2)}
+        candle, model = await _candle_and_model(coin, entry)
+        # Rolled-up candles change with every hourly candle, so the hourly one identifies them too
+        etag = make_etag(coin, candle, model, "latest", interval)
+        headers = _conditional_headers(etag, entry)
+        cached = _cached_response(request, etag, headers)
+        if cached is not None:
+            return cached
+        if entry is not None:
+            predicted_price = entry["predicted_price"]
+        else:
+            features = await predictor.get_latest_features_async(coin, interval)
+            predicted_price = await asyncio.to_thread(predictor.predict, coin, features)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Data or Model for {coin} not found")
+    except ValueError as e:
+        # Not enough candles (yet) for the features, e.g. a coarse interval without the local store
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return _store_response(etag, headers, {"coin": coin, "predicted_price": round(predicted_price, 2)})
 
 # --- Legacy Auth & History Removed (Migrated to Firebase) ---
 # The frontend now handles Authentication (Firebase Auth) and History (Firebase Firestore) directly.
@@ -63,138 +255,214 @@ def predict_latest_price(coin: str):
 # -----------------------------
 
 @app.get("/predict/{coin}/forecast")
-def predict_forecast(coin: str, steps: int = 24):
+async def predict_forecast(coin: str, request: Request, steps: int = DEFAULT_STEPS, mode: str = "deterministic",
+                           paths: int = DEFAULT_PATHS, seed: Optional[int] = None,
+                           response_format: str = Query("points", alias="format"), interval: str = BASE_INTERVAL):
+    """
+    format=points (default) returns lists of {"time": ISO string, "price"} points;
+    format=columnar returns parallel arrays ({"time": [epoch ms], "price": [...]}).
+    interval=4h/1d/1w forecasts `steps` candles of that interval from candles
+    rolled up from the hourly klines.
+    """
     coin = coin.upper()
+    _check_interval(interval)
+    # Steps capped at 168 (1 week) and paths * steps at MAX_PATH_STEPS to prevent abuse
+    steps = max(0, min(steps, 168))
+    if mode not in ("deterministic", "monte_carlo"):
+        raise HTTPException(status_code=400, detail="mode must be 'deterministic' or 'monte_carlo'")
+    if mode == "monte_carlo":
+        paths = max(1, min(paths, max_paths(steps)))
+    if response_format not in ("points", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'points' or 'columnar'")
+    columnar = response_format == "columnar"
+    precomputed = steps == DEFAULT_STEPS and mode == "deterministic" and interval == BASE_INTERVAL
+    entry = precompute.get(coin) if precomputed else None
+    # Monte Carlo results only repeat for a fixed seed
+    cacheable = mode == "deterministic" or seed is not None
     try:
-        # Steps capped at 168 (1 week) to prevent abuse
-        steps = min(steps, 168)
-        result = predictor.predict_forecast(coin, steps=steps)
-        return result
+        if cacheable:
+            candle, model = await _candle_and_model(coin, entry)
+            variant = (steps, response_format, interval)
+            if mode == "monte_carlo":
+                variant += (mode, paths, seed)
+            etag = make_etag(coin, candle, model, "forecast", *variant)
+            headers = _conditional_headers(etag, entry)
+            cached = _cached_response(request, etag, headers)
+            if cached is not None:
+                return cached
+
+        if entry is not None:
+            result = entry["forecast_columns"] if columnar else entry["forecast"]
+        elif mode == "monte_carlo":
+            result = await predictor.predict_forecast_mc_async(coin, steps=steps, paths=paths, seed=seed,
+                                                               columnar=columnar, interval=interval)
+        else:
+            result = await predictor.predict_forecast_async(coin, steps=steps, columnar=columnar, interval=interval)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Data or Model for {coin} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not cacheable:
+        with stage("serialize"):
+            return FastJSONResponse(result, headers={"Cache-Control": "no-store"})
+    return _store_response(etag, headers, result)
 
-# Simple in-memory cache for news
-NEWS_CACHE = {}
-CACHE_TTL = 600  # 10 minutes
+@app.get("/history/{coin}")
+async def get_history(coin: str, request: Request, interval: str = BASE_INTERVAL, limit: int = 100,
+                      response_format: str = Query("points", alias="format")):
+    """
+    Recent OHLCV candles of the coin at 1h, or 4h/1d/1w rolled up from the
+    hourly klines (the newest candle may still be open).
+    """
+    coin = coin.upper()
+    _check_interval(interval)
+    limit = max(1, min(limit, ROLLUP_ROWS))
+    if response_format not in ("points", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'points' or 'columnar'")
+    try:
+        candle = await predictor.last_candle_async(coin)
+        etag = make_etag(coin, candle, "history", interval, limit, response_format)
+        headers = cache_headers(etag, time.time())
+        cached = _cached_response(request, etag, headers)
+        if cached is not None:
+            return cached
+        result = await predictor.get_history_async(coin, interval, limit, columnar=response_format == "columnar")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Data for {coin} not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return _store_response(etag, headers, result)
+
+# Backtests computed at once; further requests get 429 instead of queueing up CPU work
+BACKTEST_CONCURRENCY = int(os.getenv("BACKTEST_CONCURRENCY", "1"))
+BACKTEST_SLOTS = asyncio.Semaphore(BACKTEST_CONCURRENCY)
+
+@app.get("/backtest/{coin}")
+async def get_backtest(coin: str, horizons: str = ",".join(map(str, DEFAULT_HORIZONS)),
+                       starts: int = DEFAULT_STARTS):
+    """
+    Walk-forward backtest of the coin's current model over its local history:
+    one-step error over every row and iterative forecast error per horizon.
+    Results are cached per data signature and model version. Horizons and start
+    points are limited to SERVED_HORIZONS / SERVED_STARTS so the number of
+    cached reports stays bounded.
+    """
+    coin = coin.upper()
+    try:
+        hours = [int(h) for h in horizons.split(",") if h.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="horizons must be a comma separated list of hours")
+    if not hours or not set(hours) <= set(SERVED_HORIZONS):
+        raise HTTPException(status_code=400, detail=f"horizons must be taken from {list(SERVED_HORIZONS)}")
+    if starts not in SERVED_STARTS:
+        raise HTTPException(status_code=400, detail=f"starts must be one of {list(SERVED_STARTS)}")
+    if BACKTEST_SLOTS.locked():
+        raise HTTPException(status_code=429, detail="Backtest already running, retry later",
+                            headers={"Retry-After": "5"})
+    async with BACKTEST_SLOTS:
+        try:
+            version = predictor.registry.get(coin)
+            return await asyncio.to_thread(backtest_coin, coin, hours, starts, version=version)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"Data or Model for {coin} not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+def _event_stream(coins: set, max_events: int) -> StreamingResponse:
+    return StreamingResponse(
+        broadcaster.events(coins, max_events=max_events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/stream/forecast")
+async def stream_forecasts(coins: str, max_events: int = 0):
+    """Server-sent forecast updates for a comma separated list of coins."""
+    coin_set = {c.strip().upper() for c in coins.split(",") if c.strip()}
+    if not coin_set:
+        raise HTTPException(status_code=400, detail="No coins requested")
+    return _event_stream(coin_set, max_events)
+
+@app.get("/predict/{coin}/stream")
+async def stream_forecast(coin: str, max_events: int = 0):
+    """Server-sent forecast updates for one coin."""
+    return _event_stream({coin.upper()}, max_events)
+
+# Bounded news cache (per coin, plus one shared entry for the fallback categories)
+NEWS_CACHE = NewsCache()
+# Generic categories shown for coins without news of their own
+FALLBACK_CATEGORIES = "Market,Trading,Blockchain"
+
+# Compiled keyword lexicons; remembers scores of articles it has already seen
+sentiment_engine = SentimentEngine()
 
 def analyze_sentiment(text):
     """
     Simple heuristic-based sentiment analysis for crypto news.
     Returns: (sentiment: str, score: int)
     """
-    text = text.lower()
-    
-    bullish_keywords = [
-        "surge", "jump", "rally", "record", "high", "all-time high", "ath", 
-        "adoption", "etf", "approve", "approval", "buy", "support", "bull", 
-        "bullish", "gain", "success", "launch", "partnership", "upgrade", 
-        "soar", "rocket", "breakout", "accumulate"
-    ]
-    
-    bearish_keywords = [
-        "crash", "drop", "fall", "dump", "ban", "regulation", "lawsuit", 
-        "sue", "hack", "scam", "bear", "bearish", "loss", "fail", "delay", 
-        "reject", "warning", "risk", "critical", "plunge", "collapse", 
-        "correction", "investigation"
-    ]
-    
-    score = 50  # Neutral base
-    sentiment = "Neutral"
-    
-    # Calculate score adjustments
-    bullish_count = sum(1 for word in bullish_keywords if word in text)
-    bearish_count = sum(1 for word in bearish_keywords if word in text)
-    
-    if bullish_count > bearish_count:
-        sentiment = "Bullish"
-        score = min(95, 60 + (bullish_count * 10))
-    elif bearish_count > bullish_count:
-        sentiment = "Bearish"
-        score = max(15, 40 - (bearish_count * 10))
-    
-    # Determine strength based on keywords
-    if "record" in text or "crash" in text or "hack" in text or "etf" in text:
-        if sentiment == "Bullish": score = min(98, score + 10)
-        elif sentiment == "Bearish": score = max(10, score - 10)
-
-    return sentiment, score
+    return sentiment_engine.score(text)
+
+async def fetch_news(category: str) -> list:
+    """Latest articles for a CryptoCompare category, scored for sentiment. Raises on upstream errors."""
+    url = f"{CRYPTOCOMPARE_API_URL}/data/v2/news/"
+    data = await http_client.get_json(url, params={"lang": "EN", "categories": category})
+    items = []
+    if 'Data' in data:
+        for item in data['Data'][:6]:
+            items.append({
+                "id": item.get('id'),
+                "title": item.get('title'),
+                "url": item.get('url'),
+                "image_url": item.get('imageurl'),
+                "source": item.get('source_info', {}).get('name'),
+                "published_on": item.get('published_on'),
+                "body": item.get('body', '')  # Get body for analysis
+            })
+
+    # Perform Sentiment Analysis on combined title and body, one batch per response
+    for item, (sentiment, score) in zip(items, sentiment_engine.score_articles(items)):
+        item['sentiment'] = sentiment
+        item['impact_score'] = score
+    return items
+
+async def cached_news(category: str):
+    """(items, fetched) from the news cache; an upstream failure gives no items and is not cached."""
+    try:
+        return await NEWS_CACHE.get(category, lambda: fetch_news(category))
+    except Exception as e:
+        print(f"Error fetching news for {category}: {e}")
+        UPSTREAM_FAILURES.inc(upstream="cryptocompare")
+        return [], True
 
 @app.get("/news/{coin}")
-def get_news(coin: str):
-    import requests
-    import time
-    
+async def get_news(coin: str):
     coin = coin.upper()
-    current_time = time.time()
-    
-    # Check Cache
-    if coin in NEWS_CACHE:
-        timestamp, cached_data = NEWS_CACHE[coin]
-        if current_time - timestamp < CACHE_TTL:
-            return {"coin": coin, "news": cached_data, "source": "cache"}
-            
-    # Prepare Fetch
-    def fetch_from_api(category):
-        url = f"https://min-api.cryptocompare.com/data/v2/news/?lang=EN&categories={category}"
-        try:
-            response = requests.get(url, timeout=5)
-            data = response.json()
-            items = []
-            if 'Data' in data:
-                for item in data['Data'][:6]:
-                    items.append({
-                        "id": item.get('id'),
-                        "title": item.get('title'),
-                        "url": item.get('url'),
-                        "image_url": item.get('imageurl'),
-                        "source": item.get('source_info', {}).get('name'),
-                        "published_on": item.get('published_on'),
-                        "body": item.get('body', '')  # Get body for analysis
-                    })
-            return items
-        except Exception as e:
-            print(f"Error fetching news for {category}: {e}")
-            return []
+    news_items, fetched = await cached_news(coin)
 
-    # Primary Fetch
-    news_items = fetch_from_api(coin)
-    
-    # Fallback if empty (try 'Market' or 'Trading' generic tags if specific coin has no news)
+    # Fallback if empty: coins without news share one cached entry for the generic tags
     if not news_items:
-        print(f"No news for {coin}, fetching general Market news.")
-        news_items = fetch_from_api("Market,Trading,Blockchain")
-        
-    # Update Cache
-    if news_items:
-        # Perform Sentiment Analysis
-        for item in news_items:
-            # Analyze combined title and body for better context
-            full_text = f"{item['title']} {item.get('body', '')}"
-            sentiment, score = analyze_sentiment(full_text)
-            item['sentiment'] = sentiment
-            item['impact_score'] = score
-            
-        NEWS_CACHE[coin] = (current_time, news_items)
-        
-    return {"coin": coin, "news": news_items, "source": "api"}
+        news_items, fallback_fetched = await cached_news(FALLBACK_CATEGORIES)
+        fetched = fetched or fallback_fetched
+
+    return {"coin": coin, "news": news_items, "source": "api" if fetched else "cache"}
 
 # --- Static File Serving (SPA Support) ---
 
-# Only mount static files if the directory exists (for production deployment)
-if os.path.exists("static/assets"):
-    app.mount("/assets", StaticFiles(directory="static/assets"), name="assets")
+# Only serve the frontend if it has been built (for production deployment).
+# Files are indexed and compressed once here; requests never touch the disk.
+static_index = StaticIndex()
+if os.path.exists(os.path.join(static_index.root, "assets")):
+    static_index.load()
 
-    # Catch-all route to serve index.html for any path not matched by API
+    # Catch-all route: files from the index, index.html for any other path not matched by the API
     @app.get("/{full_path:path}")
-    async def serve_react_app(full_path: str):
-        file_path = f"static/{full_path}"
-        # If the file exists (e.g., favicon.ico), serve it
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
-        # Otherwise, return index.html for client-side routing
-        return FileResponse("static/index.html")
+    async def serve_react_app(full_path: str, request: Request):
+        return static_index.serve(full_path, request.headers)
 
 if __name__ == "__main__":
     import uvicorn
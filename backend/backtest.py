@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from indicators import FEATURE_COLS, MIN_HISTORY, BatchIndicatorEngine, compute_features
+from model_registry import MODELS_DIR, ModelRegistry, ModelVersion
+from ohlcv_store import STORE_DIR, OHLCVStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+# Reports are cached here, keyed by data signature, model version and parameters
+BACKTEST_CACHE_DIR = os.getenv("BACKTEST_CACHE_DIR", os.path.join(DATA_DIR, 'backtests'))
+
+# Forecast horizons (hours) reported by default, and start points per backtest
+DEFAULT_HORIZONS = (1, 6, 24, 72, 168)
+DEFAULT_STARTS = 1000
+MAX_HORIZON = 168
+MAX_STARTS = 20000
+# What GET /backtest accepts, so clients cannot create reports for arbitrary parameters
+SERVED_HORIZONS = (1, 6, 12, 24, 72, 168)
+SERVED_STARTS = (100, 1000, 5000)
+# Reports kept in the cache directory; the least recently used ones are removed
+MAX_CACHED_REPORTS = 256
+
+OHLCV_COLS = ['open_time', 'high', 'low', 'close', 'volume']
+
+
+def load_history(coin: str, data_dir: str = DATA_DIR, store_dir: str = STORE_DIR) -> pd.DataFrame:
+    """Full hourly history of a coin: the local columnar store if built, otherwise the ML-ready CSV."""
+    store = OHLCVStore(store_dir)
+    symbol = f"{coin}USDT"
+    if store.exists(symbol, "1h"):
+        return store.tail(symbol, "1h", store.count(symbol, "1h"))
+
+    data_path = os.path.join(data_dir, f"{coin}_ML_ready.csv")
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data file not found: {data_path}")
+    df = pd.read_csv(data_path, usecols=OHLCV_COLS)
+    df['open_time'] = pd.to_datetime(df['open_time'])
+    return df
+
+
+def history_signature(coin: str, data_dir: str = DATA_DIR, store_dir: str = STORE_DIR) -> str:
+    """
+    Cheap identity of what load_history would return, without reading it: the
+    store's row count and last open_time, or the CSV's size and mtime.
+    """
+    store = OHLCVStore(store_dir)
+    symbol = f"{coin}USDT"
+    if store.exists(symbol, "1h"):
+        return f"store:{store.count(symbol, '1h')}:{store.last_open_time(symbol, '1h')}"
+
+    data_path = os.path.join(data_dir, f"{coin}_ML_ready.csv")
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data file not found: {data_path}")
+    stat = os.stat(data_path)
+    return f"csv:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """sha256 (first 12 hex chars) of the OHLCV columns; changes whenever a candle does."""
+    h = hashlib.sha256()
+    open_time = pd.to_datetime(df['open_time']).to_numpy(dtype='datetime64[ms]').astype('<i8')
+    h.update(open_time.tobytes())
+    for name in ('high', 'low', 'close', 'volume'):
+        h.update(np.ascontiguousarray(df[name], dtype='<f8').tobytes())
+    return h.hexdigest()[:12]
+
+
+def error_metrics(predicted: np.ndarray, actual: np.ndarray, base: np.ndarray) -> Dict[str, float]:
+    """
+    MAE / RMSE / MAPE (%) of predicted vs actual prices, and how often the
+    predicted move from `base` (the last known close) has the actual sign.
+    """
+    error = predicted - actual
+    if len(error) == 0:
+        return {"count": 0, "mae": None, "rmse": None, "mape": None, "direction_accuracy": None}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mape = np.nanmean(np.abs(error / actual)) * 100
+    return {
+        "count": int(len(error)),
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "mape": float(mape),
+        "direction_accuracy": float(np.mean(np.sign(predicted - base) == np.sign(actual - base))),
+    }
+
+
+def score_rows(features: np.ndarray, close: np.ndarray, version: ModelVersion) -> Dict[str, float]:
+    """One-step-ahead error of every row with a full feature row, scored with one predict call."""
+    X = features[:-1]
+    valid = ~np.isnan(X).any(axis=1)
+    predicted = np.asarray(version.predict(X[valid]), dtype=float).reshape(-1)
+    return error_metrics(predicted, close[1:][valid], close[:-1][valid])
+
+
+def start_rows(n: int, horizon: int, starts: int) -> np.ndarray:
+    """Up to `starts` evenly spaced rows with enough history before and `horizon` actual candles after."""
+    first, last = MIN_HISTORY - 1, n - 1 - horizon
+    if last < first:
+        return np.empty(0, dtype=int)
+    return np.unique(np.linspace(first, last, min(starts, last - first + 1)).round().astype(int))
+
+
+def walk_forward(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                 version: ModelVersion, horizons: Sequence[int], rows: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """
+    Iterative forecasts started from every row in `rows` at once, fed back the
+    same way as Predictor.predict_forecast (high = low = close = prediction,
+    volume carried forward). Returns error metrics per horizon.
+    """
+    horizons = sorted(set(horizons))
+    if len(rows) == 0:
+        return {str(h): error_metrics(np.empty(0), np.empty(0), np.empty(0)) for h in horizons}
+
+    batch = BatchIndicatorEngine.from_history(high, low, close, volume, rows)
+    last_volume = volume[rows]
+    X = np.empty((len(rows), len(FEATURE_COLS)))
+    predicted = {}
+    for step in range(1, horizons[-1] + 1):
+        prediction = np.asarray(version.predict(batch.feature_matrix(X)), dtype=float).reshape(-1)
+        if step in horizons:
+            predicted[step] = prediction
+        batch.update(prediction, prediction, prediction, last_volume)
+
+    return {str(h): error_metrics(predicted[h], close[rows + h], close[rows]) for h in horizons}
+
+
+def model_key(version: ModelVersion) -> Optional[str]:
+    """Content hash identifying the model; None for in-memory models that cannot be hashed."""
+    if version.source != 'memory':
+        return version.version
+    if version.linear is None:
+        return None
+    weights, bias = version.linear
+    return hashlib.sha256(np.ascontiguousarray(weights).tobytes() + repr(bias).encode()).hexdigest()[:12]
+
+
+def _cache_path(cache_dir: str, coin: str, key: dict) -> str:
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{coin}_{digest}.json")
+
+
+def _prune_cache(cache_dir: str, keep: int) -> None:
+    """Removes all but the `keep` most recently used reports."""
+    reports = []
+    for name in os.listdir(cache_dir):
+        if name.endswith('.json'):
+            try:
+                reports.append((os.stat(os.path.join(cache_dir, name)).st_mtime, name))
+            except FileNotFoundError:
+                pass  # Removed by a concurrent prune
+    for _, name in sorted(reports, reverse=True)[keep:]:
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def backtest_coin(coin: str, horizons: Sequence[int] = DEFAULT_HORIZONS, starts: int = DEFAULT_STARTS,
+                  version: Optional[ModelVersion] = None, models_dir: str = MODELS_DIR,
+                  data: Optional[pd.DataFrame] = None, data_dir: str = DATA_DIR,
+                  cache_dir: Optional[str] = BACKTEST_CACHE_DIR, refresh: bool = False) -> dict:
+    """
+    Backtest of one coin's model over its full history:
+    - one_step: every row scored against the next close (features computed
+      once, one matrix product)
+    - horizons: iterative forecasts from `starts` evenly spaced rows, scored
+      against the actual close `h` hours later
+
+    Reports are cached in `cache_dir` by data identity, model version and
+    parameters (at most MAX_CACHED_REPORTS, least recently used dropped
+    first); pass refresh=True to recompute, or cache_dir=None to skip it.
+    Local history is identified by history_signature, so a cache hit does not
+    read it; a frame passed as `data` is identified by its data_hash.
+    """
+    coin = coin.upper()
+    horizons = sorted(set(int(h) for h in horizons))
+    if not horizons or horizons[0] < 1 or horizons[-1] > MAX_HORIZON:
+        raise ValueError(f"Horizons must be between 1 and {MAX_HORIZON}")
+    starts = max(1, min(int(starts), MAX_STARTS))
+
+    if version is None:
+        version = ModelRegistry(models_dir).get(coin)
+    signature = data_hash(data) if data is not None else history_signature(coin, data_dir)
+    key = {"coin": coin, "data": signature, "model": model_key(version), "horizons": horizons, "starts": starts}
+
+    path = _cache_path(cache_dir, coin, key) if cache_dir and key["model"] else None
+    if path and not refresh:
+        try:
+            with open(path) as f:
+                report = json.load(f)
+            os.utime(path)  # Marks the report as recently used
+            return {**report, "cached": True}
+        except FileNotFoundError:
+            pass  # Not computed yet, or just pruned
+
+    df = data if data is not None else load_history(coin, data_dir)
+    high, low, close, volume = (df[name].to_numpy(dtype=float) for name in ('high', 'low', 'close', 'volume'))
+    features = compute_features(high, low, close, volume)
+    rows = start_rows(len(close), horizons[-1], starts)
+
+    open_time = pd.to_datetime(df['open_time'])
+    report = {
+        **key,
+        "rows": int(len(df)),
+        "start": open_time.iloc[0].isoformat() if len(df) else None,
+        "end": open_time.iloc[-1].isoformat() if len(df) else None,
+        "one_step": score_rows(features, close, version),
+        "horizons": walk_forward(high, low, close, volume, version, horizons, rows),
+        "start_points": int(len(rows)),
+    }
+
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(report, f)
+        os.replace(tmp, path)
+        _prune_cache(cache_dir, MAX_CACHED_REPORTS)
+    return {**report, "cached": False}
+
+
+def _backtest_or_error(coin: str, kwargs: dict) -> dict:
+    try:
+        return backtest_coin(coin, **kwargs)
+    except Exception as e:
+        return {"coin": coin.upper(), "error": f"{type(e).__name__}: {e}"}
+
+
+def run_backtests(coins: Iterable[str], workers: Optional[int] = None, **kwargs) -> List[dict]:
+    """
+    Backtests several coins in a process pool (one coin per task). Each worker
+    loads its own data and model; failures are reported per coin as {"coin", "error"}.
+    """
+    coins = list(coins)
+    if workers == 1 or len(coins) <= 1:
+        return [_backtest_or_error(coin, kwargs) for coin in coins]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_backtest_or_error, coins, [kwargs] * len(coins)))
@@ -0,0 +1,83 @@
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from market_cache import next_candle_close
+
+# Encoded response bodies kept for repeat requests (a few per coin and steps value)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the values a response depends on."""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def version_tag(version) -> str:
+    """Identifies a ModelVersion: its content hash, or its load time for in-memory models."""
+    return version.version if version.source != 'memory' else f"memory-{version.loaded_at!r}"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value lists `etag` (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, now: float, interval: str = "1h") -> Dict[str, str]:
+    """ETag plus a Cache-Control max-age that runs out when the current candle closes."""
+    max_age = max(0, math.ceil(next_candle_close(now, interval) - now))
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+
+class ResponseCache:
+    """Small thread-safe LRU of encoded response bodies keyed by ETag."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(etag)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(etag)
+            self.hits += 1
+            return body
+
+    def put(self, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[etag] = body
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "entries": len(self._entries),
+            }
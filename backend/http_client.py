@@ -0,0 +1,82 @@
+import asyncio
+import os
+import socket
+from typing import Any, Dict, Optional
+
+import httpx
+
+# Defaults can be tuned per deployment through the environment
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", "5"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10"))
+UPSTREAM_CONCURRENCY = int(os.getenv("UPSTREAM_CONCURRENCY", "10"))
+
+
+class UpstreamClient:
+    """
+    Shared async HTTP client for Binance / CryptoCompare calls.
+
+    Keeps one keep-alive connection pool per event loop and caps the number of
+    requests in flight with a semaphore, so a burst of API traffic cannot open
+    an unbounded number of upstream connections.
+    """
+
+    def __init__(self, timeout: float = UPSTREAM_TIMEOUT, max_connections: int = UPSTREAM_MAX_CONNECTIONS,
+                 max_keepalive: int = UPSTREAM_MAX_KEEPALIVE, concurrency: int = UPSTREAM_CONCURRENCY):
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.concurrency = concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # Pools are bound to the loop they were created on (tests and reloads
+        # may run several loops), so start a fresh one when the loop changes.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._discard_client()
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._client
+
+    def _discard_client(self) -> None:
+        """
+        Releases the pool of a client bound to another loop. aclose() has to run
+        on that loop: it is scheduled there while the loop runs, otherwise (the
+        loop stopped or closed, e.g. after asyncio.run) the pooled sockets are
+        shut down directly so the connections do not linger until GC.
+        """
+        client, loop = self._client, self._loop
+        self._client = None
+        if client is None:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        pool = getattr(client._transport, "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            stream = getattr(getattr(connection, "_connection", None), "_network_stream", None)
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass  # Already disconnected
+
+    async def get_json(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None) -> Any:
+        """GETs a URL and decodes the JSON body. Raises httpx.HTTPError on failure."""
+        client = self._ensure_client()
+        async with self._semaphore:
+            response = await client.get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response.json()
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+            self._client = None
+        self._discard_client()
+        self._semaphore = None
+        self._loop = None
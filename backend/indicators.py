@@ -0,0 +1,518 @@
+import math
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Column order expected by the scaler and model for every coin
+FEATURE_COLS = ['SMA_20', 'RSI_14', 'volatility_20', 'close_lag_1', 'close_lag_2', 'close_lag_3', 'close_lag_7',
+                'MACD', 'MACD_signal', 'MACD_hist', 'BB_upper', 'BB_lower', 'BB_width', 'ATR', 'OBV']
+
+LAGS = [1, 2, 3, 7]
+
+# Candles needed before every feature of a row is defined (IndicatorEngine.ready)
+MIN_HISTORY = 20
+
+# Rows per vectorized step of the EMA scan; small enough that decay**-EMA_BLOCK
+# cannot overflow for any of the MACD spans
+EMA_BLOCK = 128
+
+_COL = {name: i for i, name in enumerate(FEATURE_COLS)}
+
+
+def _arrays(df: pd.DataFrame) -> tuple:
+    return tuple(df[name].to_numpy(dtype=float) for name in ('high', 'low', 'close', 'volume'))
+
+
+def _ema(x: np.ndarray, span: int, out: np.ndarray) -> np.ndarray:
+    """
+    pandas ewm(span, adjust=False).mean() into `out`: y0 = x0, y = y + a * (x - y).
+    Each block of rows is solved in closed form relative to the value before it,
+    y_j = d^(j+1) * (prev + a * sum_{i<=j} x_i / d^(i+1)), with d = 1 - a.
+    """
+    alpha = 2.0 / (span + 1)
+    powers = (1.0 - alpha) ** np.arange(1, EMA_BLOCK + 1)
+    out[0] = prev = x[0]
+    for start in range(1, len(x), EMA_BLOCK):
+        block = x[start:start + EMA_BLOCK]
+        p = powers[:len(block)]
+        seg = out[start:start + len(block)]
+        np.cumsum(block / p, out=seg)
+        seg *= alpha
+        seg += prev
+        seg *= p
+        prev = seg[-1]
+    return out
+
+
+def _rolling_mean(x: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    """Trailing mean into out[window - 1:]; earlier rows are left untouched."""
+    if len(x) >= window:
+        np.mean(np.lib.stride_tricks.sliding_window_view(x, window), axis=1, out=out[window - 1:])
+    return out
+
+
+def _rolling_std(x: np.ndarray, window: int, out: np.ndarray) -> np.ndarray:
+    if len(x) >= window:
+        np.std(np.lib.stride_tricks.sliding_window_view(x, window), axis=1, ddof=1, out=out[window - 1:])
+    return out
+
+
+def _rsi(gain: np.ndarray, loss: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """100 - 100 / (1 + gain / loss): 100 when only gains, NaN when flat."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(gain, loss, out=out)
+        out += 1.0
+        np.divide(100.0, out, out=out)
+        np.subtract(100.0, out, out=out)
+    return out
+
+
+def compute_features(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    Every feature for every row, as an (n_rows, len(FEATURE_COLS)) array in
+    FEATURE_COLS order. Rows without enough history hold NaN, exactly where the
+    original pandas pipeline produced NaN.
+
+    All columns are written into one preallocated buffer (one contiguous row
+    per feature, returned transposed) using a handful of vectorized passes.
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    out = np.full((len(FEATURE_COLS), n), np.nan)
+    if n == 0:
+        return out.T
+    col = {name: out[i] for name, i in _COL.items()}
+
+    # Price change; the first row has none (pandas diff() gives NaN, where() maps it to 0)
+    delta = np.empty(n)
+    delta[0] = 0.0
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+
+    # SMA / volatility / Bollinger Bands (20, 2)
+    sma, vol = col['SMA_20'], col['volatility_20']
+    _rolling_mean(close, 20, sma)
+    _rolling_std(close, 20, vol)
+    np.add(sma, 2 * vol, out=col['BB_upper'])
+    np.subtract(sma, 2 * vol, out=col['BB_lower'])
+    np.divide(col['BB_upper'] - col['BB_lower'], sma, out=col['BB_width'])
+
+    # RSI (14) from the average gain and loss
+    gain = np.full(n, np.nan)
+    loss = np.full(n, np.nan)
+    _rolling_mean(np.maximum(delta, 0.0), 14, gain)
+    _rolling_mean(np.maximum(-delta, 0.0), 14, loss)
+    _rsi(gain, loss, col['RSI_14'])
+
+    # Lags
+    for lag in LAGS:
+        col[f'close_lag_{lag}'][lag:] = close[:n - lag]
+
+    # MACD (12, 26, 9)
+    macd = col['MACD']
+    _ema(close, 12, macd)
+    macd -= _ema(close, 26, np.empty(n))
+    _ema(macd, 9, col['MACD_signal'])
+    np.subtract(macd, col['MACD_signal'], out=col['MACD_hist'])
+
+    # ATR (14); the first row has no previous close, so its range is high - low
+    true_range = np.subtract(high, low, dtype=float)
+    prev = close[:-1]
+    np.fmax(true_range[1:], np.abs(high[1:] - prev), out=true_range[1:])
+    np.fmax(true_range[1:], np.abs(low[1:] - prev), out=true_range[1:])
+    _rolling_mean(true_range, 14, col['ATR'])
+
+    # OBV
+    np.cumsum(np.sign(delta) * volume, out=col['OBV'])
+
+    return out.T
+
+
+def latest_features(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    Feature row of the last candle only, in FEATURE_COLS order. Window features
+    read just the tail of the arrays; only the EMAs and OBV need the full history.
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    row = np.full(len(FEATURE_COLS), np.nan)
+    if n == 0:
+        return row
+
+    if n >= 20:
+        tail = close[-20:]
+        sma, vol = tail.mean(), tail.std(ddof=1)
+        row[_COL['SMA_20']], row[_COL['volatility_20']] = sma, vol
+        upper, lower = sma + vol * 2, sma - vol * 2
+        row[_COL['BB_upper']], row[_COL['BB_lower']] = upper, lower
+        row[_COL['BB_width']] = (upper - lower) / sma
+
+    if n >= 15:
+        delta = np.diff(close[-15:])
+        _rsi(np.maximum(delta, 0.0).mean(keepdims=True), np.maximum(-delta, 0.0).mean(keepdims=True),
+             row[_COL['RSI_14']:_COL['RSI_14'] + 1])
+    elif n == 14:
+        # The first row's missing change counts as a zero gain and loss
+        delta = np.concatenate([[0.0], np.diff(close)])
+        _rsi(np.maximum(delta, 0.0).mean(keepdims=True), np.maximum(-delta, 0.0).mean(keepdims=True),
+             row[_COL['RSI_14']:_COL['RSI_14'] + 1])
+
+    for lag in LAGS:
+        if n > lag:
+            row[_COL[f'close_lag_{lag}']] = close[-1 - lag]
+
+    macd = _ema(close, 12, np.empty(n)) - _ema(close, 26, np.empty(n))
+    signal = _ema(macd, 9, np.empty(n))[-1]
+    row[_COL['MACD']], row[_COL['MACD_signal']], row[_COL['MACD_hist']] = macd[-1], signal, macd[-1] - signal
+
+    if n >= 14:
+        h, l = np.asarray(high[-14:], dtype=float), np.asarray(low[-14:], dtype=float)
+        true_range = h - l
+        if n > 14:
+            prev = close[-15:-1]
+        else:
+            prev = np.concatenate([[np.nan], close[-14:-1]])
+        true_range = np.fmax(np.fmax(true_range, np.abs(h - prev)), np.abs(l - prev))
+        row[_COL['ATR']] = true_range.mean()
+
+    row[_COL['OBV']] = np.dot(np.sign(np.diff(close)), np.asarray(volume[1:], dtype=float))
+    return row
+
+
+def feature_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of an OHLCV frame with every feature column added."""
+    # One block for all feature columns instead of 15 column insertions
+    features = pd.DataFrame(compute_features(*_arrays(df)), index=df.index, columns=FEATURE_COLS)
+    out = pd.concat([df.drop(columns=[c for c in FEATURE_COLS if c in df.columns]), features], axis=1)
+    out['close'] = out['close'].astype(float)
+    return out
+
+
+def latest_feature_row(df: pd.DataFrame) -> np.ndarray:
+    """latest_features for an OHLCV frame."""
+    return latest_features(*_arrays(df))
+
+
+class _RollingWindow:
+    """
+    Fixed-size window keeping a running sum (and optionally a running sum of
+    squared deviations) so that mean/std are O(1) per update.
+    """
+
+    def __init__(self, size: int, track_var: bool = False):
+        self.size = size
+        self.track_var = track_var
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.nonzero = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        full = len(self.values) == self.size
+        old = self.values[0] if full else None
+        self.values.append(x)
+
+        # Running sum; reset to an exact zero when every entry is zero so that
+        # ratios like RSI do not pick up residue from the add/remove updates.
+        self.total += x - (old if full else 0.0)
+        self.nonzero += (x != 0.0) - (full and old != 0.0)
+        if self.nonzero == 0:
+            self.total = 0.0
+
+        if not self.track_var:
+            return
+
+        # Welford update (sliding when the window is full)
+        n = len(self.values)
+        prev_mean = self.mean
+        if full:
+            self.mean = prev_mean + (x - old) / n
+            self.m2 += (x - old) * (x - self.mean + old - prev_mean)
+        else:
+            self.mean = prev_mean + (x - prev_mean) / n
+            self.m2 += (x - prev_mean) * (x - self.mean)
+        if self.m2 < 0.0:
+            self.m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.size
+
+    def average(self) -> float:
+        return self.total / self.size if self.ready else math.nan
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.size - 1)) if self.ready else math.nan
+
+
+class IndicatorEngine:
+    """
+    Streaming version of compute_features.
+
+    Holds running state for every indicator so that appending a candle and
+    reading the latest feature row are both O(1), instead of recomputing the
+    whole frame. Seeded with the same rows that compute_features would see,
+    it produces the same values for the last row (up to floating-point error).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = math.nan
+        self.closes = deque(maxlen=max(LAGS) + 1)
+
+        self.sma = _RollingWindow(20, track_var=True)
+        self.gain = _RollingWindow(14)
+        self.loss = _RollingWindow(14)
+        self.true_range = _RollingWindow(14)
+
+        self.ema_fast = math.nan
+        self.ema_slow = math.nan
+        self.macd_signal = math.nan
+        self.obv = 0.0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IndicatorEngine':
+        """Builds an engine warmed up on every row of an OHLCV frame."""
+        engine = cls()
+        highs = df['high'].to_numpy(dtype=float)
+        lows = df['low'].to_numpy(dtype=float)
+        closes = df['close'].to_numpy(dtype=float)
+        volumes = df['volume'].to_numpy(dtype=float)
+        for row in zip(highs.tolist(), lows.tolist(), closes.tolist(), volumes.tolist()):
+            engine.update(*row)
+        return engine
+
+    def update(self, high: float, low: float, close: float, volume: float) -> None:
+        """Appends one candle and advances every indicator."""
+        prev = self.prev_close
+        first = self.count == 0
+
+        # Price delta for RSI / OBV (pandas diff() gives NaN on the first row,
+        # which where()/fillna() turn into zero)
+        delta = 0.0 if first else close - prev
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+
+        self.sma.push(close)
+        self.closes.append(close)
+
+        # MACD (12, 26, 9) with adjust=False: y0 = x0, y = (1 - a) * y + a * x
+        if first:
+            self.ema_fast = close
+            self.ema_slow = close
+            self.macd_signal = 0.0
+        else:
+            self.ema_fast += (close - self.ema_fast) * (2.0 / 13.0)
+            self.ema_slow += (close - self.ema_slow) * (2.0 / 27.0)
+            macd = self.ema_fast - self.ema_slow
+            self.macd_signal += (macd - self.macd_signal) * (2.0 / 10.0)
+
+        # True range; the previous close is missing on the first row
+        if first:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - prev), abs(low - prev))
+        self.true_range.push(tr)
+
+        # OBV
+        if delta > 0:
+            self.obv += volume
+        elif delta < 0:
+            self.obv -= volume
+
+        self.prev_close = close
+        self.count += 1
+
+    @property
+    def ready(self) -> bool:
+        """True once every feature of the latest row is defined."""
+        return self.count > max(LAGS) and self.sma.ready and self.gain.ready and self.true_range.ready
+
+    def features(self) -> Dict[str, float]:
+        """Returns the feature row for the latest candle (NaN where undefined)."""
+        sma = self.sma.average()
+        vol = self.sma.std()
+
+        gain = self.gain.average()
+        loss = self.loss.average()
+        if math.isnan(gain) or (gain == 0.0 and loss == 0.0):
+            rsi = math.nan
+        elif loss == 0.0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        closes = self.closes
+        lags = {lag: closes[-1 - lag] if len(closes) > lag else math.nan for lag in LAGS}
+
+        macd = self.ema_fast - self.ema_slow
+        bb_upper = sma + vol * 2
+        bb_lower = sma - vol * 2
+
+        return {
+            'SMA_20': sma,
+            'RSI_14': rsi,
+            'volatility_20': vol,
+            'close_lag_1': lags[1],
+            'close_lag_2': lags[2],
+            'close_lag_3': lags[3],
+            'close_lag_7': lags[7],
+            'MACD': macd,
+            'MACD_signal': self.macd_signal,
+            'MACD_hist': macd - self.macd_signal,
+            'BB_upper': bb_upper,
+            'BB_lower': bb_lower,
+            'BB_width': (bb_upper - bb_lower) / sma,
+            'ATR': self.true_range.average(),
+            'OBV': self.obv,
+        }
+
+    def feature_vector(self) -> np.ndarray:
+        """Latest feature row as a float array in FEATURE_COLS order."""
+        row = self.features()
+        return np.array([row[col] for col in FEATURE_COLS], dtype=float)
+
+
+class BatchIndicatorEngine:
+    """
+    IndicatorEngine for many price paths at once.
+
+    Starts every path from the state of a warmed-up IndicatorEngine; each
+    update() then takes one candle per path as arrays and advances all paths
+    with a few vectorized operations. Window sums are kept as running totals
+    over ring buffers, so a step costs O(paths) regardless of window length.
+    """
+
+    def __init__(self, engine: IndicatorEngine, paths: int):
+        if not engine.ready:
+            raise ValueError("Not enough data to calculate features")
+
+        def tile(values) -> np.ndarray:
+            return np.tile(np.asarray(values, dtype=float), (paths, 1))
+
+        def full(value: float) -> np.ndarray:
+            return np.full(paths, value)
+
+        self._set_state(tile(engine.sma.values), tile(engine.gain.values), tile(engine.loss.values),
+                        tile(engine.true_range.values), tile(engine.closes), full(engine.ema_fast),
+                        full(engine.ema_slow), full(engine.macd_signal), full(engine.obv))
+
+    @classmethod
+    def from_history(cls, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+                     rows: np.ndarray) -> 'BatchIndicatorEngine':
+        """
+        One path per entry of `rows`, each starting from the state an
+        IndicatorEngine would have after the candles up to and including that
+        row. Used to forecast from many points of one history at once.
+        """
+        rows = np.asarray(rows, dtype=int)
+        if len(rows) and (rows.min() < MIN_HISTORY - 1 or rows.max() >= len(close)):
+            raise ValueError(f"Start rows must be in [{MIN_HISTORY - 1}, {len(close) - 1}]")
+
+        delta = np.diff(close, prepend=close[0])
+        prev = np.concatenate([close[:1], close[:-1]])
+        true_range = np.maximum(np.maximum(high - low, np.abs(high - prev)), np.abs(low - prev))
+        true_range[0] = high[0] - low[0]
+
+        def windows(x: np.ndarray, size: int) -> np.ndarray:
+            # Row r of the result holds x[r - size + 1 : r + 1], oldest first
+            return np.lib.stride_tricks.sliding_window_view(x, size)[rows - size + 1]
+
+        ema_fast = _ema(close, 12, np.empty_like(close))
+        ema_slow = _ema(close, 26, np.empty_like(close))
+        macd_signal = _ema(ema_fast - ema_slow, 9, np.empty_like(close))
+        obv = np.cumsum(np.sign(delta) * volume)
+
+        engine = cls.__new__(cls)
+        engine._set_state(windows(close, 20), windows(np.maximum(delta, 0.0), 14), windows(np.maximum(-delta, 0.0), 14),
+                          windows(true_range, 14), windows(close, max(LAGS) + 1), ema_fast[rows], ema_slow[rows],
+                          macd_signal[rows], obv[rows])
+        return engine
+
+    def _set_state(self, window: np.ndarray, gain: np.ndarray, loss: np.ndarray, true_range: np.ndarray,
+                   closes: np.ndarray, ema_fast: np.ndarray, ema_slow: np.ndarray, macd_signal: np.ndarray,
+                   obv: np.ndarray) -> None:
+        # Windows are (paths, size) with the oldest value in column 0
+        self.paths = len(window)
+        self.steps = 0
+
+        # SMA/volatility window stored relative to each path's last close to
+        # keep the sum of squares well conditioned
+        self.prev_close = np.array(closes[:, -1], dtype=float)
+        self.ref = self.prev_close.copy()
+        self.window = window - self.ref[:, None]
+        self.window_sum = self.window.sum(axis=1)
+        self.window_sumsq = (self.window ** 2).sum(axis=1)
+
+        self.gain = np.array(gain, dtype=float)
+        self.loss = np.array(loss, dtype=float)
+        self.true_range = np.array(true_range, dtype=float)
+        self.gain_sum = self.gain.sum(axis=1)
+        self.loss_sum = self.loss.sum(axis=1)
+        self.true_range_sum = self.true_range.sum(axis=1)
+        self.closes = np.array(closes, dtype=float)
+
+        self.ema_fast = np.array(ema_fast, dtype=float)
+        self.ema_slow = np.array(ema_slow, dtype=float)
+        self.macd_signal = np.array(macd_signal, dtype=float)
+        self.obv = np.array(obv, dtype=float)
+
+    @staticmethod
+    def _push(buffer: np.ndarray, total: np.ndarray, index: int, values: np.ndarray) -> None:
+        total += values - buffer[:, index]
+        buffer[:, index] = values
+
+    def update(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> None:
+        """Appends one candle to every path (arrays of shape (paths,))."""
+        prev = self.prev_close
+        delta = close - prev
+
+        self._push(self.gain, self.gain_sum, self.steps % self.gain.shape[1], np.maximum(delta, 0.0))
+        self._push(self.loss, self.loss_sum, self.steps % self.loss.shape[1], np.maximum(-delta, 0.0))
+
+        i = self.steps % self.window.shape[1]
+        shifted = close - self.ref
+        self.window_sumsq += shifted ** 2 - self.window[:, i] ** 2
+        self._push(self.window, self.window_sum, i, shifted)
+        self.closes[:, self.steps % self.closes.shape[1]] = close
+
+        self.ema_fast += (close - self.ema_fast) * (2.0 / 13.0)
+        self.ema_slow += (close - self.ema_slow) * (2.0 / 27.0)
+        self.macd_signal += (self.ema_fast - self.ema_slow - self.macd_signal) * (2.0 / 10.0)
+
+        tr = np.maximum(np.maximum(high - low, np.abs(high - prev)), np.abs(low - prev))
+        self._push(self.true_range, self.true_range_sum, self.steps % self.true_range.shape[1], tr)
+
+        self.obv += np.sign(delta) * volume
+        self.prev_close = close.astype(float, copy=True)
+        self.steps += 1
+
+    def feature_matrix(self, out: np.ndarray = None) -> np.ndarray:
+        """Latest feature row of every path, shape (paths, len(FEATURE_COLS))."""
+        if out is None:
+            out = np.empty((self.paths, len(FEATURE_COLS)))
+        n = self.window.shape[1]
+        mean = self.window_sum / n
+        sma = mean + self.ref
+        vol = np.sqrt(np.maximum(self.window_sumsq - self.window_sum * mean, 0.0) / (n - 1))
+
+        out[:, _COL['SMA_20']] = sma
+        out[:, _COL['volatility_20']] = vol
+        _rsi(self.gain_sum / self.gain.shape[1], self.loss_sum / self.loss.shape[1], out[:, _COL['RSI_14']])
+
+        size = self.closes.shape[1]
+        for lag in LAGS:
+            out[:, _COL[f'close_lag_{lag}']] = self.closes[:, (self.steps - 1 - lag) % size]
+
+        macd = self.ema_fast - self.ema_slow
+        out[:, _COL['MACD']] = macd
+        out[:, _COL['MACD_signal']] = self.macd_signal
+        out[:, _COL['MACD_hist']] = macd - self.macd_signal
+        out[:, _COL['BB_upper']] = sma + vol * 2
+        out[:, _COL['BB_lower']] = sma - vol * 2
+        out[:, _COL['BB_width']] = (vol * 4) / sma
+        out[:, _COL['ATR']] = self.true_range_sum / self.true_range.shape[1]
+        out[:, _COL['OBV']] = self.obv
+        return out
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+import pandas as pd
+
+# Seconds per candle for the intervals we serve
+INTERVAL_SECONDS = {
+    "1h": 3600,
+    "4h": 4 * 3600,
+    "1d": 24 * 3600,
+    "1w": 7 * 24 * 3600,
+}
+
+
+def next_candle_close(now: float, interval: str) -> float:
+    """Unix time at which the candle open at `now` closes."""
+    seconds = INTERVAL_SECONDS[interval]
+    return (now // seconds + 1) * seconds
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # Set when the leader was interrupted (e.g. cancelled); waiters retry instead
+        self.abandoned = False
+        # Set when the leader is a coroutine, so waiters on its loop can await it
+        self.loop = None
+        self.future = None
+
+
+class OHLCVCache:
+    """
+    Per-(symbol, interval) cache of OHLCV frames.
+
+    Entries expire when the current candle of their interval closes. Only one
+    fetch per key runs at a time; concurrent callers for the same key block
+    until it finishes and share its result or error. If the fetching caller is
+    cancelled or interrupted instead, the waiting callers start a new fetch.
+    Sync (get) and async (aget) callers share the same entries and in-flight
+    fetches. Empty frames (upstream failure) are handed back to the callers of
+    that fetch but never stored.
+
+    Cached frames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Tuple[float, pd.DataFrame]] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def _lookup(self, key: Hashable) -> Tuple[pd.DataFrame, _Flight, bool]:
+        """Returns (cached frame, None, False), or the flight to lead / wait on."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() < entry[0]:
+                self.hits += 1
+                return entry[1], None, False
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                return None, flight, True
+            self.waits += 1
+            return None, flight, False
+
+    def _finish(self, key: Hashable, interval: str, flight: _Flight, df: pd.DataFrame, error: BaseException) -> None:
+        flight.result = df
+        flight.error = error
+        with self._lock:
+            if error is None and not df.empty:
+                self._entries[key] = (next_candle_close(self.clock(), interval), df)
+            del self._inflight[key]
+        flight.done.set()
+        if flight.future is not None and not flight.future.done():
+            if error is None:
+                flight.future.set_result(df)
+            else:
+                flight.future.set_exception(error)
+                flight.future.exception()  # Mark retrieved; waiters re-raise it themselves
+
+    def _abandon(self, key: Hashable, flight: _Flight) -> None:
+        """Ends a flight whose leader was interrupted; its waiters look the key up again."""
+        flight.abandoned = True
+        with self._lock:
+            del self._inflight[key]
+        flight.done.set()
+        if flight.future is not None and not flight.future.done():
+            flight.future.set_result(None)
+
+    @staticmethod
+    def _outcome(flight: _Flight) -> pd.DataFrame:
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def get(self, symbol: str, interval: str, fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        key = (symbol, interval)
+        while True:
+            cached, flight, leader = self._lookup(key)
+            if flight is None:
+                return cached
+            if leader:
+                break
+            flight.done.wait()
+            if not flight.abandoned:
+                return self._outcome(flight)
+
+        try:
+            df = fetch()
+        except Exception as e:
+            self._finish(key, interval, flight, None, e)
+            raise
+        except BaseException:
+            self._abandon(key, flight)
+            raise
+        self._finish(key, interval, flight, df, None)
+        return df
+
+    async def aget(self, symbol: str, interval: str, fetch: Callable[[], Awaitable[pd.DataFrame]]) -> pd.DataFrame:
+        key = (symbol, interval)
+        loop = asyncio.get_running_loop()
+        while True:
+            cached, flight, leader = self._lookup(key)
+            if flight is None:
+                return cached
+            if leader:
+                break
+            if flight.loop is loop:
+                # Shielded: cancelling this waiter must not cancel the shared fetch
+                await asyncio.shield(flight.future)
+            else:
+                # Led by a thread or another loop: wait without blocking this loop
+                await loop.run_in_executor(None, flight.done.wait)
+            if not flight.abandoned:
+                return self._outcome(flight)
+
+        flight.loop = loop
+        flight.future = loop.create_future()
+        try:
+            df = await fetch()
+        except Exception as e:
+            self._finish(key, interval, flight, None, e)
+            raise
+        except BaseException:
+            # Cancellation belongs to the leader only; waiters retry rather than inherit it
+            self._abandon(key, flight)
+            raise
+        self._finish(key, interval, flight, df, None)
+        return df
+
+    def invalidate(self, symbol: str = None, interval: str = None) -> None:
+        """Drops matching entries (all entries when called without arguments)."""
+        with self._lock:
+            for key in list(self._entries):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == interval):
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "entries": len(self._entries),
+            }
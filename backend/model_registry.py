@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from indicators import FEATURE_COLS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+
+# Artifacts written by the training notebooks
+MODEL_FILE = 'LinearRegression_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+# Optional compact coefficient files (see save_compact)
+COMPACT_NPZ = 'linear.npz'
+COMPACT_JSON = 'linear.json'
+ARTIFACT_FILES = (MODEL_FILE, SCALER_FILE, COMPACT_NPZ, COMPACT_JSON)
+
+# Seconds between checks of models/ for new or changed artifacts (0 disables the watcher)
+MODEL_RELOAD_SECONDS = float(os.getenv("MODEL_RELOAD_SECONDS", "30"))
+
+
+def fuse_linear(model, scaler) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Folds a StandardScaler into the coefficients of a linear model, so that
+    model.predict(scaler.transform(X)) == X @ weights + bias.
+    Returns None for model/scaler types that cannot be folded.
+    """
+    # Imported here so that compact coefficient files load without sklearn
+    from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+    from sklearn.preprocessing import StandardScaler
+
+    # Models whose predict() is exactly X @ coef_ + intercept_
+    if not isinstance(model, (LinearRegression, Ridge, Lasso, ElasticNet)) or not isinstance(scaler, StandardScaler):
+        return None
+
+    coef = np.asarray(model.coef_, dtype=float)
+    if coef.ndim != 1 or np.ndim(model.intercept_) != 0:
+        return None  # Multi-output models keep the sklearn path
+
+    # transform() skips centering/scaling when disabled, even though mean_ may still be set
+    mean = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else np.zeros_like(coef)
+    scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones_like(coef)
+
+    weights = np.ascontiguousarray(coef / scale)
+    bias = float(model.intercept_) - float(np.dot(weights, mean))
+    return weights, bias
+
+
+class ModelVersion:
+    """
+    One loaded version of a coin's model. Never modified after it is published,
+    so a request that picked it up keeps a consistent model/scaler pair even if
+    a newer version is swapped in meanwhile.
+    """
+
+    def __init__(self, coin: str, version: str, source: str, model=None, scaler=None,
+                 linear: Optional[Tuple[np.ndarray, float]] = None, signature: tuple = ()):
+        self.coin = coin
+        self.version = version
+        self.source = source
+        self.model = model
+        self.scaler = scaler
+        # (weights, bias) when the scaler folds into the model coefficients
+        self.linear = linear
+        self.signature = signature
+        self.loaded_at = time.time()
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Scalar for a feature vector, 1-D array for a matrix (FEATURE_COLS order)."""
+        X = np.ascontiguousarray(X, dtype=float)
+
+        # Fast path: scaler folded into the linear coefficients
+        if self.linear is not None:
+            weights, bias = self.linear
+            return X @ weights + bias
+
+        # Fallback: sklearn scaler + model
+        rows = X.reshape(-1, X.shape[-1])
+        prediction = np.asarray(self.model.predict(self.scaler.transform(rows)), dtype=float).reshape(-1)
+        return prediction[0] if X.ndim == 1 else prediction
+
+    def info(self) -> dict:
+        return {"version": self.version, "source": self.source, "loaded_at": self.loaded_at}
+
+
+def save_compact(path: str, weights: np.ndarray, bias: float) -> str:
+    """
+    Writes fused coefficients to `path` (.npz or .json) atomically.
+    The feature order is stored alongside and checked on load.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        if path.endswith('.json'):
+            payload = {"features": list(FEATURE_COLS), "weights": [float(w) for w in weights], "bias": float(bias)}
+            f.write(json.dumps(payload).encode())
+        else:
+            np.savez(f, features=np.array(FEATURE_COLS), weights=np.asarray(weights, dtype=float),
+                     bias=np.array(float(bias)))
+    os.replace(tmp, path)
+    return path
+
+
+def _load_compact(path: str) -> Tuple[np.ndarray, float]:
+    if path.endswith('.json'):
+        with open(path) as f:
+            payload = json.load(f)
+        features, weights, bias = payload["features"], payload["weights"], payload["bias"]
+    else:
+        with np.load(path, allow_pickle=False) as data:
+            features, weights, bias = data["features"].tolist(), data["weights"], data["bias"]
+
+    if list(features) != list(FEATURE_COLS):
+        raise ValueError(f"{os.path.basename(path)} was exported for different features")
+    weights = np.ascontiguousarray(weights, dtype=float)
+    if weights.shape != (len(FEATURE_COLS),):
+        raise ValueError(f"{os.path.basename(path)} has {weights.size} weights, expected {len(FEATURE_COLS)}")
+    return weights, float(bias)
+
+
+def _signature(coin_dir: str) -> tuple:
+    """(name, mtime_ns, size) of each artifact present; changes whenever a file is replaced."""
+    signature = []
+    for name in ARTIFACT_FILES:
+        try:
+            st = os.stat(os.path.join(coin_dir, name))
+        except FileNotFoundError:
+            continue
+        signature.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+def _digest(paths: List[str]) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest()[:12]
+
+
+def load_version(coin: str, coin_dir: str) -> ModelVersion:
+    """
+    Loads the artifacts of one coin directory. Compact coefficients are used
+    when present and at least as new as the pickles (so retraining without
+    re-exporting falls back to the pickles); otherwise model + scaler are
+    unpickled and fused where possible.
+    """
+    signature = _signature(coin_dir)
+    mtimes = {name: mtime for name, mtime, _ in signature}
+    pickled_mtime = max(mtimes.get(MODEL_FILE, 0), mtimes.get(SCALER_FILE, 0))
+
+    for name in (COMPACT_NPZ, COMPACT_JSON):
+        if name in mtimes and mtimes[name] >= pickled_mtime:
+            path = os.path.join(coin_dir, name)
+            return ModelVersion(coin, _digest([path]), name, linear=_load_compact(path), signature=signature)
+
+    if MODEL_FILE not in mtimes or SCALER_FILE not in mtimes:
+        raise FileNotFoundError(f"Model or scaler not found for {coin}")
+
+    import joblib
+    paths = [os.path.join(coin_dir, MODEL_FILE), os.path.join(coin_dir, SCALER_FILE)]
+    model, scaler = joblib.load(paths[0]), joblib.load(paths[1])
+    return ModelVersion(coin, _digest(paths), 'pickle', model, scaler, fuse_linear(model, scaler), signature)
+
+
+class ModelRegistry:
+    """
+    Loaded model versions for every coin under models/.
+
+    preload() loads all coins up front so no request pays the unpickling cost.
+    reload_changed() compares each directory's file signatures with the loaded
+    version and, for coins whose artifacts changed (or new coins), loads the new
+    version completely before publishing it with a single dict assignment.
+    Requests already holding the old version finish with it, and a version
+    that fails to load leaves the previous one in service.
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
+        self._versions: Dict[str, ModelVersion] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.errors: Dict[str, str] = {}
+        # Called by the watcher (on the event loop) with the coins it swapped
+        self.listeners: List[Callable[[List[str]], None]] = []
+
+    def coins(self) -> List[str]:
+        """Coins that have a model directory under models/."""
+        if not os.path.isdir(self.models_dir):
+            return []
+        return sorted(name for name in os.listdir(self.models_dir)
+                      if os.path.isdir(os.path.join(self.models_dir, name)))
+
+    def get(self, coin: str) -> ModelVersion:
+        """Current version for the coin, loading it on first use."""
+        version = self._versions.get(coin)
+        if version is None:
+            version = self._load(coin)
+        return version
+
+    def register(self, coin: str, model, scaler) -> ModelVersion:
+        """Publishes an in-memory model/scaler pair (not backed by files)."""
+        version = ModelVersion(coin, 'memory', 'memory', model, scaler, fuse_linear(model, scaler))
+        self._versions[coin] = version
+        return version
+
+    def unregister(self, coin: str) -> None:
+        self._versions.pop(coin, None)
+
+    def _load(self, coin: str) -> ModelVersion:
+        with self._lock:
+            version = load_version(coin, os.path.join(self.models_dir, coin))
+            self._versions[coin] = version
+            self.errors.pop(coin, None)
+            return version
+
+    def preload(self) -> Dict[str, str]:
+        """Loads every coin; returns coin -> version for the ones that loaded."""
+        for coin in self.coins():
+            try:
+                self._load(coin)
+            except Exception as e:
+                self.errors[coin] = str(e)
+                print(f"Could not load model for {coin}: {e}")
+        return {coin: v.version for coin, v in self._versions.items()}
+
+    def reload_changed(self) -> List[str]:
+        """Reloads coins whose artifacts changed since they were loaded. Returns the swapped coins."""
+        swapped = []
+        for coin in self.coins():
+            current = self._versions.get(coin)
+            signature = _signature(os.path.join(self.models_dir, coin))
+            if current is not None and current.signature == signature:
+                continue
+            try:
+                version = self._load(coin)
+            except Exception as e:
+                if self.errors.get(coin) != str(e):
+                    print(f"Could not reload model for {coin}: {e}")
+                self.errors[coin] = str(e)
+                continue
+            if current is None or version.version != current.version:
+                print(f"Loaded model {coin} {version.version} ({version.source})")
+                swapped.append(coin)
+        return swapped
+
+    def versions(self) -> Dict[str, dict]:
+        return {coin: version.info() for coin, version in sorted(self._versions.items())}
+
+    async def watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                swapped = await asyncio.to_thread(self.reload_changed)
+            except Exception as e:
+                print(f"Model reload failed: {e}")
+                continue
+            if swapped:
+                for listener in self.listeners:
+                    try:
+                        listener(swapped)
+                    except Exception as e:
+                        print(f"Model reload listener failed: {e}")
+
+    def start(self, interval: float = MODEL_RELOAD_SECONDS) -> None:
+        if self._task is None and interval > 0:
+            self._task = asyncio.create_task(self.watch(interval))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
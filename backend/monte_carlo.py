@@ -0,0 +1,74 @@
+from typing import Callable, Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from indicators import FEATURE_COLS, BatchIndicatorEngine, IndicatorEngine, feature_frame
+
+DEFAULT_PATHS = 1000
+MAX_PATHS = 10000
+# Simulated candles (paths * steps) per request, e.g. 10,000 paths for 24 steps or 1,428 for 168
+MAX_PATH_STEPS = 240_000
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+
+def max_paths(steps: int) -> int:
+    """Most paths a request for `steps` steps may simulate."""
+    return max(1, min(MAX_PATHS, MAX_PATH_STEPS // max(1, steps)))
+
+
+def calibrate(df: pd.DataFrame, predict: Callable[[np.ndarray], np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Historical model error and candle shape used to perturb simulated paths:
+    - residuals: log(actual next close / predicted next close) for every row
+      of `df` with a full feature row
+    - ranges: (high - low) / close of each candle
+    - volumes: traded volume of each candle
+    """
+    frame = feature_frame(df)
+    X = frame[FEATURE_COLS].to_numpy(dtype=float)[:-1]
+    actual = frame['close'].to_numpy(dtype=float)[1:]
+    valid = ~np.isnan(X).any(axis=1)
+    if not valid.any():
+        raise ValueError("Not enough data to calculate features")
+    predicted = np.asarray(predict(X[valid]), dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residuals = np.log(actual[valid] / predicted)
+    residuals = residuals[np.isfinite(residuals)]
+
+    close = frame['close'].to_numpy(dtype=float)
+    ranges = (frame['high'].to_numpy(dtype=float) - frame['low'].to_numpy(dtype=float)) / close
+    return {
+        "residuals": residuals if residuals.size else np.zeros(1),
+        "ranges": np.clip(np.nan_to_num(ranges), 0.0, None),
+        "volumes": frame['volume'].to_numpy(dtype=float),
+    }
+
+
+def simulate_paths(engine: IndicatorEngine, predict: Callable[[np.ndarray], np.ndarray], steps: int, paths: int,
+                   residuals: np.ndarray, ranges: np.ndarray, volumes: np.ndarray,
+                   rng: np.random.Generator) -> np.ndarray:
+    """
+    Simulated closes, shape (paths, steps).
+
+    Each step predicts the next close of every path from its own features,
+    applies a residual drawn from the historical model error, and feeds back a
+    candle whose high/low spread and volume are drawn from history.
+    """
+    batch = BatchIndicatorEngine(engine, paths)
+    out = np.empty((paths, steps))
+    X = np.empty((paths, len(FEATURE_COLS)))
+    for i in range(steps):
+        predicted = predict(batch.feature_matrix(X))
+        close = predicted * np.exp(residuals[rng.integers(0, len(residuals), paths)])
+        half_range = close * ranges[rng.integers(0, len(ranges), paths)] / 2
+        volume = volumes[rng.integers(0, len(volumes), paths)]
+        batch.update(close + half_range, close - half_range, close, volume)
+        out[:, i] = close
+    return out
+
+
+def percentile_bands(paths: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, np.ndarray]:
+    """{'p5': [...], 'p50': [...], ...}: the given percentiles of every step across paths."""
+    values = np.percentile(paths, percentiles, axis=0)
+    return {f"p{p:g}": row for p, row in zip(percentiles, values)}
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+# Seconds a news entry is fresh, and how much longer it may be served while it is refreshed
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "600"))
+NEWS_STALE_TTL = float(os.getenv("NEWS_STALE_TTL", "86400"))
+# Most entries kept (coins clients asked about plus the shared fallback entry)
+NEWS_CACHE_SIZE = int(os.getenv("NEWS_CACHE_SIZE", "256"))
+
+# Result of a fetch whose leader was cancelled; its waiters fetch again
+_ABANDONED = object()
+
+
+class NewsCache:
+    """
+    Bounded LRU + TTL cache for async fetches (news per coin or category).
+
+    Fresh entries are served directly. Expired entries are still served for up
+    to `stale_ttl` seconds while a single background task refreshes them; if the
+    refresh fails the stale value stays in place. On a miss, concurrent callers
+    for the same key share one fetch. Fetch errors are raised to the callers of
+    that fetch and never cached; if the fetching caller is cancelled, the
+    callers waiting on it start a new fetch instead. The least recently used entry is evicted once
+    `max_entries` is exceeded.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl: float = NEWS_CACHE_TTL, stale_ttl: float = NEWS_STALE_TTL,
+                 max_entries: int = NEWS_CACHE_SIZE, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        # key -> (fetched_at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.waits = 0
+        self.refresh_errors = 0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (value, fetched) where fetched is True if this call waited on the upstream."""
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self.clock() - entry[0]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age < self.ttl:
+                        self.hits += 1
+                    else:
+                        self.stale += 1
+                        self._refresh(key, fetch)
+                    return entry[1], False
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                break
+            self.waits += 1
+            value = await asyncio.shield(flight)
+            if value is not _ABANDONED:
+                return value, True
+
+        self.misses += 1
+        return await self._fetch(key, fetch), True
+
+    def _begin(self, key: Hashable) -> asyncio.Future:
+        # Registered before any await so later callers see the fetch in flight
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        return future
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], future: asyncio.Future = None) -> Any:
+        if future is None:
+            future = self._begin(key)
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved; waiters re-raise it themselves
+            raise
+        except BaseException:
+            # Cancellation belongs to this caller only; waiters retry rather than inherit it
+            future.set_result(_ABANDONED)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+
+        future = self._begin(key)
+
+        async def run():
+            try:
+                await self._fetch(key, fetch, future)
+            except Exception as e:
+                self.refresh_errors += 1
+                print(f"News refresh failed for {key}: {e}")
+
+        task = asyncio.get_running_loop().create_task(run())
+        # Keep a reference until it finishes so the task is not garbage collected
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "waits": self.waits,
+            "refresh_errors": self.refresh_errors,
+            "entries": len(self._entries),
+        }
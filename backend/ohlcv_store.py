@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'store')
+
+# Column name -> dtype. open_time is epoch milliseconds and doubles as the index.
+COLUMNS = {
+    'open_time': np.dtype('<i8'),
+    'open': np.dtype('<f8'),
+    'high': np.dtype('<f8'),
+    'low': np.dtype('<f8'),
+    'close': np.dtype('<f8'),
+    'volume': np.dtype('<f8'),
+}
+
+META_FILE = 'meta.json'
+# A replaced series is written to a new generation directory that meta.json then points at
+GENERATION_PREFIX = 'gen-'
+
+
+def frame_to_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Converts an OHLCV DataFrame (open_time as datetime or ms) into typed column arrays."""
+    open_time = df['open_time']
+    if pd.api.types.is_datetime64_any_dtype(open_time):
+        open_time = open_time.astype('datetime64[ms]').astype('int64')
+    columns = {'open_time': np.asarray(open_time, dtype=COLUMNS['open_time'])}
+    for name in ['open', 'high', 'low', 'close', 'volume']:
+        columns[name] = np.asarray(df[name], dtype=COLUMNS[name])
+    return columns
+
+
+def columns_to_frame(columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Inverse of frame_to_columns; open_time comes back as datetime64."""
+    df = pd.DataFrame({name: np.array(values) for name, values in columns.items()})
+    df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+    return df
+
+
+class OHLCVStore:
+    """
+    Local columnar OHLCV store: one raw little-endian file per column under
+    data/store/{SYMBOL}/{interval}/, read through np.memmap.
+
+    Rows are kept sorted by open_time, so the last N rows or a time range are
+    located with a binary search and only those pages are touched. meta.json
+    records the committed row count and is replaced atomically after each
+    append; readers ignore bytes past that count, so an interrupted append is
+    never visible and is overwritten by the next writer. Column files never
+    shrink, so a reader's memmap stays valid while a writer appends.
+
+    A series written with replace=True (see SeriesWriter) lives in a
+    generation directory named by meta.json. Switching meta.json to the new
+    generation is the only step readers can observe, and the superseded
+    generation is kept until the next replace so readers still on it finish.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol, interval)
+
+    def exists(self, symbol: str, interval: str) -> bool:
+        return os.path.exists(os.path.join(self.path(symbol, interval), META_FILE))
+
+    def data_path(self, symbol: str, interval: str) -> str:
+        """Directory holding the column files of the committed series."""
+        return _meta(self.path(symbol, interval))[1]
+
+    def count(self, symbol: str, interval: str) -> int:
+        """Committed number of rows (0 if the series does not exist)."""
+        return _meta(self.path(symbol, interval))[0]
+
+    def _read(self, data: str, start: int, stop: int, rows: int) -> pd.DataFrame:
+        columns = {name: _column(data, name, rows)[start:stop] for name in COLUMNS}
+        return columns_to_frame(columns)
+
+    def last_open_time(self, symbol: str, interval: str) -> Optional[int]:
+        """open_time (ms) of the last stored row, or None for an empty series."""
+        rows, data = _meta(self.path(symbol, interval))
+        if rows == 0:
+            return None
+        return int(_column(data, 'open_time', rows)[-1])
+
+    def tail(self, symbol: str, interval: str, n: int) -> pd.DataFrame:
+        """Last `n` rows as a DataFrame."""
+        rows, data = _meta(self.path(symbol, interval))
+        return self._read(data, max(0, rows - n), rows, rows)
+
+    def range(self, symbol: str, interval: str, start: pd.Timestamp = None, end: pd.Timestamp = None) -> pd.DataFrame:
+        """Rows with start <= open_time < end (either bound optional)."""
+        rows, data = _meta(self.path(symbol, interval))
+        index = _column(data, 'open_time', rows)
+        lo = 0 if start is None else int(np.searchsorted(index, _to_ms(start), side='left'))
+        hi = rows if end is None else int(np.searchsorted(index, _to_ms(end), side='left'))
+        return self._read(data, lo, max(lo, hi), rows)
+
+    def append(self, symbol: str, interval: str, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Appends rows (given as typed column arrays, sorted by open_time). Rows at or
+        before the last stored open_time are dropped, keeping the index monotonic.
+        Returns the number of rows written.
+        """
+        return _append(self.path(symbol, interval), columns)
+
+    def truncate(self, symbol: str, interval: str, rows: int) -> None:
+        """
+        Keeps only the first `rows` committed rows. Only meta.json changes; the
+        stale bytes are overwritten by the next append (in place, so a reader
+        that still uses the old row count may see the new values of those rows).
+        """
+        path = self.path(symbol, interval)
+        committed, data = _meta(path)
+        if rows < committed:
+            _commit(path, max(0, rows), data)
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Replaces a whole series with the rows of `df` (sorted and de-duplicated by open_time)."""
+        df = df.sort_values('open_time').drop_duplicates('open_time', keep='last')
+        return self.write_pages(symbol, interval, [frame_to_columns(df)])
+
+    def write_pages(self, symbol: str, interval: str, pages: Iterable[Dict[str, np.ndarray]]) -> int:
+        """
+        Replaces a whole series with pages of typed columns consumed one at a time,
+        so memory use does not depend on the length of the series.
+        """
+        writer = SeriesWriter(self, symbol, interval, replace=True)
+        try:
+            for columns in pages:
+                writer.append(columns)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+
+class SeriesWriter:
+    """
+    Streams pages of typed columns into one series.
+
+    With replace=True the pages go to a new generation directory inside the
+    series and commit() points meta.json at it with one atomic replace, so
+    readers see either the old or the new series. Otherwise every append is
+    committed to the live series directly.
+    """
+
+    def __init__(self, store: OHLCVStore, symbol: str, interval: str, replace: bool = False):
+        self.final_path = store.path(symbol, interval)
+        self.replace = replace
+        self.path = self.final_path
+        if replace:
+            self.path = os.path.join(self.final_path, f"{GENERATION_PREFIX}{time.time_ns()}")
+        self.rows = 0
+
+    def append(self, columns: Dict[str, np.ndarray]) -> int:
+        added = _append(self.path, columns)
+        self.rows += added
+        return added
+
+    def commit(self) -> int:
+        """Publishes a staged series (a no-op in append mode). Returns rows written."""
+        if self.replace and self.rows:
+            previous = _meta(self.final_path)[1]
+            _commit(self.final_path, self.rows, self.path)
+            _remove_generations(self.final_path, keep={self.path, previous})
+        elif self.replace:
+            self.abort()  # Nothing fetched: keep the existing series
+        return self.rows
+
+    def abort(self) -> None:
+        if self.replace:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _meta(path: str) -> Tuple[int, str]:
+    """(committed rows, directory holding the column files) of a series, read from one meta.json."""
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return 0, path
+    data = meta.get('data')
+    return int(meta['rows']), os.path.join(path, data) if data else path
+
+
+def _remove_generations(path: str, keep: set) -> None:
+    """Deletes superseded generations (and column files of the pre-generation layout)."""
+    for name in os.listdir(path):
+        full_path = os.path.join(path, name)
+        if name.startswith(GENERATION_PREFIX) and full_path not in keep:
+            shutil.rmtree(full_path, ignore_errors=True)
+        elif name.endswith('.bin') and path not in keep:
+            os.remove(full_path)
+
+
+def _column(data: str, name: str, rows: int) -> np.ndarray:
+    if rows == 0:
+        return np.empty(0, dtype=COLUMNS[name])
+    return np.memmap(os.path.join(data, f"{name}.bin"), dtype=COLUMNS[name], mode='r', shape=(rows,))
+
+
+def _append(path: str, columns: Dict[str, np.ndarray]) -> int:
+    os.makedirs(path, exist_ok=True)
+    rows, data = _meta(path)
+
+    open_time = np.asarray(columns['open_time'], dtype=COLUMNS['open_time'])
+    first = 0
+    if rows:
+        last = int(_column(data, 'open_time', rows)[-1])
+        first = int(np.searchsorted(open_time, last, side='right'))
+    added = len(open_time) - first
+    if added <= 0:
+        return 0
+
+    for name, dtype in COLUMNS.items():
+        values = np.ascontiguousarray(np.asarray(columns[name], dtype=dtype)[first:])
+        column_path = os.path.join(data, f"{name}.bin")
+        with open(column_path, 'r+b' if os.path.exists(column_path) else 'wb') as f:
+            # Overwrite bytes left behind by an interrupted append or a truncate()
+            # instead of cutting the file: readers may have it mapped
+            f.seek(rows * dtype.itemsize)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    _commit(path, rows + added, data)
+    return added
+
+
+def _commit(path: str, rows: int, data: str) -> None:
+    meta = {'rows': rows, 'columns': {name: dtype.str for name, dtype in COLUMNS.items()}}
+    if data != path:
+        meta['data'] = os.path.basename(data)
+    tmp = os.path.join(path, META_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+
+def _to_ms(value) -> int:
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return int(pd.Timestamp(value).value // 1_000_000)
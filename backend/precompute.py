@@ -0,0 +1,176 @@
+import asyncio
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Set
+
+from http_cache import version_tag
+from market_cache import INTERVAL_SECONDS, next_candle_close
+from predictor import Predictor
+from serialization import to_points
+
+# Forecast length computed ahead of time (the /forecast default)
+DEFAULT_STEPS = 24
+# Seconds to wait after a candle closes so the exchange has published it
+CLOSE_DELAY = 5.0
+# Seconds until the next refresh when some coins failed (e.g. Binance unreachable)
+RETRY_DELAY = 60.0
+
+
+class Snapshot:
+    """
+    Read-only results computed for one candle. Replaced as a whole, never
+    modified, so request handlers can read it without locking.
+    """
+
+    def __init__(self, created_at: float, valid_until: float, coins: Dict[str, dict], errors: Dict[str, str]):
+        self.created_at = created_at
+        self.valid_until = valid_until
+        self.coins: Mapping[str, Mapping] = MappingProxyType({coin: MappingProxyType(entry) for coin, entry in coins.items()})
+        self.errors: Mapping[str, str] = MappingProxyType(dict(errors))
+
+
+class PrecomputeScheduler:
+    """
+    Background task that, after every candle close, refreshes market data for
+    all coins and computes their latest features, next-hour prediction and
+    default forecast. Handlers serve the published snapshot while it belongs to
+    the current candle and compute on demand otherwise (missing coin, failed
+    refresh, or a snapshot from an earlier candle).
+    """
+
+    def __init__(self, predictor: Predictor, coins: List[str] = None, interval: str = "1h",
+                 steps: int = DEFAULT_STEPS, delay: float = CLOSE_DELAY, retry_delay: float = RETRY_DELAY,
+                 clock: Callable[[], float] = time.time):
+        self.predictor = predictor
+        self.coins = coins
+        self.interval = interval
+        self.steps = steps
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self.snapshot: Optional[Snapshot] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        # Refreshes started outside the schedule (kept referenced until done)
+        self._pending: Set[asyncio.Task] = set()
+        # Serializes refreshes, so the last one started publishes last
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+        # Called with every newly published snapshot (e.g. to push stream updates)
+        self.listeners: List[Callable[[Snapshot], None]] = []
+
+    async def compute(self, coin: str) -> dict:
+        """
+        Latest features, next-hour prediction and default forecast for one coin,
+        with the candle (open_time ms) and model version they were computed from.
+        Fails if Binance is unreachable: local fallback candles may be hours
+        old and must not be published as the current candle's results.
+        """
+        if not await self.predictor.is_live_async(coin):
+            raise RuntimeError("Binance unreachable, not publishing local fallback data")
+        candle = await self.predictor.last_candle_async(coin)
+        version = self.predictor.registry.get(coin)
+        features = await self.predictor.get_latest_features_async(coin)
+        forecast = await self.predictor.predict_forecast_async(coin, steps=self.steps, columnar=True)
+        return {
+            "candle": candle,
+            "model": version_tag(version),
+            "features": features,
+            "predicted_price": self.predictor.predict(coin, features),
+            "forecast": to_points(forecast),
+            "forecast_columns": forecast,
+        }
+
+    def _refresh_lock(self) -> asyncio.Lock:
+        # One lock per event loop (tests and scripts run several loops one after another)
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def refresh(self) -> Snapshot:
+        """
+        Computes every coin and publishes a new snapshot. Refreshes run one at
+        a time, so one started after a model swap cannot be overtaken by an
+        older refresh still computing with the previous model.
+        """
+        async with self._refresh_lock():
+            return await self._refresh()
+
+    async def _refresh(self) -> Snapshot:
+        coins = self.coins if self.coins is not None else self.predictor.registry.coins()
+        results = await asyncio.gather(*[self.compute(coin) for coin in coins], return_exceptions=True)
+
+        entries, errors = {}, {}
+        for coin, result in zip(coins, results):
+            if isinstance(result, Exception):
+                errors[coin] = str(result)
+            else:
+                entries[coin] = result
+
+        now = self.clock()
+        self.snapshot = Snapshot(now, next_candle_close(now, self.interval), entries, errors)
+        self.last_error = "; ".join(f"{coin}: {e}" for coin, e in errors.items()) or None
+        for listener in self.listeners:
+            try:
+                listener(self.snapshot)
+            except Exception as e:
+                print(f"Snapshot listener failed: {e}")
+        return self.snapshot
+
+    def get(self, coin: str) -> Optional[Mapping]:
+        """Precomputed entry for the coin, or None if it must be computed on demand."""
+        snapshot = self.snapshot
+        if snapshot is None or self.clock() >= snapshot.valid_until:
+            return None
+        return snapshot.coins.get(coin)
+
+    def age(self) -> Optional[float]:
+        """Seconds since the current snapshot was computed (None before the first one)."""
+        snapshot = self.snapshot
+        return None if snapshot is None else self.clock() - snapshot.created_at
+
+    def status(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "age_seconds": self.age(),
+            "fresh": snapshot is not None and self.clock() < snapshot.valid_until,
+            "coins": sorted(snapshot.coins) if snapshot else [],
+            "last_error": self.last_error,
+        }
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Handlers keep computing on demand until the next successful refresh
+                self.last_error = str(e)
+                print(f"Precompute refresh failed: {e}")
+            wait = next_candle_close(self.clock(), self.interval) - self.clock() + self.delay
+            if self.last_error is not None:
+                # Failed coins are computed on demand meanwhile; retry them well before the next close
+                wait = min(wait, self.retry_delay)
+            await asyncio.sleep(min(max(wait, 0.0), INTERVAL_SECONDS[self.interval]))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    def refresh_soon(self) -> asyncio.Task:
+        """Starts an extra refresh in the background (e.g. after a model swap); stop() cancels it."""
+        task = asyncio.create_task(self.refresh())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def stop(self) -> None:
+        tasks = list(self._pending) + ([self._task] if self._task is not None else [])
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
@@ -1,283 +1,428 @@
-import joblib
+import asyncio
+import functools
 import os
 import numpy as np
 import pandas as pd
-from datetime import timedelta
-import io
+import httpx
 import requests
-from typing import Tuple, List, Dict
+from typing import Tuple, Dict, Optional, Sequence
+
+from http_client import UPSTREAM_TIMEOUT, UpstreamClient
+from indicators import FEATURE_COLS, MIN_HISTORY, IndicatorEngine, feature_frame, latest_feature_row
+from market_cache import INTERVAL_SECONDS, OHLCVCache
+from metrics import UPSTREAM_FAILURES, stage
+from model_registry import ModelRegistry
+from monte_carlo import DEFAULT_PATHS, DEFAULT_PERCENTILES, calibrate, percentile_bands, simulate_paths
+from ohlcv_store import OHLCVStore
+from rollup import BASE_INTERVAL, SERVED_INTERVALS, RollupEngine
+from serialization import MS_PER_HOUR, epoch_ms, hourly_after, to_points
+from shared_cache import SharedEntry, SharedMarketCache
 
 # Define paths relative to this file
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-MODELS_DIR = os.path.join(BASE_DIR, 'models')
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://api.binance.com")
+# Rows read from the local store when Binance is unreachable (same as the live fetch)
+LOCAL_HISTORY_ROWS = 500
 
 class Predictor:
-    def __init__(self):
-        self.models = {}
-        self.scalers = {}
-
-    def _load_artifacts(self, coin: str) -> None:
-        """Loads model and scaler for a specific coin if not already loaded."""
-        if coin in self.models and coin in self.scalers:
-            return
+    def __init__(self, http: Optional[UpstreamClient] = None, registry: Optional[ModelRegistry] = None):
+        # Loaded model versions per coin (preloaded and hot-reloaded by the API)
+        self.registry = registry or ModelRegistry()
+        # Upstream klines shared by all requests until the current candle closes
+        self.market_cache = OHLCVCache()
+        # Blocking session for sync callers (scripts), pooled async client for the API
+        self.session = requests.Session()
+        self.http = http or UpstreamClient()
+        # Local columnar history used as the offline fallback
+        self.store = OHLCVStore()
+        # Klines and feature rows shared between API worker processes (None unless SHARED_CACHE_DIR is set)
+        self.shared = SharedMarketCache.from_env()
+        # 4h/1d/1w candles rolled up from the hourly klines as new ones arrive
+        self.rollups = RollupEngine()
 
-        model_path = os.path.join(MODELS_DIR, coin, 'LinearRegression_model.pkl')
-        scaler_path = os.path.join(MODELS_DIR, coin, 'scaler.pkl')
-
-        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-            raise FileNotFoundError(f"Model or scaler not found for {coin}")
+    def _kline_params(self, coin: str) -> dict:
+        return {
+            "symbol": f"{coin}USDT",
+            "interval": "1h",
+            "limit": 500  # Ensure enough data for rolling windows (20, 26, etc.)
+        }
 
-        # print(f"Loading model and scaler for {coin}...")
-        self.models[coin] = joblib.load(model_path)
-        self.scalers[coin] = joblib.load(scaler_path)
+    @staticmethod
+    def _klines_to_frame(data: list) -> pd.DataFrame:
+        """Converts a Binance klines payload into an OHLCV DataFrame."""
+        # Binance response: [Open time, Open, High, Low, Close, Volume, ...]
+        # We only need first 6 columns
+        df = pd.DataFrame(data, columns=[
+            'open_time', 'open', 'high', 'low', 'close', 'volume',
+            'close_time', 'quote_asset_volume', 'number_of_trades',
+            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+        ])
+        
+        # Filter and convert types
+        df = df[['open_time', 'open', 'high', 'low', 'close', 'volume']]
+        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+        for col in ['open', 'high', 'low', 'close', 'volume']:
+            df[col] = df[col].astype(float)
+            
+        return df
 
     def _fetch_binance_data(self, coin: str) -> pd.DataFrame:
         """
         Fetches the last 500 hours of OHLCV data from Binance for feature calculation.
         """
-        symbol = f"{coin}USDT"
-        url = "https://api.binance.com/api/v3/klines"
-        params = {
-            "symbol": symbol,
-            "interval": "1h",
-            "limit": 500  # Ensure enough data for rolling windows (20, 26, etc.)
-        }
+        url = f"{BINANCE_API_URL}/api/v3/klines"
         
         try:
-            response = requests.get(url, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Binance response: [Open time, Open, High, Low, Close, Volume, ...]
-            # We only need first 6 columns
-            df = pd.DataFrame(data, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            
-            # Filter and convert types
-            df = df[['open_time', 'open', 'high', 'low', 'close', 'volume']]
-            df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = df[col].astype(float)
-                
-            return df
+            with stage("binance_fetch"):
+                response = self.session.get(url, params=self._kline_params(coin), timeout=UPSTREAM_TIMEOUT)
+                response.raise_for_status()
+                return self._klines_to_frame(response.json())
             
         except requests.RequestException as e:
             print(f"Error fetching data from Binance: {e}")
+            UPSTREAM_FAILURES.inc(upstream="binance")
             return pd.DataFrame() # Empty DataFrame indicates failure
 
-    def _prepare_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
-        """
-        Replicates the feature engineering logic from visualize_predictions.py
-        to ensure the model gets the exact same input structure.
-        """
-        # Ensure close is float
-        df = df.copy()
-        df['close'] = df['close'].astype(float)
-        
-        # SMA & RSI
-        df['SMA_20'] = df['close'].rolling(20).mean()
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / loss
-        df['RSI_14'] = 100 - (100 / (1 + rs))
+    async def _fetch_binance_data_async(self, coin: str) -> pd.DataFrame:
+        """Async variant of _fetch_binance_data using the pooled upstream client."""
+        url = f"{BINANCE_API_URL}/api/v3/klines"
         
-        # Lags
-        for lag in [1, 2, 3, 7]:
-            df[f'close_lag_{lag}'] = df['close'].shift(lag)
+        try:
+            with stage("binance_fetch"):
+                data = await self.http.get_json(url, params=self._kline_params(coin))
+                return self._klines_to_frame(data)
             
-        # Volatility
-        df['volatility_20'] = df['close'].rolling(20).std()
-
-        # MACD (12, 26, 9)
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_hist'] = df['MACD'] - df['MACD_signal']
-
-        # Bollinger Bands (20, 2)
-        df['BB_upper'] = df['SMA_20'] + (df['volatility_20'] * 2)
-        df['BB_lower'] = df['SMA_20'] - (df['volatility_20'] * 2)
-        df['BB_width'] = (df['BB_upper'] - df['BB_lower']) / df['SMA_20']
-
-        # ATR (14)
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
-        df['ATR'] = true_range.rolling(14).mean()
-
-        # OBV
-        df['OBV'] = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        
-        # Drop NaNs created by rolling/shifting
-        # IMPORTANT: For iterative prediction, we don't want to drop rows until the end
-        # But to match the return signature, we'll return the full df with NaNs and let caller handle
-        feature_cols = ['SMA_20', 'RSI_14', 'volatility_20', 'close_lag_1', 'close_lag_2', 'close_lag_3', 'close_lag_7',
-                        'MACD', 'MACD_signal', 'MACD_hist', 'BB_upper', 'BB_lower', 'BB_width', 'ATR', 'OBV']
-        
-        return df, feature_cols
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Error fetching data from Binance: {e}")
+            UPSTREAM_FAILURES.inc(upstream="binance")
+            return pd.DataFrame() # Empty DataFrame indicates failure
 
-    def get_latest_features(self, coin: str) -> dict:
+    def _load_local_data(self, coin: str) -> pd.DataFrame:
         """
-        Reads the CSV data for the coin, computes features, and returns the last row.
+        Fallback OHLCV history when Binance is unreachable: the tail of the local
+        columnar store if it has been built, otherwise the full ML-ready CSV.
         """
-        # 1. Try fetching from Binance first
-        df = self._fetch_binance_data(coin)
-        
-        # 2. Fallback to local CSV if Binance fails
+        symbol = f"{coin}USDT"
+        with stage("local_fallback"):
+            if self.store.exists(symbol, "1h"):
+                df = self.store.tail(symbol, "1h", LOCAL_HISTORY_ROWS)
+            else:
+                data_path = os.path.join(DATA_DIR, f"{coin}_ML_ready.csv")
+                if not os.path.exists(data_path):
+                    raise FileNotFoundError(f"Data file not found: {data_path}")
+                df = pd.read_csv(data_path)
+                if 'open_time' in df.columns:
+                    df['open_time'] = pd.to_datetime(df['open_time'])
+        # Tells callers these candles may be old (see is_live_async)
+        df.attrs["fallback"] = True
+        return df
+
+    def _shared_entry(self, coin: str) -> Optional[SharedEntry]:
+        """
+        Current-candle entry another worker published to the shared cache, if
+        enabled. Readers wait briefly for the writer's publish before giving up.
+        """
+        return self.shared.wait(f"{coin}USDT", "1h") if self.shared is not None else None
+
+    async def _shared_entry_async(self, coin: str) -> Optional[SharedEntry]:
+        return await self.shared.wait_async(f"{coin}USDT", "1h") if self.shared is not None else None
+
+    def _publish(self, coin: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Hands a fresh fetch to the other workers (only the shared cache writer stores it)."""
+        if self.shared is not None and not df.empty:
+            self.shared.publish(f"{coin}USDT", "1h", df, latest_feature_row(df))
+        return df
+
+    def _rollup(self, coin: str, interval: str, base: pd.DataFrame) -> pd.DataFrame:
+        """Candles of `interval` derived from the hourly frame, seeded from the local store once."""
+        if interval not in SERVED_INTERVALS:
+            raise ValueError(f"interval must be one of {', '.join(SERVED_INTERVALS)}")
+        if interval == BASE_INTERVAL:
+            return base
+        symbol = f"{coin}USDT"
+        history = None
+        if self.store.exists(symbol, BASE_INTERVAL):
+            history = functools.partial(self.store.tail, symbol, BASE_INTERVAL)
+        with stage("rollup"):
+            return self.rollups.get(symbol, interval, base, history)
+
+    def _get_market_data(self, coin: str, interval: str = BASE_INTERVAL) -> pd.DataFrame:
+        """
+        Returns the latest hourly klines for the coin through the shared cache,
+        so concurrent and repeated requests within one candle fetch only once.
+        With SHARED_CACHE_DIR set, klines another worker already fetched for the
+        current candle are used first.
+        Falls back to the local CSV if Binance fails.
+        Other intervals (4h, 1d, 1w) are rolled up from these hourly klines.
+        The returned frame is shared and must not be modified in place.
+        """
+        if interval != BASE_INTERVAL:
+            return self._rollup(coin, interval, self._get_market_data(coin))
+        entry = self._shared_entry(coin)
+        if entry is not None:
+            return entry.frame
+        df = self.market_cache.get(f"{coin}USDT", "1h", lambda: self._publish(coin, self._fetch_binance_data(coin)))
         if df.empty:
-            data_path = os.path.join(DATA_DIR, f"{coin}_ML_ready.csv")
-            if not os.path.exists(data_path):
-                raise FileNotFoundError(f"Data file not found: {data_path}")
-            df = pd.read_csv(data_path)
-            
-        # We need enough history to calculate rolling features (SMA 20, etc.)
-        # Passing strict=False to _prepare_features if needed, but here we just pass the whole df
-        df_proc, feature_cols = self._prepare_features(df)
-        
-        if df_proc.empty:
-             raise ValueError("Not enough data to calculate features")
+            df = self._load_local_data(coin)
+        return df
 
-        # Get the last row
-        last_row = df_proc.iloc[-1]
-        
-        # Convert to dict for the generic predict method
-        features = {col: last_row[col] for col in feature_cols}
-        return features
+    async def _get_market_data_async(self, coin: str, interval: str = BASE_INTERVAL) -> pd.DataFrame:
+        """Async variant of _get_market_data; the CSV fallback runs in a worker thread."""
+        if interval != BASE_INTERVAL:
+            return self._rollup(coin, interval, await self._get_market_data_async(coin))
+        entry = await self._shared_entry_async(coin)
+        if entry is not None:
+            return entry.frame
+
+        async def fetch() -> pd.DataFrame:
+            return self._publish(coin, await self._fetch_binance_data_async(coin))
+
+        df = await self.market_cache.aget(f"{coin}USDT", "1h", fetch)
+        if df.empty:
+            df = await asyncio.to_thread(self._load_local_data, coin)
+        return df
 
-    def predict_forecast(self, coin: str, steps: int = 24) -> Dict:
+    async def is_live_async(self, coin: str) -> bool:
+        """False if the coin's klines currently come from the local fallback instead of Binance."""
+        df = await self._get_market_data_async(coin)
+        return not df.attrs.get("fallback", False)
+
+    async def last_candle_async(self, coin: str) -> int:
         """
-        Generates an iterative forecast for the next `steps` hours.
-        Returns dictionary with historical data and forecast data.
+        open_time (epoch ms) of the newest hourly candle that predictions for
+        the coin are currently based on (at every interval, since the others are
+        rolled up from it). Loads the klines through the shared cache, so a
+        following prediction in the same candle does not fetch again.
         """
-        # 1. Try fetching from Binance first
-        df = self._fetch_binance_data(coin)
-        
-        # 2. Fallback to local CSV if Binance fails
+        df = await self._get_market_data_async(coin)
         if df.empty:
-            data_path = os.path.join(DATA_DIR, f"{coin}_ML_ready.csv")
-            if not os.path.exists(data_path):
-                raise FileNotFoundError(f"Data file not found: {data_path}")
-            # print(f"Using local CSV data for {coin}")
-            df = pd.read_csv(data_path)
-            if 'open_time' in df.columns:
-                df['open_time'] = pd.to_datetime(df['open_time'])
-        
-        # Prepare for iteration
-        forecast = []
-        
-        # We need a working dataframe that we append to
-        # To avoid performance issues with huge DF, we validly only need the last ~100 rows 
-        # to calculate window features like SMA_20, RSI_14, MACD(26).
-        # Let's keep last 200 for safety.
-        working_df = df.tail(200).copy().reset_index(drop=True)
+            raise ValueError("No market data")
+        return int(pd.Timestamp(df['open_time'].iloc[-1]).value // 1_000_000)
+
+    def _prepare_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, list]:
+        """
+        Returns a copy of the OHLCV frame with every feature column added (NaN
+        where there is not enough history yet) and the feature column names.
+        Shares the feature kernel with visualize_predictions.py, so the model
+        always gets the exact same input structure.
+        """
+        return feature_frame(df), list(FEATURE_COLS)
+
+    def get_latest_features(self, coin: str, interval: str = BASE_INTERVAL) -> dict:
+        """
+        Fetches recent klines for the coin (local CSV as fallback), computes features,
+        and returns the last row. With another interval the features are
+        computed on its rolled-up candles.
+        """
+        entry = self._shared_entry(coin) if interval == BASE_INTERVAL else None
+        if entry is not None:
+            # Computed once by the worker that fetched the klines
+            return dict(zip(FEATURE_COLS, entry.features.tolist()))
+        return self._latest_features_from_frame(self._get_market_data(coin, interval))
+
+    async def get_latest_features_async(self, coin: str, interval: str = BASE_INTERVAL) -> dict:
+        """
+        Async variant of get_latest_features. Only the kline fetch runs on the
+        event loop; the feature computation runs in a worker thread.
+        """
+        entry = await self._shared_entry_async(coin) if interval == BASE_INTERVAL else None
+        if entry is not None:
+            return dict(zip(FEATURE_COLS, entry.features.tolist()))
+        df = await self._get_market_data_async(coin, interval)
+        return await asyncio.to_thread(self._latest_features_from_frame, df)
+
+    @staticmethod
+    def _check_history(df: pd.DataFrame) -> None:
+        # e.g. 1w candles rolled up from the live 500 hours alone when no local store is built
+        if len(df) < MIN_HISTORY:
+            raise ValueError(f"Not enough data to calculate features ({len(df)} candles, need {MIN_HISTORY})")
+
+    def _latest_features_from_frame(self, df: pd.DataFrame) -> dict:
+        # Only the last row is needed, so skip computing the full feature history
+        self._check_history(df)
+        with stage("features"):
+            row = latest_feature_row(df)
+        if np.isnan(row).any():
+            raise ValueError("Not enough data to calculate features")
+        # Convert to dict for the generic predict method
+        return dict(zip(FEATURE_COLS, row.tolist()))
+
+    def predict_forecast(self, coin: str, steps: int = 24, columnar: bool = False,
+                         interval: str = BASE_INTERVAL) -> Dict:
+        """
+        Generates an iterative forecast for the next `steps` candles of
+        `interval` (hours by default).
+        Returns dictionary with historical data and forecast data: lists of
+        {"time", "price"} points, or with columnar=True parallel arrays
+        ({"time": epoch ms, "price": floats}).
+        """
+        result = self._forecast_from_frame(coin, self._get_market_data(coin, interval), steps, interval)
+        return result if columnar else to_points(result)
+
+    async def predict_forecast_async(self, coin: str, steps: int = 24, columnar: bool = False,
+                                     interval: str = BASE_INTERVAL) -> Dict:
+        """
+        Async variant of predict_forecast. Only the kline fetch runs on the
+        event loop; the CPU-bound forecast runs in a worker thread so other
+        requests and streams are not held up.
+        """
+        df = await self._get_market_data_async(coin, interval)
+        result = await asyncio.to_thread(self._forecast_from_frame, coin, df, steps, interval)
+        return result if columnar else to_points(result)
+
+    def _forecast_from_frame(self, coin: str, df: pd.DataFrame, steps: int, interval: str = BASE_INTERVAL) -> Dict:
+        """Runs the iterative forecast on an already loaded OHLCV frame (columnar result)."""
+        # Window features (SMA_20, RSI_14, MACD(26)) only need the last ~100 rows;
+        # keep the last 200 for safety and warm up the streaming indicator engine
+        # on them. Each forecast step then updates the indicators in O(1)
+        # instead of re-running _prepare_features on a growing frame.
+        self._check_history(df)
+        # A negative horizon forecasts nothing (np.empty rejects negative sizes)
+        steps = max(0, steps)
+        working_df = df.tail(200).reset_index(drop=True)
+        with stage("features"):
+            engine = IndicatorEngine.from_frame(working_df)
         
         # Get latest actual price
         current_price = float(working_df['close'].iloc[-1])
-        last_time = working_df['open_time'].iloc[-1] if 'open_time' in working_df.columns else pd.Timestamp.now()
+        # Volume is not predicted by our simple model, carry the last one forward
+        last_volume = float(working_df['volume'].iloc[-1])
+        prices = np.empty(steps)
 
         # Iterative Prediction Loop
-        for i in range(steps):
-            # 1. Feature Engineering on current state
-            df_proc, feature_cols = self._prepare_features(working_df)
-            
-            # Check if we have valid features for the last row
-            last_row = df_proc.iloc[-1]
-            if last_row[feature_cols].isnull().any():
-               # Should not happen if we have enough history
-               break
-               
-            features = {col: last_row[col] for col in feature_cols}
-            
-            # 2. Predict next price
-            # We predict in USD (model output)
-            pred_price_usd = self.predict(coin, features)
-            
-            # 3. Append prediction to working_df to support next step
-            next_time = last_time + timedelta(hours=i+1)
-            
-            # We need to construct a new row. 
-            # Most columns like open, high, low, volume are not predicted by our simple model.
-            # For the sake of feature engineering (SMA, RSI), we essentially assume 
-            # the price stays at 'close'. 
-            # Approximations: High=Low=Close=Pred, Volume=Last Volume (naive)
-            new_row = {
-                'open_time': next_time,
-                'open': pred_price_usd,
-                'high': pred_price_usd,
-                'low': pred_price_usd,
-                'close': pred_price_usd,
-                'volume': working_df['volume'].iloc[-1] # Carry forward volume
-            }
-            
-            # Append using loc (faster than concat for single row usually, or just concat)
-            working_df = pd.concat([working_df, pd.DataFrame([new_row])], ignore_index=True)
+        with stage("forecast_loop"):
+            for i in range(steps):
+                # 1. Features for the current last candle
+                features = engine.feature_vector()
+                if np.isnan(features).any():
+                   # Should not happen if we have enough history
+                   prices = prices[:i]
+                   break
             
-            forecast.append({
-                "time": next_time.isoformat(),
-                "price": pred_price_usd
-            })
+                # 2. Predict next price
+                # We predict in USD (model output)
+                pred_price_usd = float(self.predict_matrix(coin, features))
             
-        # Prepare return data
-        # Historical (last 24 hours)
-        history_df = df.tail(24)
-        history = []
-        for _, row in history_df.iterrows():
-            history.append({
-                "time": row['open_time'].isoformat() if 'open_time' in row else str(row.name),
-                "price": float(row['close'])
-            })
-            
-        # Extract latest technical indicators from the current state
-        # (calculated from the full dataframe before forecasting loop starts)
-        latest_features = self.get_latest_features(coin)
-        
+                # 3. Feed the prediction back to support the next step
+                # Approximations: High=Low=Close=Pred, Volume=Last Volume (naive)
+                engine.update(pred_price_usd, pred_price_usd, pred_price_usd, last_volume)
+                prices[i] = pred_price_usd
+
+        history = self._history(df)
+        times = hourly_after(int(history["time"][-1]), len(prices), INTERVAL_SECONDS[interval] * 1000)
         return {
             "coin": coin,
             "current_price": current_price,
             "history": history,
-            "forecast": forecast,
-            "technical_indicators": {
-                "rsi": float(latest_features.get('RSI_14', 50)),
-                "volatility": float(latest_features.get('volatility_20', 0)),
-                "macd_hist": float(latest_features.get('MACD_hist', 0)),
-                "bb_width": float(latest_features.get('BB_width', 0))
-            }
+            "forecast": {"time": times, "price": prices},
+            "technical_indicators": self._indicator_summary(df),
+        }
+
+    async def get_history_async(self, coin: str, interval: str = BASE_INTERVAL, limit: int = 100,
+                                columnar: bool = False) -> Dict:
+        """
+        Last `limit` OHLCV candles of `interval`, the newest one possibly still
+        open: {"time", "open", "high", "low", "close", "volume"} points, or
+        parallel arrays with columnar=True.
+        """
+        df = await self._get_market_data_async(coin, interval)
+        if df.empty or 'open_time' not in df.columns:
+            raise ValueError("No market data")
+        tail = df.tail(limit)
+        candles = {"time": epoch_ms(tail['open_time'])}
+        for name in ['open', 'high', 'low', 'close', 'volume']:
+            candles[name] = tail[name].to_numpy(dtype=float)
+        result = {"coin": coin, "interval": interval, "candles": candles}
+        return result if columnar else to_points(result)
+
+    @staticmethod
+    def _history(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Open times (epoch ms) and closes of the last 24 candles."""
+        history_df = df.tail(24)
+        if 'open_time' in history_df.columns:
+            times = epoch_ms(history_df['open_time'])
+        else:
+            # No timestamps: treat the rows as hourly candles up to now
+            now = epoch_ms(pd.Series([pd.Timestamp.now()]))[0]
+            times = now - MS_PER_HOUR * np.arange(len(history_df) - 1, -1, -1, dtype=np.int64)
+        return {"time": times, "price": history_df['close'].to_numpy(dtype=float)}
+
+    def _indicator_summary(self, df: pd.DataFrame) -> Dict[str, float]:
+        # Latest technical indicators, calculated from the data before any forecasting
+        latest_features = self._latest_features_from_frame(df)
+        return {
+            "rsi": float(latest_features.get('RSI_14', 50)),
+            "volatility": float(latest_features.get('volatility_20', 0)),
+            "macd_hist": float(latest_features.get('MACD_hist', 0)),
+            "bb_width": float(latest_features.get('BB_width', 0))
+        }
+
+    def predict_forecast_mc(self, coin: str, steps: int = 24, paths: int = DEFAULT_PATHS,
+                            percentiles: Sequence[float] = DEFAULT_PERCENTILES, seed: int = None,
+                            columnar: bool = False, interval: str = BASE_INTERVAL) -> Dict:
+        """
+        Probabilistic forecast: simulates `paths` price paths for the next `steps`
+        candles of `interval` and returns percentile bands per step (the median
+        as "forecast").
+        """
+        df = self._get_market_data(coin, interval)
+        result = self._monte_carlo_from_frame(coin, df, steps, paths, percentiles, seed, interval)
+        return result if columnar else to_points(result)
+
+    async def predict_forecast_mc_async(self, coin: str, steps: int = 24, paths: int = DEFAULT_PATHS,
+                                        percentiles: Sequence[float] = DEFAULT_PERCENTILES, seed: int = None,
+                                        columnar: bool = False, interval: str = BASE_INTERVAL) -> Dict:
+        """Async variant of predict_forecast_mc; the simulation runs in a worker thread."""
+        df = await self._get_market_data_async(coin, interval)
+        result = await asyncio.to_thread(self._monte_carlo_from_frame, coin, df, steps, paths, percentiles, seed,
+                                         interval)
+        return result if columnar else to_points(result)
+
+    def _monte_carlo_from_frame(self, coin: str, df: pd.DataFrame, steps: int, paths: int,
+                                percentiles: Sequence[float], seed: int = None,
+                                interval: str = BASE_INTERVAL) -> Dict:
+        """Runs the Monte Carlo forecast on an already loaded OHLCV frame (columnar result)."""
+        self._check_history(df)
+        steps = max(0, steps)
+        version = self.registry.get(coin)
+        with stage("features"):
+            # Residuals of one-step predictions over the loaded history set the noise
+            noise = calibrate(df, version.predict)
+            working_df = df.tail(200).reset_index(drop=True)
+            engine = IndicatorEngine.from_frame(working_df)
+
+        with stage("forecast_loop"):
+            simulated = simulate_paths(engine, version.predict, steps, paths, rng=np.random.default_rng(seed), **noise)
+            bands = percentile_bands(simulated, percentiles)
+
+        history = self._history(df)
+        times = hourly_after(int(history["time"][-1]), steps, INTERVAL_SECONDS[interval] * 1000)
+        return {
+            "coin": coin,
+            "current_price": float(working_df['close'].iloc[-1]),
+            "history": history,
+            "forecast": {"time": times, "price": np.median(simulated, axis=0)},
+            "bands": {"time": times, **bands},
+            "paths": paths,
+            "residual_std": float(np.std(noise["residuals"])),
+            "technical_indicators": self._indicator_summary(df),
         }
 
     def predict(self, coin: str, features: dict) -> float:
         """
         Loads the model for the coin, scales the input, and predicts the price.
         """
-        self._load_artifacts(coin)
-        
-        feature_order = [
-            'SMA_20', 'RSI_14', 'volatility_20', 'close_lag_1', 'close_lag_2', 
-            'close_lag_3', 'close_lag_7', 'MACD', 'MACD_signal', 'MACD_hist', 
-            'BB_upper', 'BB_lower', 'BB_width', 'ATR', 'OBV'
-        ]
-        
         try:
-            input_values = [features[f] for f in feature_order]
+            input_values = [features[f] for f in FEATURE_COLS]
         except KeyError as e:
             raise ValueError(f"Missing feature: {e}")
 
-        # Reshape for scaler (1 sample, n features)
-        input_array = np.array(input_values).reshape(1, -1)
-        
-        # Scale
-        scaler = self.scalers[coin]
-        scaled_input = scaler.transform(input_array)
-        
-        # Predict
-        model = self.models[coin]
-        prediction = model.predict(scaled_input)
-        
-        return float(prediction[0])
+        return float(self.predict_matrix(coin, np.array(input_values, dtype=float)))
+
+    def predict_matrix(self, coin: str, X: np.ndarray) -> np.ndarray:
+        """
+        Predicts prices for a feature vector (n_features,) or matrix (n_rows, n_features)
+        in FEATURE_COLS order. Returns a scalar array for a vector, 1-D array for a matrix.
+        """
+        return self.registry.get(coin).predict(X)
@@ -0,0 +1,192 @@
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_cache import INTERVAL_SECONDS
+from ohlcv_store import COLUMNS, columns_to_frame, frame_to_columns
+
+# Every coarser interval is derived from the stored/fetched hourly candles
+BASE_INTERVAL = "1h"
+# Intervals the API accepts
+SERVED_INTERVALS = tuple(INTERVAL_SECONDS)
+# Candles kept per rolled-up series (same as the live 1h fetch)
+ROLLUP_ROWS = 500
+
+MS_PER_HOUR = 3600 * 1000
+# Binance weeks open on Monday 00:00 UTC; 1970-01-01 was a Thursday
+WEEK_OFFSET_MS = 4 * 24 * MS_PER_HOUR
+
+
+def bucket_starts(open_ms: np.ndarray, interval: str) -> np.ndarray:
+    """open_time (epoch ms) of the `interval` candle each base candle belongs to."""
+    open_ms = np.asarray(open_ms, dtype=np.int64)
+    if interval == "1y":
+        # Calendar years (used for the macro view, not served)
+        return open_ms.astype('datetime64[ms]').astype('datetime64[Y]').astype('datetime64[ms]').astype(np.int64)
+    width = INTERVAL_SECONDS[interval] * 1000
+    offset = WEEK_OFFSET_MS if interval == "1w" else 0
+    return (open_ms - offset) // width * width + offset
+
+
+def _empty() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+def _slice(columns: Dict[str, np.ndarray], start: int, stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+    return {name: values[start:stop] for name, values in columns.items()}
+
+
+def _concat(first: Dict[str, np.ndarray], second: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    return {name: np.concatenate([first[name], second[name]]) for name in COLUMNS}
+
+
+def rollup(columns: Dict[str, np.ndarray], interval: str) -> Dict[str, np.ndarray]:
+    """
+    Aggregates sorted base candles (typed columns) into `interval` candles:
+    first open, max high, min low, last close, summed volume. A bucket is
+    emitted for every interval that has at least one base candle, so the last
+    one may still be open.
+    """
+    starts = bucket_starts(columns['open_time'], interval)
+    if len(starts) == 0:
+        return _empty()
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:] - 1, len(starts) - 1]
+    return {
+        'open_time': starts[first],
+        'open': columns['open'][first],
+        'high': np.maximum.reduceat(columns['high'], first),
+        'low': np.minimum.reduceat(columns['low'], first),
+        'close': columns['close'][last],
+        'volume': np.add.reduceat(columns['volume'], first),
+    }
+
+
+def resample_frame(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """rollup() for an OHLCV DataFrame; candles are labelled with their open time."""
+    if df.empty:
+        return columns_to_frame(_empty())
+    df = df.sort_values('open_time')
+    return columns_to_frame(rollup(frame_to_columns(df), interval))
+
+
+class Rollup:
+    """
+    Candles of one coarser interval, updated incrementally from base candles.
+
+    Only the base candles of the last (possibly still open) bucket are kept
+    besides the rolled-up columns. Each update re-aggregates that bucket with
+    the base candles at or after its start and appends the buckets that
+    follow; older base candles are never looked at again.
+    """
+
+    def __init__(self, interval: str, max_rows: int = ROLLUP_ROWS):
+        self.interval = interval
+        self.max_rows = max_rows
+        self.columns = _empty()
+        # Base candles of the last bucket
+        self.pending = _empty()
+
+    def update(self, base: Dict[str, np.ndarray]) -> bool:
+        """Folds sorted base candles in. Returns False if none of them was new."""
+        closed = self.columns
+        if len(self.pending['open_time']):
+            base = _slice(base, int(np.searchsorted(base['open_time'], self.pending['open_time'][0])))
+            if not len(base['open_time']):
+                return False
+            # The base window may start inside the last bucket; its newer copies replace ours
+            keep = int(np.searchsorted(self.pending['open_time'], base['open_time'][0]))
+            base = _concat(_slice(self.pending, 0, keep), base)
+            closed = _slice(self.columns, 0, len(self.columns['open_time']) - 1)
+        if not len(base['open_time']):
+            return False
+
+        rolled = rollup(base, self.interval)
+        columns = _concat(closed, rolled)
+        self.columns = _slice(columns, max(0, len(columns['open_time']) - self.max_rows))
+        starts = bucket_starts(base['open_time'], self.interval)
+        self.pending = _slice(base, int(np.searchsorted(starts, rolled['open_time'][-1])))
+        return True
+
+    def follows(self, base: Dict[str, np.ndarray]) -> bool:
+        """False if sorted base candles start after a gap in the hourly candles seen so far."""
+        if not len(self.pending['open_time']) or not len(base['open_time']):
+            return True
+        return base['open_time'][0] <= self.pending['open_time'][-1] + MS_PER_HOUR
+
+
+class RollupEngine:
+    """
+    Cache of rolled-up series per (symbol, interval), shared by all requests.
+
+    A series is seeded once from the stored hourly history (if a loader is
+    given) and then follows the hourly frames handed to get(): each new hourly
+    candle only re-aggregates the open bucket. If hourly candles are missing
+    between the series and a new frame (the store is out of date, or no frame
+    came in for longer than it covers), the series is seeded again, from the
+    frame alone when the store cannot fill the gap. The returned frame is rebuilt
+    only when the base frame's last candle changes, and is shared between
+    callers, so it must be treated as read-only.
+    """
+
+    def __init__(self, max_rows: int = ROLLUP_ROWS):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._rollups: Dict[Tuple[str, str], Rollup] = {}
+        self._frames: Dict[Tuple[str, str], Tuple[tuple, pd.DataFrame]] = {}
+        self.updates = 0
+        self.reseeds = 0
+
+    @staticmethod
+    def _signature(base: pd.DataFrame) -> tuple:
+        last = base.iloc[-1]
+        return (len(base), last['open_time'], last['high'], last['low'], last['close'], last['volume'])
+
+    def base_rows(self, interval: str) -> int:
+        """Hourly candles covering max_rows candles of `interval`."""
+        hours = INTERVAL_SECONDS[interval] // 3600 if interval in INTERVAL_SECONDS else 366 * 24
+        return self.max_rows * hours
+
+    def get(self, symbol: str, interval: str, base: pd.DataFrame,
+            history: Optional[Callable[[int], pd.DataFrame]] = None) -> pd.DataFrame:
+        """
+        `interval` candles for the symbol, brought up to date with the hourly
+        frame `base`. `history(rows)` loads stored hourly candles to seed a new
+        series with; the base frame alone is used without it.
+        """
+        if interval == BASE_INTERVAL or base.empty:
+            return base
+        if 'open_time' not in base.columns:
+            raise ValueError(f"{interval} candles need timestamped hourly data")
+        key = (symbol, interval)
+        signature = self._signature(base)
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            columns = frame_to_columns(base)
+            series = self._rollups.get(key)
+            if series is not None and not series.follows(columns):
+                series = None
+                self.reseeds += 1
+            if series is None:
+                series = self._rollups[key] = Rollup(interval, self.max_rows)
+                stored = history(self.base_rows(interval)) if history is not None else None
+                if stored is not None and not stored.empty:
+                    series.update(frame_to_columns(stored))
+                    if not series.follows(columns):
+                        # Stored candles end before the frame starts: rolling both up would hide the gap
+                        series = self._rollups[key] = Rollup(interval, self.max_rows)
+                        self.reseeds += 1
+            series.update(columns)
+            self.updates += 1
+            frame = columns_to_frame(series.columns)
+            self._frames[key] = (signature, frame)
+            return frame
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rollups.clear()
+            self._frames.clear()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Any, List, Optional
 
 class PredictionRequest(BaseModel):
     # Defining specific fields helps with documentation and validation
@@ -23,3 +23,19 @@ class PredictionRequest(BaseModel):
 class PredictionResponse(BaseModel):
     coin: str
     predicted_price: float
+
+class BatchPredictionRequest(BaseModel):
+    # Rows are validated one by one so a bad row does not reject the whole batch
+    # (not even one that is not an object). Each row holds the PredictionRequest
+    # features and optionally its own "coin"; rows without one use the batch-level coin.
+    coin: Optional[str] = None
+    rows: List[Any]
+
+class BatchPredictionResult(BaseModel):
+    index: int
+    coin: Optional[str] = None
+    predicted_price: Optional[float] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionResult]
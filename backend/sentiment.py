@@ -0,0 +1,145 @@
+import bisect
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+BULLISH_KEYWORDS = [
+    "surge", "jump", "rally", "record", "high", "all-time high", "ath",
+    "adoption", "etf", "approve", "approval", "buy", "support", "bull",
+    "bullish", "gain", "success", "launch", "partnership", "upgrade",
+    "soar", "rocket", "breakout", "accumulate"
+]
+
+BEARISH_KEYWORDS = [
+    "crash", "drop", "fall", "dump", "ban", "regulation", "lawsuit",
+    "sue", "hack", "scam", "bear", "bearish", "loss", "fail", "delay",
+    "reject", "warning", "risk", "critical", "plunge", "collapse",
+    "correction", "investigation"
+]
+
+# Keywords that make a bullish/bearish call stronger
+STRONG_KEYWORDS = ["record", "crash", "hack", "etf"]
+
+# Inflections accepted after a keyword ("surged", "hacks", "jumping")
+SUFFIXES = ["s", "es", "d", "ed", "ing"]
+
+# Article ids whose scores are remembered
+MEMO_SIZE = 4096
+
+Sentiment = Tuple[str, int]
+
+
+def _rate(bullish_count: int, bearish_count: int, strong: bool) -> Sentiment:
+    score = 50  # Neutral base
+    sentiment = "Neutral"
+
+    if bullish_count > bearish_count:
+        sentiment = "Bullish"
+        score = min(95, 60 + (bullish_count * 10))
+    elif bearish_count > bullish_count:
+        sentiment = "Bearish"
+        score = max(15, 40 - (bearish_count * 10))
+
+    # Determine strength based on keywords
+    if strong:
+        if sentiment == "Bullish": score = min(98, score + 10)
+        elif sentiment == "Bearish": score = max(10, score - 10)
+
+    return sentiment, score
+
+
+class SentimentEngine:
+    """
+    Keyword sentiment for news articles.
+
+    Both lexicons are compiled into one regex that only matches whole words
+    (so "ban" no longer fires inside "urban"), and each distinct keyword counts
+    once per article. A keyword that contains another one as a word ("all-time
+    high" -> "high") counts for both. Batches are scored with one scan over the
+    joined texts, and results are memoized by article id.
+    """
+
+    def __init__(self, bullish: Iterable[str] = BULLISH_KEYWORDS, bearish: Iterable[str] = BEARISH_KEYWORDS,
+                 strong: Iterable[str] = STRONG_KEYWORDS, memo_size: int = MEMO_SIZE):
+        self.bullish = frozenset(word.lower() for word in bullish)
+        self.bearish = frozenset(word.lower() for word in bearish)
+        self.strong = frozenset(word.lower() for word in strong)
+        words = sorted(self.bullish | self.bearish, key=len, reverse=True)
+        suffixes = "|".join(sorted(SUFFIXES, key=len, reverse=True))
+        self.pattern = re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")(?:" + suffixes + r")?\b")
+        # Keywords found inside each keyword (itself included)
+        self.implies: Dict[str, frozenset] = {
+            word: frozenset([word]) | frozenset(
+                m.group(1) for i in range(len(word)) for m in [self.pattern.match(word, i)]
+                if m and m.group(1) != word and (i == 0 or not word[i - 1].isalnum())
+            )
+            for word in words
+        }
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[object, Sentiment]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _rate_words(self, words: Iterable[str]) -> Sentiment:
+        found = set()
+        for word in words:
+            found |= self.implies[word]
+        return _rate(len(found & self.bullish), len(found & self.bearish), bool(found & self.strong))
+
+    def score(self, text: str) -> Sentiment:
+        """(sentiment, score) for one text."""
+        return self._rate_words(m.group(1) for m in self.pattern.finditer(text.lower()))
+
+    def score_texts(self, texts: List[str]) -> List[Sentiment]:
+        """Scores many texts with one regex scan over their concatenation."""
+        if not texts:
+            return []
+        # Newlines separate the texts; no keyword spans one, so matches stay inside an article
+        # Offsets come from the lowercased texts: lowercasing can change a
+        # text's length ("İ" becomes two code points)
+        lowered = [text.lower() for text in texts]
+        starts, offset = [], 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        joined = "\n".join(lowered)
+
+        words: List[List[str]] = [[] for _ in texts]
+        for m in self.pattern.finditer(joined):
+            words[bisect.bisect_right(starts, m.start()) - 1].append(m.group(1))
+        return [self._rate_words(found) for found in words]
+
+    def score_articles(self, articles: List[dict]) -> List[Sentiment]:
+        """
+        Scores news items on their title and body. Items seen before (same id)
+        reuse the remembered result; the rest are scored in one batch.
+        """
+        results: List[Optional[Sentiment]] = [None] * len(articles)
+        pending = []
+        with self._lock:
+            for i, article in enumerate(articles):
+                key = article.get("id")
+                if key is not None and key in self._memo:
+                    self._memo.move_to_end(key)
+                    results[i] = self._memo[key]
+                    self.hits += 1
+                else:
+                    pending.append(i)
+                    self.misses += 1
+
+        texts = [f"{articles[i].get('title') or ''} {articles[i].get('body') or ''}" for i in pending]
+        for i, result in zip(pending, self.score_texts(texts)):
+            results[i] = result
+
+        with self._lock:
+            for i in pending:
+                key = articles[i].get("id")
+                if key is None:
+                    continue
+                self._memo[key] = results[i]
+                self._memo.move_to_end(key)
+                if len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return results
@@ -0,0 +1,72 @@
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+MS_PER_HOUR = 3600 * 1000
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON bytes; NumPy arrays and scalars are encoded directly."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with dumps (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def epoch_ms(times: pd.Series) -> np.ndarray:
+    """Naive UTC datetimes as int64 epoch milliseconds."""
+    return pd.to_datetime(times).to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+
+def hourly_after(last_ms: int, steps: int, step_ms: int = MS_PER_HOUR) -> np.ndarray:
+    """Epoch ms of the `steps` hourly (or `step_ms` long) candles following `last_ms`."""
+    return last_ms + step_ms * np.arange(1, steps + 1, dtype=np.int64)
+
+
+def iso_times(ms: np.ndarray) -> List[str]:
+    """Timestamp.isoformat() of each epoch ms value, formatted in one call."""
+    values = np.asarray(ms, dtype=np.int64).astype('datetime64[ms]')
+    strings = np.datetime_as_string(values, unit='s').astype(object)
+    # isoformat() only adds microseconds when there is a fraction
+    fraction = (values.astype(np.int64) % 1000) != 0
+    if fraction.any():
+        strings[fraction] = np.datetime_as_string(values[fraction], unit='us')
+    return strings.tolist()
+
+
+def to_points(payload: Dict) -> Dict:
+    """
+    Converts a columnar payload to the original point-list shape: every
+    section holding parallel arrays with a "time" column becomes a list of
+    {"time": iso string, <column>: value} dicts.
+    """
+    result = {}
+    for key, value in payload.items():
+        if isinstance(value, dict) and "time" in value:
+            names = ["time"] + [name for name in value if name != "time"]
+            columns = [iso_times(value["time"])] + [np.asarray(value[name]).tolist() for name in names[1:]]
+            value = [dict(zip(names, row)) for row in zip(*columns)]
+        result[key] = value
+    return result
@@ -0,0 +1,323 @@
+import asyncio
+import mmap
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators import FEATURE_COLS
+from market_cache import next_candle_close
+from ohlcv_store import COLUMNS, frame_to_columns
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, set SHARED_CACHE_ROLE=writer on one process instead
+    fcntl = None
+
+# Directory for the shared cache files; unset disables the shared cache.
+# Use a tmpfs such as /dev/shm/crypto-sight so the files never touch a disk.
+SHARED_CACHE_DIR = os.getenv("SHARED_CACHE_DIR", "")
+# "auto": the first process to take the writer lock refreshes, the others read;
+# "writer" / "reader" force a role (e.g. a sidecar refresher and API workers)
+SHARED_CACHE_ROLE = os.getenv("SHARED_CACHE_ROLE", "auto")
+# Candles kept per coin (the live fetch returns 500)
+SHARED_CACHE_ROWS = 1000
+# Seconds a reader waits for the writer to publish the current candle before fetching itself
+SHARED_CACHE_WAIT = float(os.getenv("SHARED_CACHE_WAIT", "3"))
+# Seconds between checks while waiting
+POLL_INTERVAL = 0.05
+
+MAGIC = b"CSSHM001"
+# Bumped whenever the file layout changes; files with another layout are ignored
+LAYOUT_VERSION = 1
+HEADER_BYTES = 64
+# Per slot: rows, fetched_at, valid_until, padding to 32 bytes
+SLOT_META = np.dtype([('rows', '<i8'), ('fetched_at', '<f8'), ('valid_until', '<f8'), ('pad', '<i8')])
+# Attempts to get a consistent read while the writer is publishing
+READ_RETRIES = 3
+
+
+def _layout(capacity: int) -> Tuple[int, Dict[str, int], int, int]:
+    """(slot size, column offsets within a slot, feature offset, total file size)."""
+    offsets = {}
+    offset = SLOT_META.itemsize
+    for name, dtype in COLUMNS.items():
+        offsets[name] = offset
+        offset += capacity * dtype.itemsize
+    features_offset = offset
+    slot_bytes = offset + len(FEATURE_COLS) * 8
+    return slot_bytes, offsets, features_offset, HEADER_BYTES + 2 * slot_bytes
+
+
+class SharedEntry:
+    """Klines and latest feature row read from the shared cache (read-only views)."""
+
+    def __init__(self, frame: pd.DataFrame, features: np.ndarray, fetched_at: float, valid_until: float):
+        self.frame = frame
+        self.features = features
+        self.fetched_at = fetched_at
+        self.valid_until = valid_until
+
+
+class _Segment:
+    """
+    One coin/interval file mapped into memory.
+
+    Layout: a 64-byte header (magic, layout version, capacity, sequence number)
+    followed by two slots, each holding the kline columns and the feature row.
+    The sequence number is a seqlock over the two slots: it is odd while the
+    writer fills the slot not currently published, and even once that slot is
+    published (slot = seq // 2 % 2). A reader remembers the sequence it started
+    from and checks afterwards that the writer has not begun overwriting its
+    slot, so it never uses a torn update. Because the writer always fills the
+    other slot, a reader's views stay valid until the next-but-one publish.
+    """
+
+    def __init__(self, path: str, writable: bool):
+        self.path = path
+        self.writable = writable
+        with open(path, 'r+b' if writable else 'rb') as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        if self.mm[:8] != MAGIC:
+            raise ValueError(f"{path} is not a shared cache file")
+        version, capacity = np.frombuffer(self.mm, dtype='<u4', count=2, offset=8)
+        if version != LAYOUT_VERSION:
+            raise ValueError(f"{path} has layout {version}, expected {LAYOUT_VERSION}")
+        self.capacity = int(capacity)
+        slot_bytes, offsets, features_offset, size = _layout(self.capacity)
+        if len(self.mm) != size:
+            raise ValueError(f"{path} has {len(self.mm)} bytes, expected {size}")
+
+        buffer = memoryview(self.mm)
+        self.seq = np.ndarray((1,), dtype='<u8', buffer=buffer, offset=16)
+        self.slots = []
+        for i in range(2):
+            base = HEADER_BYTES + i * slot_bytes
+            self.slots.append({
+                "meta": np.ndarray((1,), dtype=SLOT_META, buffer=buffer, offset=base),
+                "columns": {name: np.ndarray((self.capacity,), dtype=dtype, buffer=buffer, offset=base + offsets[name])
+                            for name, dtype in COLUMNS.items()},
+                "features": np.ndarray((len(FEATURE_COLS),), dtype='<f8', buffer=buffer, offset=base + features_offset),
+            })
+
+    @staticmethod
+    def create(path: str, capacity: int) -> None:
+        """Writes an empty file atomically (readers see the old file or the complete new one)."""
+        size = _layout(capacity)[3]
+        header = np.zeros(HEADER_BYTES, dtype=np.uint8)
+        header[:8] = np.frombuffer(MAGIC, dtype=np.uint8)
+        header[8:16] = np.array([LAYOUT_VERSION, capacity], dtype='<u4').view(np.uint8)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(size)
+        os.replace(tmp, path)
+
+    def read(self) -> Optional[SharedEntry]:
+        for _ in range(READ_RETRIES):
+            start = int(self.seq[0])
+            if start == 0:
+                return None  # Nothing published yet
+            if start % 2:
+                # Writer is filling the other slot; the published one is still intact
+                start -= 1
+            slot = self.slots[start // 2 % 2]
+            meta = slot["meta"][0]
+            rows = int(meta['rows'])
+            columns = {name: values[:rows] for name, values in slot["columns"].items()}
+            open_time = columns.pop('open_time').view('datetime64[ms]')
+            frame = pd.DataFrame({'open_time': open_time, **columns}, copy=False)
+            entry = SharedEntry(frame, slot["features"], float(meta['fetched_at']), float(meta['valid_until']))
+            # The slot is overwritten only once the writer starts the publish after next
+            if int(self.seq[0]) <= start + 2:
+                return entry
+        return None
+
+    def write(self, columns: Dict[str, np.ndarray], features: np.ndarray, fetched_at: float, valid_until: float) -> None:
+        seq = int(self.seq[0])
+        if seq % 2:
+            seq += 1  # A previous writer died mid-publish; its slot was never published
+        target = (seq // 2 + 1) % 2
+        self.seq[0] = seq + 1
+        slot = self.slots[target]
+        rows = min(len(columns['open_time']), self.capacity)
+        for name, values in slot["columns"].items():
+            values[:rows] = np.asarray(columns[name], dtype=values.dtype)[-rows:]
+        slot["features"][:] = features
+        slot["meta"][0] = (rows, fetched_at, valid_until, 0)
+        self.seq[0] = seq + 2
+
+    def close(self) -> None:
+        self.seq = None
+        self.slots = []
+        try:
+            self.mm.close()
+        except BufferError:
+            pass  # Views handed to readers are still alive; the mapping goes with them
+
+
+class SharedMarketCache:
+    """
+    Optional cross-process cache of the latest klines and feature row per
+    coin, for running the API with several workers.
+
+    One process (the writer: whichever worker holds the lock file, or a
+    process started with role "writer") publishes every kline fetch into a
+    memory-mapped file per coin. Every process reads those files without
+    copying: the returned DataFrame and feature row are read-only views of the
+    mapping. Entries expire at the close of the candle they were fetched in,
+    like OHLCVCache. Readers that find no entry for the current candle wait
+    briefly for the writer's publish (wait / wait_async) before fetching
+    themselves, so at candle close only the writer goes to Binance.
+    """
+
+    def __init__(self, directory: str, role: str = SHARED_CACHE_ROLE, capacity: int = SHARED_CACHE_ROWS,
+                 clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self.capacity = capacity
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self._segments: Dict[str, _Segment] = {}
+        self._lock_file = None
+        self.writer = self._claim(role)
+        self.hits = 0
+        self.misses = 0
+        self.published = 0
+        self.waits = 0
+        self.timeouts = 0
+        # Candle (close time) per key in which a wait already timed out
+        self._gave_up: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional['SharedMarketCache']:
+        """Shared cache configured by SHARED_CACHE_DIR, or None when it is not set."""
+        return cls(SHARED_CACHE_DIR) if SHARED_CACHE_DIR else None
+
+    def _claim(self, role: str) -> bool:
+        if role in ("writer", "reader"):
+            return role == "writer"
+        if fcntl is None:
+            print("Shared cache: no file locking on this platform, reading only (set SHARED_CACHE_ROLE=writer)")
+            return False
+        self._lock_file = open(os.path.join(self.directory, "writer.lock"), "a+")
+        try:
+            # Held until this process exits, then the next process to start takes over
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.directory, f"{symbol}_{interval}.shm")
+
+    def _segment(self, symbol: str, interval: str, reopen: bool = False) -> Optional[_Segment]:
+        key = f"{symbol}_{interval}"
+        segment = self._segments.get(key)
+        path = self._path(symbol, interval)
+        if segment is not None and reopen:
+            # The writer may have replaced the file (e.g. after a layout change)
+            try:
+                if os.stat(path).st_ino == segment.inode:
+                    return segment
+            except FileNotFoundError:
+                pass
+            segment.close()
+            segment = self._segments[key] = None
+        if segment is None:
+            try:
+                segment = _Segment(path, self.writer)
+            except (FileNotFoundError, ValueError):
+                if not self.writer:
+                    return None
+                _Segment.create(path, self.capacity)
+                segment = _Segment(path, self.writer)
+            self._segments[key] = segment
+        return segment
+
+    def _current(self, symbol: str, interval: str) -> Optional[SharedEntry]:
+        for reopen in (False, True):
+            segment = self._segment(symbol, interval, reopen=reopen)
+            entry = segment.read() if segment is not None else None
+            if entry is not None and self.clock() < entry.valid_until:
+                return entry
+        return None
+
+    def read(self, symbol: str, interval: str) -> Optional[SharedEntry]:
+        """Entry for the current candle, or None if there is none (yet)."""
+        entry = self._current(symbol, interval)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return entry
+
+    def _should_wait(self, symbol: str, interval: str, timeout: float) -> bool:
+        # A writer that did not publish in time this candle is not waited for again until the next one
+        return (not self.writer and timeout > 0
+                and self._gave_up.get(f"{symbol}_{interval}") != next_candle_close(self.clock(), interval))
+
+    def _timed_out(self, symbol: str, interval: str) -> None:
+        self._gave_up[f"{symbol}_{interval}"] = next_candle_close(self.clock(), interval)
+        self.timeouts += 1
+
+    def wait(self, symbol: str, interval: str, timeout: float = SHARED_CACHE_WAIT) -> Optional[SharedEntry]:
+        """
+        read(), but a reader without an entry for the current candle polls for
+        up to `timeout` seconds for the writer to publish one. None means the
+        caller should fetch itself.
+        """
+        entry = self.read(symbol, interval)
+        if entry is not None or not self._should_wait(symbol, interval, timeout):
+            return entry
+        self.waits += 1
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = self._current(symbol, interval)
+            if entry is not None:
+                return entry
+        self._timed_out(symbol, interval)
+        return None
+
+    async def wait_async(self, symbol: str, interval: str, timeout: float = SHARED_CACHE_WAIT) -> Optional[SharedEntry]:
+        """wait() without blocking the event loop."""
+        entry = self.read(symbol, interval)
+        if entry is not None or not self._should_wait(symbol, interval, timeout):
+            return entry
+        self.waits += 1
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            entry = self._current(symbol, interval)
+            if entry is not None:
+                return entry
+        self._timed_out(symbol, interval)
+        return None
+
+    def publish(self, symbol: str, interval: str, df: pd.DataFrame, features: np.ndarray) -> bool:
+        """Stores a fetched kline frame and its latest feature row; a no-op unless this process is the writer."""
+        if not self.writer or df.empty:
+            return False
+        segment = self._segment(symbol, interval)
+        now = self.clock()
+        segment.write(frame_to_columns(df), features, now, next_candle_close(now, interval))
+        self.published += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {"writer": self.writer, "hits": self.hits, "misses": self.misses, "published": self.published,
+                "waits": self.waits, "timeouts": self.timeouts, "segments": len(self._segments)}
+
+    def close(self) -> None:
+        for segment in self._segments.values():
+            if segment is not None:
+                segment.close()
+        self._segments.clear()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,252 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip (and prebuilt .br files) are served
+    brotli = None
+
+# Built frontend (vite build output copied next to the API)
+STATIC_DIR = os.getenv("STATIC_DIR", "static")
+
+# Vite puts content-hashed bundles under assets/; their URL changes with their content
+IMMUTABLE_PREFIX = "assets/"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# index.html and unhashed files are revalidated with their ETag on every use
+REVALIDATE_CACHE = "no-cache"
+
+# Compressed variants: Content-Encoding -> file suffix of a build-time precompressed copy
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+# Smaller files are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE = re.compile(r"^(text/|application/(javascript|json|xml|wasm|manifest\+json)|image/svg\+xml)")
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/javascript", ".mjs")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class StaticAsset:
+    """One file held in memory with its compressed variants. Never modified after indexing."""
+
+    def __init__(self, path: str, body: bytes, media_type: str, immutable: bool, variants: Dict[str, bytes]):
+        self.path = path
+        self.media_type = media_type
+        self.cache_control = IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE
+        # Content-Encoding -> bytes; "identity" is the file itself
+        self.variants = {"identity": body, **variants}
+        digest = hashlib.sha256(body).hexdigest()[:20]
+        # Each encoding is its own representation and needs its own ETag
+        self.etags = {encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+                      for encoding in self.variants}
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def is_safe_path(path: str) -> bool:
+    """Rejects traversal and odd paths by looking at the string only."""
+    if "\x00" in path or "\\" in path or path.startswith("/") or ":" in path.split("/", 1)[0]:
+        return False
+    return all(part not in ("..", ".") for part in path.split("/"))
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Content-Encodings from an Accept-Encoding header with q > 0, best first."""
+    accepted = []
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.append((q, name))
+    return [name for _, name in sorted(accepted, key=lambda item: -item[0])]
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single "bytes=" range, None if the header
+    should be ignored (multiple ranges or another unit). Raises ValueError if
+    the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header}")
+    if start >= size or end < start:
+        raise ValueError(f"Range not satisfiable: {header}")
+    return start, min(end, size - 1)
+
+
+def _etag_listed(header: Optional[str], etags) -> bool:
+    for candidate in (header or "").split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate in etags:
+            return True
+    return False
+
+
+class StaticIndex:
+    """
+    In-memory index of the built frontend, read once by load().
+
+    Every file is kept with gzip and (if the brotli package is installed)
+    brotli variants, taken from precompressed .gz/.br files next to it when the
+    build produced them and compressed at load time otherwise. Requests are
+    answered from the index alone: unknown or traversal paths never reach the
+    filesystem. Hashed files under assets/ are cached as immutable, the rest
+    revalidate with their ETag. Single byte ranges are served for the
+    uncompressed file.
+    """
+
+    def __init__(self, root: str = STATIC_DIR, index_file: str = "index.html"):
+        self.root = root
+        self.index_file = index_file
+        self.assets: Dict[str, StaticAsset] = {}
+
+    def load(self) -> int:
+        """(Re)reads every file under root; returns the number of assets."""
+        assets = {}
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                if any(path.endswith(suffix) and os.path.exists(full_path[:-len(suffix)])
+                       for suffix in ENCODINGS.values()):
+                    continue  # Precompressed copy of another file
+                assets[path] = self._read(full_path, path)
+        self.assets = assets
+        return len(assets)
+
+    def _read(self, full_path: str, path: str) -> StaticAsset:
+        with open(full_path, "rb") as f:
+            body = f.read()
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+        variants = {}
+        if COMPRESSIBLE.match(media_type) and len(body) >= MIN_COMPRESS_BYTES:
+            for encoding, suffix in ENCODINGS.items():
+                if os.path.exists(full_path + suffix):
+                    with open(full_path + suffix, "rb") as f:
+                        variants[encoding] = f.read()
+                elif encoding != "br" or brotli is not None:
+                    variants[encoding] = _compress(encoding, body)
+            # Keep only variants that are actually smaller
+            variants = {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+        return StaticAsset(path, body, media_type, path.startswith(IMMUTABLE_PREFIX), variants)
+
+    def lookup(self, path: str) -> Optional[StaticAsset]:
+        """
+        Asset for a request path. Unknown paths outside assets/ get index.html
+        (client-side routes of the SPA); unsafe paths and missing assets get None.
+        """
+        path = path.lstrip("/")
+        if not is_safe_path(path):
+            return None
+        asset = self.assets.get(path or self.index_file)
+        if asset is None and not path.startswith(IMMUTABLE_PREFIX):
+            asset = self.assets.get(self.index_file)
+        return asset
+
+    def serve(self, path: str, headers: Mapping[str, str]) -> Response:
+        """Response for a GET of `path` with the given request headers."""
+        asset = self.lookup(path)
+        if asset is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+
+        encoding = "identity"
+        for candidate in accepted_encodings(headers.get("accept-encoding")):
+            if candidate == "*":
+                candidate = next((name for name in ENCODINGS if name in asset.variants), "identity")
+            if candidate in asset.variants:
+                encoding = candidate
+                break
+        body = asset.variants[encoding]
+        response_headers = {"ETag": asset.etags[encoding], "Cache-Control": asset.cache_control,
+                            "Accept-Ranges": "bytes"}
+        if len(asset.variants) > 1:
+            response_headers["Vary"] = "Accept-Encoding"
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+
+        if _etag_listed(headers.get("if-none-match"), asset.etags.values()):
+            return Response(status_code=304, headers=response_headers)
+
+        # Ranges apply to the uncompressed file; If-Range must name its ETag
+        range_header = headers.get("range")
+        if range_header and (not headers.get("if-range") or headers["if-range"] == asset.etags["identity"]):
+            body = asset.variants["identity"]
+            response_headers["ETag"] = asset.etags["identity"]
+            response_headers.pop("Content-Encoding", None)
+            try:
+                byte_range = parse_range(range_header, len(body))
+            except ValueError:
+                response_headers["Content-Range"] = f"bytes */{len(body)}"
+                return Response(status_code=416, headers=response_headers)
+            if byte_range is not None:
+                start, end = byte_range
+                response_headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                return Response(body[start:end + 1], status_code=206, media_type=asset.media_type,
+                                headers=response_headers)
+
+        return Response(body, media_type=asset.media_type, headers=response_headers)
+
+
+def precompress(root: str = STATIC_DIR) -> List[str]:
+    """
+    Writes .gz (and .br if brotli is installed) next to every compressible
+    file under root, for build pipelines. Returns the written paths.
+    """
+    written = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if any(name.endswith(suffix) for suffix in ENCODINGS.values()):
+                continue
+            full_path = os.path.join(directory, name)
+            media_type = mimetypes.guess_type(name)[0] or ""
+            if not COMPRESSIBLE.match(media_type) or os.path.getsize(full_path) < MIN_COMPRESS_BYTES:
+                continue
+            with open(full_path, "rb") as f:
+                body = f.read()
+            for encoding, suffix in ENCODINGS.items():
+                if encoding == "br" and brotli is None:
+                    continue
+                with open(full_path + suffix, "wb") as f:
+                    f.write(_compress(encoding, body))
+                written.append(full_path + suffix)
+    return written
+
+
+if __name__ == "__main__":
+    # python static_assets.py [static dir]
+    root = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    paths = precompress(root)
+    print(f"Precompressed {len(paths)} file(s) under {root}" + ("" if brotli else " (gzip only: brotli not installed)"))
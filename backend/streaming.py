@@ -0,0 +1,149 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Set
+
+# Seconds between SSE comments that keep idle connections (and proxies) open
+KEEPALIVE_SECONDS = 15.0
+# Updates buffered per subscriber before the oldest one is dropped
+QUEUE_SIZE = 16
+
+
+def make_update(coin: str, entry: Mapping) -> dict:
+    """Stream payload built from a precomputed entry (features, prediction, forecast)."""
+    features = entry["features"]
+    forecast = entry["forecast"]["forecast"]
+    return {
+        "coin": coin,
+        "time": time.time(),
+        "predicted_price": float(entry["predicted_price"]),
+        "current_price": float(entry["forecast"]["current_price"]),
+        "technical_indicators": {
+            "rsi": float(features.get('RSI_14', 50)),
+            "volatility": float(features.get('volatility_20', 0)),
+            "macd_hist": float(features.get('MACD_hist', 0)),
+            "bb_width": float(features.get('BB_width', 0)),
+        },
+        "next_forecast": forecast[0] if forecast else None,
+    }
+
+
+class _Subscriber:
+    def __init__(self, coins: Set[str]):
+        self.coins = coins
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, update: dict) -> None:
+        # Slow consumers lose the oldest update rather than holding up everyone
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(update)
+
+
+class ForecastBroadcaster:
+    """
+    Fans forecast updates out to stream subscribers.
+
+    Each update is computed once per coin and pushed to every subscriber of
+    that coin. Updates come from the precompute scheduler after each candle
+    close (publish_entries) and, optionally, from a periodic tick that
+    recomputes only the coins somebody is subscribed to.
+    """
+
+    def __init__(self, compute: Callable[[str], Awaitable[Mapping]]):
+        self.compute = compute
+        self.latest: Dict[str, dict] = {}
+        self._subscribers: List[_Subscriber] = []
+        self._task: Optional[asyncio.Task] = None
+        self._priming: Set[str] = set()
+        # Running first updates for new coins (kept referenced until done)
+        self._prime_tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, coins: Set[str]) -> _Subscriber:
+        subscriber = _Subscriber(coins)
+        self._subscribers.append(subscriber)
+        # Start each stream from the last known state
+        for coin in sorted(coins):
+            if coin in self.latest:
+                subscriber.push(self.latest[coin])
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def subscribed_coins(self) -> Set[str]:
+        return set().union(*(s.coins for s in self._subscribers)) if self._subscribers else set()
+
+    def publish(self, coin: str, update: dict) -> None:
+        self.latest[coin] = update
+        for subscriber in self._subscribers:
+            if coin in subscriber.coins:
+                subscriber.push(update)
+
+    def publish_entries(self, entries: Mapping[str, Mapping]) -> None:
+        """Publishes already computed entries (e.g. a fresh precompute snapshot)."""
+        for coin, entry in entries.items():
+            self.publish(coin, make_update(coin, entry))
+
+    async def tick(self, coins: Set[str] = None) -> None:
+        """Recomputes every subscribed coin (or `coins`) once and fans the result out."""
+        coins = sorted(self.subscribed_coins() if coins is None else coins)
+        results = await asyncio.gather(*[self.compute(coin) for coin in coins], return_exceptions=True)
+        for coin, result in zip(coins, results):
+            if isinstance(result, Exception):
+                print(f"Stream update failed for {coin}: {result}")
+                continue
+            self.publish(coin, make_update(coin, result))
+
+    async def _prime(self, coins: Set[str]) -> None:
+        try:
+            await self.tick(coins)
+        finally:
+            self._priming -= coins
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.tick()
+
+    def start(self, interval: float) -> None:
+        if self._task is None and interval > 0:
+            self._task = asyncio.create_task(self.run(interval))
+
+    async def stop(self) -> None:
+        tasks = list(self._prime_tasks) + ([self._task] if self._task is not None else [])
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def events(self, coins: Set[str], max_events: int = 0) -> AsyncIterator[str]:
+        """
+        Server-sent events for a set of coins. Stops after `max_events` updates
+        when it is positive, otherwise runs until the client disconnects.
+        """
+        subscriber = self.subscribe(coins)
+        # Coins nobody has computed yet get one shared update right away
+        missing = coins - set(self.latest) - self._priming
+        if missing:
+            self._priming |= missing
+            task = asyncio.create_task(self._prime(missing))
+            self._prime_tasks.add(task)
+            task.add_done_callback(self._prime_tasks.discard)
+        sent = 0
+        try:
+            while max_events <= 0 or sent < max_events:
+                try:
+                    update = await asyncio.wait_for(subscriber.queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: forecast\ndata: {json.dumps(update)}\n\n"
+                sent += 1
+        finally:
+            self.unsubscribe(subscriber)
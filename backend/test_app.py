@@ -0,0 +1,69 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from indicators import FEATURE_COLS
+from testing import fit_pair, random_features
+
+
+@pytest.fixture
+def client():
+    predictor = app_module.predictor
+    for coin, seed in [('AAA', 0), ('BBB', 1)]:
+        predictor.registry.register(coin, *fit_pair(LinearRegression(), seed))
+    yield TestClient(app_module.app)
+    for coin in ['AAA', 'BBB']:
+        predictor.registry.unregister(coin)
+
+
+def test_predict_batch_mixed_coins_and_errors(client):
+    X = random_features(4, seed=3)
+    rows = [dict(zip(FEATURE_COLS, x)) for x in X]
+    rows[1]['coin'] = 'bbb'
+    del rows[2]['RSI_14']
+    rows[3]['coin'] = 'ZZZ'
+
+    response = client.post('/predict/batch', json={'coin': 'AAA', 'rows': rows})
+    assert response.status_code == 200
+    results = response.json()['results']
+
+    assert [r['index'] for r in results] == [0, 1, 2, 3]
+    assert [r['coin'] for r in results] == ['AAA', 'BBB', 'AAA', 'ZZZ']
+
+    single = client.post('/predict/AAA', json=rows[0]).json()
+    assert results[0]['predicted_price'] == single['predicted_price']
+    expected = app_module.predictor.predict('BBB', rows[1])
+    assert results[1]['predicted_price'] == round(expected, 2)
+
+    assert results[2]['predicted_price'] is None
+    assert 'RSI_14' in results[2]['error']
+    assert results[3]['error'] == 'Model for ZZZ not found'
+
+
+def test_predict_batch_missing_coin(client):
+    rows = [dict(zip(FEATURE_COLS, random_features(1)[0]))]
+    results = client.post('/predict/batch', json={'rows': rows}).json()['results']
+    assert results[0]['error'] == 'Missing coin'
+
+
+def test_predict_batch_reports_malformed_rows_per_item(client):
+    row = dict(zip(FEATURE_COLS, random_features(1)[0]))
+    rows = [row, None, 5, ['x'], {**row, 'coin': 7}, {**row, 'SMA_20': 'abc'}, row]
+    response = client.post('/predict/batch', json={'coin': 'AAA', 'rows': rows})
+    assert response.status_code == 200
+    results = response.json()['results']
+
+    assert results[0]['predicted_price'] == results[6]['predicted_price'] is not None
+    for result in results[1:4]:
+        assert result['error'] == 'Row must be an object of features'
+    assert results[4]['error'] == 'coin must be a string'
+    assert 'SMA_20' in results[5]['error'] and results[5]['predicted_price'] is None
@@ -0,0 +1,161 @@
+import sys
+import os
+import asyncio
+import functools
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+import backtest as backtest_module
+from backtest import backtest_coin, data_hash, history_signature, run_backtests, start_rows, walk_forward
+from indicators import FEATURE_COLS, IndicatorEngine, feature_frame
+from model_registry import COMPACT_NPZ, ModelRegistry, save_compact
+from ohlcv_store import OHLCVStore, frame_to_columns
+from testing import make_ohlcv
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+def fitted_version(df, coin: str = "BTT"):
+    """Linear model fitted on `df` (next close from features), registered in memory."""
+    frame = feature_frame(df).dropna()
+    X, y = frame[FEATURE_COLS].to_numpy()[:-1], frame['close'].to_numpy()[1:]
+    scaler = StandardScaler().fit(X)
+    return ModelRegistry().register(coin, LinearRegression().fit(scaler.transform(X), y), scaler)
+
+
+def arrays(df):
+    return [df[name].to_numpy(dtype=float) for name in ('high', 'low', 'close', 'volume')]
+
+
+def test_walk_forward_matches_iterative_forecast():
+    df = make_ohlcv(400)
+    version = fitted_version(df)
+    high, low, close, volume = arrays(df)
+    rows = np.array([50, 200, 390])
+
+    result = walk_forward(high, low, close, volume, version, [1, 5], rows)
+    for h in [1, 5]:
+        errors = []
+        for r in rows:
+            # Same feedback as Predictor.predict_forecast, one start at a time
+            engine = IndicatorEngine.from_frame(df.iloc[:r + 1])
+            for _ in range(h):
+                price = float(version.predict(engine.feature_vector()))
+                engine.update(price, price, price, volume[r])
+            errors.append(price - close[r + h])
+        assert result[str(h)]["count"] == len(rows)
+        assert result[str(h)]["mae"] == pytest.approx(np.mean(np.abs(errors)))
+        assert result[str(h)]["rmse"] == pytest.approx(np.sqrt(np.mean(np.square(errors))))
+
+
+def test_start_rows_leave_room_for_the_horizon():
+    rows = start_rows(1000, 168, 50)
+    assert len(rows) == 50 and rows[0] == 19 and rows[-1] == 1000 - 1 - 168
+    assert len(start_rows(100, 168, 50)) == 0
+
+
+def test_backtest_report_is_cached_by_data_and_model(tmp_path):
+    df = make_ohlcv(600)
+    version = fitted_version(df)
+    kwargs = dict(horizons=[1, 24], starts=100, version=version, data=df, cache_dir=str(tmp_path))
+
+    report = backtest_coin("BTT", **kwargs)
+    assert not report["cached"]
+    assert report["one_step"]["count"] == 600 - 20
+    assert report["horizons"]["24"]["count"] == 100
+    assert 0.0 <= report["horizons"]["24"]["direction_accuracy"] <= 1.0
+    assert report["data"] == data_hash(df)
+
+    assert backtest_coin("BTT", **kwargs) == {**report, "cached": True}
+    changed = df.copy()
+    changed.loc[len(df) - 1, 'close'] += 1.0
+    assert not backtest_coin("BTT", **{**kwargs, "data": changed})["cached"]
+    assert not backtest_coin("BTT", **{**kwargs, "version": fitted_version(df.tail(300))})["cached"]
+
+
+def test_cache_hits_do_not_load_the_history(tmp_path, monkeypatch):
+    df = make_ohlcv(400)
+    csv_path = tmp_path / "BTT_ML_ready.csv"
+    df.to_csv(csv_path, index=False)
+    kwargs = dict(horizons=[1], starts=10, version=fitted_version(df), data_dir=str(tmp_path),
+                  cache_dir=str(tmp_path / "cache"))
+    loads = []
+    load_history = backtest_module.load_history
+    monkeypatch.setattr(backtest_module, "load_history", lambda *args: loads.append(args) or load_history(*args))
+
+    report = backtest_coin("BTT", **kwargs)
+    assert report["data"] == history_signature("BTT", str(tmp_path)) and report["rows"] == 400
+    assert backtest_coin("BTT", **kwargs)["cached"] and len(loads) == 1
+
+    # A rewritten CSV is new data
+    df.tail(300).to_csv(csv_path, index=False)
+    assert backtest_coin("BTT", **kwargs)["rows"] == 300 and len(loads) == 2
+
+    # The store's identity is its row count and last candle
+    store = OHLCVStore(str(tmp_path / "store"))
+    store.write("BTTUSDT", "1h", df.head(200))
+    before = history_signature("BTT", str(tmp_path), store.root)
+    assert before.startswith("store:200:")
+    store.append("BTTUSDT", "1h", frame_to_columns(df.iloc[200:250]))
+    assert history_signature("BTT", str(tmp_path), store.root) != before
+
+
+def test_run_backtests_in_process_pool(tmp_path):
+    data_dir, models_dir = tmp_path / "data", tmp_path / "models"
+    data_dir.mkdir()
+    for i, coin in enumerate(["AAA", "BBB"]):
+        df = make_ohlcv(400, seed=i)
+        df.to_csv(data_dir / f"{coin}_ML_ready.csv", index=False)
+        (models_dir / coin).mkdir(parents=True)
+        save_compact(str(models_dir / coin / COMPACT_NPZ), *fitted_version(df).linear)
+
+    reports = run_backtests(["AAA", "BBB", "ZZZ"], workers=2, horizons=[1, 6], starts=50,
+                            models_dir=str(models_dir), data_dir=str(data_dir), cache_dir=str(tmp_path / "cache"))
+    assert [r["coin"] for r in reports] == ["AAA", "BBB", "ZZZ"]
+    assert reports[0]["horizons"]["6"]["count"] == 50 and reports[1]["rows"] == 400
+    assert "error" in reports[2]
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+
+def test_backtest_endpoint(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(backtest_module, "load_history", lambda coin, data_dir: make_ohlcv(400))
+    monkeypatch.setattr(backtest_module, "history_signature", lambda coin, data_dir: "stub")
+    monkeypatch.setattr(app_module, "backtest_coin", functools.partial(backtest_coin, cache_dir=str(tmp_path)))
+    response = client.get('/backtest/aaa', params={'horizons': '1,12', 'starts': 100})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["coin"] == "AAA" and set(body["horizons"]) == {"1", "12"}
+    # Recomputing is not exposed to clients
+    assert client.get('/backtest/aaa', params={'horizons': '1,12', 'starts': 100, 'refresh': True}).json()["cached"]
+    assert client.get('/backtest/AAA', params={'horizons': '500'}).status_code == 400
+    assert client.get('/backtest/AAA', params={'horizons': 'x'}).status_code == 400
+    assert client.get('/backtest/AAA', params={'horizons': '5'}).status_code == 400
+    assert client.get('/backtest/AAA', params={'starts': 20}).status_code == 400
+    assert len(os.listdir(tmp_path)) == 1
+
+    monkeypatch.setattr(app_module, "BACKTEST_SLOTS", asyncio.Semaphore(0))
+    busy = client.get('/backtest/AAA')
+    assert busy.status_code == 429 and busy.headers["retry-after"] == "5"
+
+
+def test_backtest_cache_keeps_the_most_recently_used_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtest_module, "MAX_CACHED_REPORTS", 2)
+    df = make_ohlcv(400)
+    kwargs = dict(version=fitted_version(df), data=df, cache_dir=str(tmp_path))
+    for i, starts in enumerate([10, 20, 10, 30]):
+        report = backtest_coin("BTT", horizons=[1], starts=starts, **kwargs)
+        assert report["cached"] == (i == 2)
+        # Age every report by a second, so use order is visible on coarse clocks
+        for name in os.listdir(tmp_path):
+            mtime = os.stat(tmp_path / name).st_mtime - 1
+            os.utime(tmp_path / name, (mtime, mtime))
+    assert len(os.listdir(tmp_path)) == 2
+    assert backtest_coin("BTT", horizons=[1], starts=10, **kwargs)["cached"]
+    assert not backtest_coin("BTT", horizons=[1], starts=20, **kwargs)["cached"]
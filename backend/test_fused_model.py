@@ -0,0 +1,75 @@
+import sys
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from indicators import FEATURE_COLS
+from model_registry import MODELS_DIR, fuse_linear
+from predictor import Predictor
+from testing import fit_pair, random_features
+
+
+def load_pickled(coin: str):
+    try:
+        model = joblib.load(os.path.join(MODELS_DIR, coin, 'LinearRegression_model.pkl'))
+        scaler = joblib.load(os.path.join(MODELS_DIR, coin, 'scaler.pkl'))
+    except Exception as e:
+        # e.g. git-lfs pointer files that were never pulled
+        pytest.skip(f"Pickled artifacts for {coin} not available: {e}")
+    return model, scaler
+
+
+@pytest.mark.parametrize("coin", sorted(os.listdir(MODELS_DIR)))
+def test_fused_matches_pickled_models(coin):
+    model, scaler = load_pickled(coin)
+    fused = fuse_linear(model, scaler)
+    assert fused is not None
+
+    X = random_features(50)
+    expected = model.predict(scaler.transform(X))
+    weights, bias = fused
+    np.testing.assert_allclose(X @ weights + bias, expected, rtol=1e-9)
+
+
+def test_predict_uses_fused_path():
+    p = Predictor()
+    model, scaler = fit_pair(LinearRegression())
+    assert p.registry.register('TEST', model, scaler).linear is not None
+
+    X = random_features(20, seed=1)
+    expected = model.predict(scaler.transform(X))
+    np.testing.assert_allclose(p.predict_matrix('TEST', X), expected, rtol=1e-9)
+    assert p.predict('TEST', dict(zip(FEATURE_COLS, X[0]))) == pytest.approx(expected[0], rel=1e-9)
+
+
+@pytest.mark.parametrize("with_mean,with_std", [(False, True), (True, False), (False, False)])
+def test_fused_respects_disabled_centering_and_scaling(with_mean, with_std):
+    X = random_features(200)
+    y = X @ np.linspace(-1, 1, X.shape[1]) + 10
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(X)
+    model = LinearRegression().fit(scaler.transform(X), y)
+
+    weights, bias = fuse_linear(model, scaler)
+    X_new = random_features(20, seed=1)
+    np.testing.assert_allclose(X_new @ weights + bias, model.predict(scaler.transform(X_new)), rtol=1e-9)
+
+
+def test_unsupported_model_falls_back_to_sklearn():
+    model, scaler = fit_pair(RandomForestRegressor(n_estimators=5, random_state=0))
+    assert fuse_linear(model, scaler) is None
+
+    p = Predictor()
+    p.registry.register('TEST', model, scaler)
+    X = random_features(5, seed=2)
+    expected = model.predict(scaler.transform(X))
+    np.testing.assert_allclose(p.predict_matrix('TEST', X), expected)
+    assert float(p.predict_matrix('TEST', X[0])) == pytest.approx(expected[0])
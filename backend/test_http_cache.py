@@ -0,0 +1,73 @@
+import sys
+import os
+
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from http_cache import ResponseCache, cache_headers, etag_matches
+from testing import fit_pair
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("should not be computed")
+
+
+def test_etag_matching_and_max_age():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert cache_headers('"abc"', 3600 * 10 + 600)["Cache-Control"] == "public, max-age=3000"
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1"
+
+
+def test_forecast_revalidates_without_recomputing(client, stub_server, monkeypatch):
+    first = client.get('/predict/AAA/forecast', params={'steps': 5})
+    assert first.status_code == 200
+    etag = first.headers['etag']
+    assert first.headers['cache-control'].startswith('public, max-age=')
+
+    monkeypatch.setattr(app_module.predictor, 'predict_forecast_async', fail)
+    not_modified = client.get('/predict/AAA/forecast', params={'steps': 5}, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304 and not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+    # Without the validator the stored bytes are sent again
+    again = client.get('/predict/AAA/forecast', params={'steps': 5})
+    assert again.content == first.content and again.headers['etag'] == etag
+    # Klines were fetched once for all three requests
+    assert stub_server.hits.count('/api/v3/klines') == 1
+
+    # Other parameters have their own ETag and are computed (here: hit the failing stub)
+    assert client.get('/predict/AAA/forecast', params={'steps': 6}).status_code == 500
+
+
+def test_latest_etag_changes_with_model(client, stub_server):
+    first = client.get('/predict/AAA/latest')
+    assert first.status_code == 200 and first.json()['coin'] == 'AAA'
+    assert client.get('/predict/AAA/latest', headers={'If-None-Match': first.headers['etag']}).status_code == 304
+
+    app_module.predictor.registry.register('AAA', *fit_pair(LinearRegression(), seed=1))
+    swapped = client.get('/predict/AAA/latest', headers={'If-None-Match': first.headers['etag']})
+    assert swapped.status_code == 200 and swapped.headers['etag'] != first.headers['etag']
+
+
+def test_unseeded_monte_carlo_is_not_cached(client, stub_server):
+    response = client.get('/predict/AAA/forecast', params={'steps': 3, 'mode': 'monte_carlo', 'paths': 20})
+    assert response.status_code == 200
+    assert 'etag' not in response.headers and response.headers['cache-control'] == 'no-store'
+    seeded = client.get('/predict/AAA/forecast', params={'steps': 3, 'mode': 'monte_carlo', 'paths': 20, 'seed': 1})
+    assert 'etag' in seeded.headers
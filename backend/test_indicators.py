@@ -0,0 +1,73 @@
+import sys
+import os
+
+import numpy as np
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import pytest
+
+from indicators import FEATURE_COLS, IndicatorEngine, compute_features, feature_frame, latest_feature_row
+from predictor import Predictor
+from testing import make_ohlcv, pandas_features
+
+
+def assert_features_close(actual, expected):
+    # NaN in exactly the same places, values equal up to floating-point error
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6, equal_nan=True)
+
+
+@pytest.mark.parametrize("rows", [1, 2, 13, 14, 15, 20, 27, 300, 20000])
+def test_kernel_matches_pandas(rows):
+    df = make_ohlcv(rows, seed=rows)
+    expected = pandas_features(df)[FEATURE_COLS].to_numpy(dtype=float)
+
+    assert_features_close(feature_frame(df)[FEATURE_COLS].to_numpy(dtype=float), expected)
+    assert_features_close(latest_feature_row(df), expected[-1])
+
+
+def test_kernel_matches_pandas_on_flat_prices():
+    # Flat stretches give zero gains/losses (RSI NaN or 100) and zero true ranges
+    df = make_ohlcv(120, seed=4)
+    df.loc[40:80, ['high', 'low', 'close']] = 30000.0
+    df.loc[90:, ['high', 'low', 'close']] = np.repeat(np.linspace(30000, 30500, 30)[:, None], 3, axis=1)
+    expected = pandas_features(df)[FEATURE_COLS].to_numpy(dtype=float)
+
+    arrays = [df[name].to_numpy(dtype=float) for name in ['high', 'low', 'close', 'volume']]
+    assert_features_close(compute_features(*arrays), expected)
+    for end in [60, 81, 100, 120]:
+        assert_features_close(latest_feature_row(df.iloc[:end]), expected[end - 1])
+
+
+def test_engine_matches_prepare_features():
+    df = make_ohlcv()
+    df_proc, feature_cols = Predictor()._prepare_features(df)
+
+    engine = IndicatorEngine()
+    for i, row in enumerate(df.itertuples()):
+        engine.update(row.high, row.low, row.close, row.volume)
+        if i < 30:
+            continue
+        expected = df_proc[feature_cols].iloc[i].to_numpy(dtype=float)
+        np.testing.assert_allclose(engine.feature_vector(), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_engine_after_flat_appends():
+    # Forecast rows have high == low == close; the engine must keep tracking
+    df = make_ohlcv(seed=1)
+    engine = IndicatorEngine.from_frame(df)
+    for price in [30100.0, 30100.0, 30050.0, 30200.0] * 10:
+        engine.update(price, price, price, float(df['volume'].iloc[-1]))
+        df.loc[len(df)] = [df['open_time'].iloc[-1], price, price, price, price, df['volume'].iloc[-1]]
+
+    df_proc, _ = Predictor()._prepare_features(df)
+    expected = df_proc[FEATURE_COLS].iloc[-1].to_numpy(dtype=float)
+    np.testing.assert_allclose(engine.feature_vector(), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_engine_not_ready_on_short_history():
+    engine = IndicatorEngine.from_frame(make_ohlcv(rows=10))
+    assert not engine.ready
+    assert np.isnan(engine.features()['SMA_20'])
@@ -0,0 +1,146 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from market_cache import OHLCVCache, next_candle_close
+from predictor import Predictor
+from testing import FakeClock, fit_pair, make_ohlcv
+
+
+def test_entry_expires_at_candle_close():
+    clock = FakeClock(3600 * 10 + 1800)
+    cache = OHLCVCache(clock=clock)
+    calls = []
+    fetch = lambda: calls.append(1) or make_ohlcv(30)
+
+    cache.get('BTCUSDT', '1h', fetch)
+    clock.now = 3600 * 11 - 1
+    cache.get('BTCUSDT', '1h', fetch)
+    assert len(calls) == 1
+
+    clock.now = 3600 * 11
+    cache.get('BTCUSDT', '1h', fetch)
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+    assert next_candle_close(3600 * 11, '1h') == 3600 * 12
+
+
+def test_failures_are_not_cached():
+    cache = OHLCVCache()
+    calls = []
+    fetch = lambda: calls.append(1) or pd.DataFrame()
+    assert cache.get('BTCUSDT', '1h', fetch).empty
+    assert cache.get('BTCUSDT', '1h', fetch).empty
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = OHLCVCache()
+    calls = []
+    release = threading.Event()
+
+    def slow_fetch():
+        calls.append(1)
+        release.wait(5)
+        return make_ohlcv(30)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('ETHUSDT', '1h', slow_fetch)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    while cache.stats()['waits'] < 7:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+
+
+def test_forecast_fetches_once():
+    p = Predictor()
+    p.registry.register('BTC', *fit_pair(LinearRegression()))
+    calls = []
+    p._fetch_binance_data = lambda coin: calls.append(coin) or make_ohlcv(300)
+    forecast = p.predict_forecast('BTC', steps=3)
+    assert len(forecast['forecast']) == 3
+    p.get_latest_features('BTC')
+    p.predict_forecast('BTC', steps=5)
+    assert calls == ['BTC']
+
+
+def test_async_concurrent_misses_share_one_fetch():
+    cache = OHLCVCache()
+    calls = []
+
+    async def slow_fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return make_ohlcv(30)
+
+    async def main():
+        return await asyncio.gather(*[cache.aget('BNBUSDT', '1h', slow_fetch) for _ in range(5)])
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.get('BNBUSDT', '1h', slow_fetch) is results[0]
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache = OHLCVCache()
+    calls = []
+
+    async def hanging_fetch():
+        calls.append('leader')
+        await asyncio.sleep(3600)
+
+    async def fetch():
+        calls.append('waiter')
+        return make_ohlcv(30)
+
+    async def main():
+        leader = asyncio.create_task(cache.aget('SOLUSDT', '1h', hanging_fetch))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.aget('SOLUSDT', '1h', fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    results = asyncio.run(main())
+    # One waiter took over the fetch, the other shared its result
+    assert calls == ['leader', 'waiter']
+    assert results[0] is results[1] and len(results[0]) == 30
+
+
+def test_failed_leader_passes_its_error_to_waiters():
+    cache = OHLCVCache()
+
+    async def failing_fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*[cache.aget('SOLUSDT', '1h', failing_fetch) for _ in range(3)],
+                                    return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert cache.stats()['misses'] == 1 and cache.stats()['waits'] == 2
@@ -0,0 +1,70 @@
+import sys
+import os
+import asyncio
+import re
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from metrics import UPSTREAM_FAILURES, Histogram, RequestMetricsMiddleware, stage
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+def sample(text: str, name: str) -> float:
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_cover_forecast_stages_and_cache(client, stub_server):
+    before = client.get('/metrics').text
+    assert client.get('/predict/AAA/forecast', params={'steps': 5}).status_code == 200
+    after = client.get('/metrics')
+    assert after.headers['content-type'].startswith('text/plain')
+    text = after.text
+
+    for name in ['binance_fetch', 'features', 'forecast_loop', 'serialize']:
+        series = f'prediction_stage_duration_seconds_count{{stage="{name}"}}'
+        assert sample(text, series) > sample(before, series)
+    route = 'http_request_duration_seconds_count{method="GET",route="/predict/{coin}/forecast",status="200"}'
+    assert sample(text, route) == sample(before, route) + 1
+    miss = 'market_cache_requests_total{result="miss"}'
+    assert sample(text, miss) == sample(before, miss) + 1
+
+
+def test_upstream_failures_are_counted(client, stub_server, monkeypatch):
+    monkeypatch.setattr(app_module, "CRYPTOCOMPARE_API_URL", app_module.CRYPTOCOMPARE_API_URL + "/down")
+    failures = UPSTREAM_FAILURES.value(upstream="cryptocompare")
+    assert client.get('/news/btc').json()['news'] == []
+    # Coin category and the generic fallback both failed
+    assert UPSTREAM_FAILURES.value(upstream="cryptocompare") == failures + 2
+
+
+def test_slow_request_log_has_stage_breakdown(capsys):
+    async def endpoint(scope, receive, send):
+        with stage("binance_fetch"):
+            await asyncio.sleep(0.02)
+        with stage("features"):
+            pass
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    middleware = RequestMetricsMiddleware(endpoint, slow_ms=10)
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/slow"}, None, send))
+    out = capsys.readouterr().out
+    assert re.search(r"Slow request GET /slow 200 [\d.]+ms: binance_fetch=[\d.]+ms features=[\d.]+ms", out)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test", ["kind"], buckets=[0.1, 1.0])
+    for value in [0.05, 0.5, 5.0]:
+        histogram.observe(value, kind="a")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{kind="a"} 3' in lines
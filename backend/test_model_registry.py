@@ -0,0 +1,92 @@
+import sys
+import os
+import subprocess
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from model_registry import COMPACT_JSON, COMPACT_NPZ, ModelRegistry, fuse_linear, save_compact
+from testing import fit_pair, random_features
+
+
+def write_pickles(models_dir, coin, seed=0):
+    coin_dir = os.path.join(models_dir, coin)
+    os.makedirs(coin_dir, exist_ok=True)
+    model, scaler = fit_pair(LinearRegression(), seed)
+    joblib.dump(model, os.path.join(coin_dir, 'LinearRegression_model.pkl'))
+    joblib.dump(scaler, os.path.join(coin_dir, 'scaler.pkl'))
+    return model, scaler
+
+
+def bump_mtime(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + int(seconds * 1e9)))
+
+
+def test_preload_and_hot_reload(tmp_path):
+    models_dir = str(tmp_path)
+    model, scaler = write_pickles(models_dir, 'AAA')
+    registry = ModelRegistry(models_dir)
+    assert list(registry.preload()) == ['AAA']
+
+    X = random_features(10)
+    old = registry.get('AAA')
+    np.testing.assert_allclose(old.predict(X), model.predict(scaler.transform(X)), rtol=1e-9)
+    assert registry.reload_changed() == []
+
+    # A retrained model and a new coin are picked up; the old version stays usable
+    new_model, new_scaler = write_pickles(models_dir, 'AAA', seed=1)
+    bump_mtime(os.path.join(models_dir, 'AAA', 'scaler.pkl'), 1)
+    write_pickles(models_dir, 'BBB')
+    assert registry.reload_changed() == ['AAA', 'BBB']
+    assert registry.get('AAA').version != old.version
+    np.testing.assert_allclose(registry.get('AAA').predict(X), new_model.predict(new_scaler.transform(X)), rtol=1e-9)
+    np.testing.assert_allclose(old.predict(X), model.predict(scaler.transform(X)), rtol=1e-9)
+
+    # A broken upload keeps the current version in service
+    current = registry.get('AAA')
+    with open(os.path.join(models_dir, 'AAA', 'scaler.pkl'), 'w') as f:
+        f.write('version https://git-lfs.github.com/spec/v1\n')
+    assert registry.reload_changed() == []
+    assert registry.get('AAA') is current
+    assert 'AAA' in registry.errors
+
+
+@pytest.mark.parametrize("name", [COMPACT_NPZ, COMPACT_JSON])
+def test_compact_coefficients_match_pickles(tmp_path, name):
+    models_dir = str(tmp_path)
+    model, scaler = write_pickles(models_dir, 'AAA')
+    save_compact(os.path.join(models_dir, 'AAA', name), *fuse_linear(model, scaler))
+
+    version = ModelRegistry(models_dir).get('AAA')
+    assert version.source == name and version.model is None
+    X = random_features(10)
+    np.testing.assert_allclose(version.predict(X), model.predict(scaler.transform(X)), rtol=1e-9)
+
+    # Pickles retrained after the export take precedence over stale coefficients
+    bump_mtime(os.path.join(models_dir, 'AAA', 'scaler.pkl'), 10)
+    assert ModelRegistry(models_dir).get('AAA').source == 'pickle'
+
+
+def test_compact_load_does_not_import_sklearn(tmp_path):
+    models_dir = str(tmp_path)
+    os.makedirs(os.path.join(models_dir, 'AAA'))
+    save_compact(os.path.join(models_dir, 'AAA', COMPACT_NPZ), np.ones(15), 1.0)
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from model_registry import ModelRegistry\n"
+        "ModelRegistry(%r).get('AAA')\n"
+        "assert 'sklearn' not in sys.modules\n"
+    ) % (current_dir, models_dir)
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_missing_coin_raises_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ModelRegistry(str(tmp_path)).get('ZZZ')
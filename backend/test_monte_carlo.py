@@ -0,0 +1,103 @@
+import sys
+import os
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from indicators import FEATURE_COLS, BatchIndicatorEngine, IndicatorEngine, feature_frame
+from monte_carlo import calibrate, max_paths, percentile_bands, simulate_paths
+from predictor import Predictor
+from testing import make_ohlcv
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+def offline_predictor(coin: str = "MCTEST") -> Predictor:
+    """Predictor on synthetic candles with a linear model fitted to them (next close from features)."""
+    df = make_ohlcv(500)
+    frame = feature_frame(df).dropna()
+    X, y = frame[FEATURE_COLS].to_numpy()[:-1], frame['close'].to_numpy()[1:]
+    scaler = StandardScaler().fit(X)
+    predictor = Predictor()
+    predictor.registry.register(coin, LinearRegression().fit(scaler.transform(X), y), scaler)
+    predictor._fetch_binance_data = lambda c: df
+    return predictor
+
+
+def test_batch_engine_matches_single_engines():
+    df = make_ohlcv(seed=2)
+    paths = 4
+    engines = [IndicatorEngine.from_frame(df) for _ in range(paths)]
+    batch = BatchIndicatorEngine(IndicatorEngine.from_frame(df), paths)
+
+    rng = np.random.default_rng(3)
+    close = np.full(paths, float(df['close'].iloc[-1]))
+    for _ in range(40):
+        close = close + rng.normal(0, 150, paths)
+        spread = np.abs(rng.normal(0, 80, paths))
+        volume = rng.uniform(100, 1000, paths)
+        batch.update(close + spread, close - spread, close, volume)
+        for i, engine in enumerate(engines):
+            engine.update(float(close[i] + spread[i]), float(close[i] - spread[i]), float(close[i]), float(volume[i]))
+
+        expected = np.vstack([engine.feature_vector() for engine in engines])
+        np.testing.assert_allclose(batch.feature_matrix(), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_zero_noise_paths_follow_the_deterministic_forecast():
+    predictor = offline_predictor()
+    df = predictor._fetch_binance_data("MCTEST")
+    version = predictor.registry.get("MCTEST")
+    engine = IndicatorEngine.from_frame(df.tail(200).reset_index(drop=True))
+
+    simulated = simulate_paths(engine, version.predict, 24, 5, residuals=np.zeros(1), ranges=np.zeros(1),
+                               volumes=df['volume'].to_numpy()[-1:], rng=np.random.default_rng(0))
+    expected = [step["price"] for step in predictor.predict_forecast("MCTEST", steps=24)["forecast"]]
+    for path in simulated:
+        np.testing.assert_allclose(path, expected, rtol=1e-9)
+
+
+def test_calibrated_noise_and_bands():
+    predictor = offline_predictor()
+    df = predictor._fetch_binance_data("MCTEST")
+    noise = calibrate(df, predictor.registry.get("MCTEST").predict)
+    assert len(noise["residuals"]) > 400 and np.isfinite(noise["residuals"]).all()
+    assert (noise["ranges"] >= 0).all()
+
+    result = predictor.predict_forecast_mc("MCTEST", steps=12, paths=500, seed=1)
+    assert result["paths"] == 500
+    assert len(result["forecast"]) == len(result["bands"]) == 12
+    for band in result["bands"]:
+        assert band["p5"] <= band["p50"] <= band["p95"]
+    # Fixed seed, same result
+    assert predictor.predict_forecast_mc("MCTEST", steps=12, paths=500, seed=1)["bands"] == result["bands"]
+
+
+def test_negative_steps_give_an_empty_forecast():
+    predictor = offline_predictor()
+    assert predictor.predict_forecast("MCTEST", steps=-3)["forecast"] == []
+    result = predictor.predict_forecast_mc("MCTEST", steps=-3, paths=50, seed=1)
+    assert result["forecast"] == result["bands"] == []
+
+
+def test_percentile_bands_names():
+    bands = percentile_bands(np.arange(100.0).reshape(100, 1), (5, 50, 97.5))
+    assert list(bands) == ["p5", "p50", "p97.5"]
+    np.testing.assert_allclose(bands["p50"], [49.5])
+
+
+def test_forecast_endpoint_monte_carlo_mode(client, stub_server):
+    response = client.get('/predict/AAA/forecast', params={'steps': 6, 'mode': 'monte_carlo', 'paths': 50000, 'seed': 7})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["paths"] == 10000
+    assert [set(band) for band in body["bands"]] == [{"time", "p5", "p50", "p95"}] * 6
+    assert client.get('/predict/AAA/forecast', params={'mode': 'bogus'}).status_code == 400
+
+    # Long horizons get fewer paths, so one request cannot simulate 10,000 x 168 candles
+    long = client.get('/predict/AAA/forecast', params={'steps': 168, 'mode': 'monte_carlo', 'paths': 10000, 'seed': 7})
+    assert long.json()["paths"] == max_paths(168) < 10000
@@ -0,0 +1,117 @@
+import sys
+import os
+import asyncio
+
+import pytest
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from news_cache import NewsCache
+from testing import FakeClock
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+class CountingFetch:
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [self.calls]
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def run():
+        cache = NewsCache(clock=FakeClock(0))
+        fetch = CountingFetch(delay=0.01)
+        results = await asyncio.gather(*[cache.get("BTC", fetch) for _ in range(5)])
+        assert fetch.calls == 1
+        assert results == [([1], True)] * 5
+        assert cache.stats()["waits"] == 4
+    asyncio.run(run())
+
+
+def test_stale_entry_served_while_one_refresh_runs():
+    async def run():
+        clock = FakeClock(0)
+        cache = NewsCache(ttl=10, stale_ttl=100, clock=clock)
+        fetch = CountingFetch(delay=0.01)
+        assert await cache.get("BTC", fetch) == ([1], True)
+
+        clock.now = 15
+        # Both callers get the stale value immediately; only one refresh starts
+        assert await cache.get("BTC", fetch) == ([1], False)
+        assert await cache.get("BTC", fetch) == ([1], False)
+        await asyncio.sleep(0.05)
+        assert fetch.calls == 2
+        assert await cache.get("BTC", fetch) == ([2], False)
+
+        # A failed refresh keeps serving the stale value
+        clock.now = 40
+        fetch.fail = True
+        assert await cache.get("BTC", fetch) == ([2], False)
+        await asyncio.sleep(0.05)
+        assert cache.stats()["refresh_errors"] == 1
+        assert await cache.get("BTC", fetch) == ([2], False)
+
+        # Too old to serve: fetched again and the error reaches the caller
+        clock.now = 200
+        with pytest.raises(RuntimeError):
+            await cache.get("BTC", fetch)
+    asyncio.run(run())
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def run():
+        cache = NewsCache(max_entries=2, clock=FakeClock(0))
+        fetch = CountingFetch()
+        await cache.get("A", fetch)
+        await cache.get("B", fetch)
+        await cache.get("A", fetch)
+        await cache.get("C", fetch)
+        assert len(cache) == 2
+        assert (await cache.get("A", fetch))[1] is False
+        assert (await cache.get("B", fetch))[1] is True
+    asyncio.run(run())
+
+
+def test_coins_without_news_share_the_fallback_entry(client, stub_server):
+    for coin in ["xyz", "abc", "xyz"]:
+        news = client.get(f'/news/{coin}').json()['news']
+        assert [item['id'] for item in news] == [2]
+    # xyz, abc and the fallback categories once each
+    assert stub_server.hits.count('/data/v2/news/') == 3
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    async def run():
+        cache = NewsCache(clock=FakeClock(0))
+        calls = []
+
+        async def hanging_fetch():
+            calls.append("leader")
+            await asyncio.sleep(3600)
+
+        async def fetch():
+            calls.append("waiter")
+            return ["news"]
+
+        leader = asyncio.create_task(cache.get("BTC", hanging_fetch))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get("BTC", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # One waiter took over the fetch, the other got its result
+        assert calls == ["leader", "waiter"]
+        assert [value for value, _ in results] == [["news"]] * 2
+    asyncio.run(run())
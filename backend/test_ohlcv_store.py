@@ -0,0 +1,95 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from ohlcv_store import OHLCVStore, SeriesWriter, frame_to_columns
+from predictor import Predictor
+from testing import make_ohlcv
+
+
+def test_write_append_and_read_back(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    df = make_ohlcv(100)
+
+    assert store.write('BTCUSDT', '1h', df.iloc[:60]) == 60
+    # Overlapping rows are dropped at the open_time boundary
+    assert store.append('BTCUSDT', '1h', frame_to_columns(df.iloc[50:])) == 40
+    assert store.count('BTCUSDT', '1h') == 100
+
+    tail = store.tail('BTCUSDT', '1h', 5)
+    np.testing.assert_array_equal(tail['close'].to_numpy(), df['close'].to_numpy()[-5:])
+    assert (tail['open_time'].to_numpy() == df['open_time'].to_numpy()[-5:]).all()
+
+    window = store.range('BTCUSDT', '1h', df['open_time'][10], df['open_time'][20])
+    assert len(window) == 10
+    assert window['open_time'].iloc[0] == df['open_time'][10]
+    assert store.last_open_time('BTCUSDT', '1h') == int(df['open_time'].iloc[-1].timestamp() * 1000)
+
+
+def test_torn_append_is_invisible(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    df = make_ohlcv(30)
+    store.write('ETHUSDT', '1h', df.iloc[:20])
+
+    # Simulate a crash after writing part of one column but before the commit
+    with open(os.path.join(store.data_path('ETHUSDT', '1h'), 'close.bin'), 'ab') as f:
+        f.write(b'\x00' * 12)
+    assert store.count('ETHUSDT', '1h') == 20
+    assert store.tail('ETHUSDT', '1h', 1)['close'].iloc[0] == df['close'].iloc[19]
+
+    store.append('ETHUSDT', '1h', frame_to_columns(df.iloc[20:]))
+    np.testing.assert_array_equal(store.tail('ETHUSDT', '1h', 30)['close'].to_numpy(), df['close'].to_numpy())
+
+
+def test_replace_keeps_the_series_readable(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    old, new = make_ohlcv(40, seed=1), make_ohlcv(50, seed=2)
+    store.write('BTCUSDT', '1h', old)
+    old_view = store.tail('BTCUSDT', '1h', 40)
+    old_data = store.data_path('BTCUSDT', '1h')
+
+    writer = SeriesWriter(store, 'BTCUSDT', '1h', replace=True)
+    writer.append(frame_to_columns(new))
+    # Staged pages are invisible until the commit
+    assert store.count('BTCUSDT', '1h') == 40
+    writer.commit()
+    assert store.count('BTCUSDT', '1h') == 50
+    np.testing.assert_array_equal(store.tail('BTCUSDT', '1h', 50)['close'].to_numpy(), new['close'].to_numpy())
+    # The superseded generation stays until the next replace
+    assert os.path.exists(old_data)
+    np.testing.assert_array_equal(old_view['close'].to_numpy(), old['close'].to_numpy())
+
+    store.write('BTCUSDT', '1h', old)
+    assert not os.path.exists(old_data)
+    assert len([name for name in os.listdir(store.path('BTCUSDT', '1h')) if name.startswith('gen-')]) == 2
+
+
+def test_truncate_and_append_never_shrink_column_files(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    df = make_ohlcv(30)
+    store.write('ETHUSDT', '1h', df)
+    close_path = os.path.join(store.data_path('ETHUSDT', '1h'), 'close.bin')
+    size = os.path.getsize(close_path)
+
+    store.truncate('ETHUSDT', '1h', 10)
+    store.append('ETHUSDT', '1h', frame_to_columns(df.iloc[10:15]))
+    assert store.count('ETHUSDT', '1h') == 15
+    assert os.path.getsize(close_path) == size
+    np.testing.assert_array_equal(store.tail('ETHUSDT', '1h', 15)['close'].to_numpy(), df['close'].to_numpy()[:15])
+
+
+def test_predictor_falls_back_to_store(tmp_path):
+    p = Predictor()
+    p.store = OHLCVStore(str(tmp_path))
+    p.store.write('BTCUSDT', '1h', make_ohlcv(800))
+    p._fetch_binance_data = lambda coin: pd.DataFrame()
+
+    df = p._get_market_data('BTC')
+    assert len(df) == 500
+    assert p.get_latest_features('BTC')['SMA_20'] > 0
@@ -0,0 +1,126 @@
+import sys
+import os
+import asyncio
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from ohlcv_store import OHLCVStore
+from precompute import PrecomputeScheduler
+from predictor import Predictor
+from testing import FakeClock, fit_pair, make_ohlcv
+
+
+def make_predictor() -> Predictor:
+    p = Predictor()
+    p.registry.register('AAA', *fit_pair(LinearRegression()))
+
+    async def fetch(coin):
+        return make_ohlcv(500)
+    p._fetch_binance_data_async = fetch
+    return p
+
+
+def test_refresh_publishes_snapshot_until_candle_close():
+    clock = FakeClock(3600 * 100 + 10)
+    p = make_predictor()
+    scheduler = PrecomputeScheduler(p, coins=['AAA', 'ZZZ'], clock=clock)
+    assert scheduler.get('AAA') is None
+
+    snapshot = asyncio.run(scheduler.refresh())
+    assert list(snapshot.coins) == ['AAA']
+    assert 'ZZZ' in snapshot.errors
+    with pytest.raises(TypeError):
+        snapshot.coins['AAA']['predicted_price'] = 0.0
+
+    entry = scheduler.get('AAA')
+    assert len(entry['forecast']['forecast']) == 24
+    assert entry['predicted_price'] == pytest.approx(p.predict('AAA', entry['features']))
+
+    clock.now += 60
+    assert scheduler.age() == pytest.approx(60)
+    # Next candle: the snapshot is stale and handlers must compute on demand
+    clock.now = 3600 * 101
+    assert scheduler.get('AAA') is None
+    assert not scheduler.status()['fresh']
+
+
+def test_handlers_serve_snapshot_without_computing(monkeypatch):
+    scheduler = PrecomputeScheduler(make_predictor(), coins=['AAA'])
+    asyncio.run(scheduler.refresh())
+    monkeypatch.setattr(app_module, 'precompute', scheduler)
+    monkeypatch.setattr(app_module, 'PRECOMPUTE', False)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("should be served from the snapshot")
+    monkeypatch.setattr(app_module.predictor, 'get_latest_features_async', fail)
+    monkeypatch.setattr(app_module.predictor, 'predict_forecast_async', fail)
+
+    client = TestClient(app_module.app)
+    latest = client.get('/predict/AAA/latest')
+    assert latest.status_code == 200
+    assert 'X-Snapshot-Age' in latest.headers
+    assert latest.json()['predicted_price'] == round(scheduler.get('AAA')['predicted_price'], 2)
+
+    forecast = client.get('/predict/AAA/forecast').json()
+    assert forecast['forecast'] == scheduler.get('AAA')['forecast']['forecast']
+    assert client.get('/health').json()['snapshot']['coins'] == ['AAA']
+
+
+def test_fallback_data_is_not_published(tmp_path):
+    p = make_predictor()
+
+    async def unreachable(coin):
+        return pd.DataFrame()
+    p._fetch_binance_data_async = unreachable
+    p.store = OHLCVStore(str(tmp_path))
+    p.store.write('AAAUSDT', '1h', make_ohlcv(500))
+
+    scheduler = PrecomputeScheduler(p, coins=['AAA'])
+    snapshot = asyncio.run(scheduler.refresh())
+    assert not snapshot.coins
+    assert 'Binance unreachable' in snapshot.errors['AAA']
+    assert scheduler.get('AAA') is None
+    assert 'AAA' in scheduler.status()['last_error']
+
+
+def test_refreshes_run_one_at_a_time_and_stop_cancels_extra_ones():
+    scheduler = PrecomputeScheduler(make_predictor(), coins=['AAA'])
+    running, overlaps, models = [0], [], iter(['old', 'new'])
+
+    async def compute(coin):
+        running[0] += 1
+        overlaps.append(running[0])
+        model = next(models)
+        await asyncio.sleep(0.05 if model == 'old' else 0.01)
+        running[0] -= 1
+        return {"model": model}
+
+    scheduler.compute = compute
+
+    async def main():
+        scheduled = scheduler.refresh()
+        await asyncio.sleep(0)
+        # Started while the scheduled refresh still computes with the old model
+        swapped = scheduler.refresh_soon()
+        await asyncio.gather(scheduled, swapped)
+        assert not scheduler._pending
+
+        blocked = asyncio.Event()
+        scheduler.compute = lambda coin: blocked.wait()
+        task = scheduler.refresh_soon()
+        await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return task
+
+    task = asyncio.run(main())
+    assert overlaps == [1, 1]
+    assert scheduler.snapshot.coins['AAA']['model'] == 'new'
+    assert task.cancelled() and not scheduler._pending
@@ -0,0 +1,118 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from ohlcv_store import frame_to_columns
+from rollup import Rollup, RollupEngine, bucket_starts, resample_frame, rollup
+from testing import make_ohlcv
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def expected(df: pd.DataFrame, starts: pd.Series) -> pd.DataFrame:
+    grouped = df.groupby(starts.rename('start')).agg(AGG).reset_index()
+    return grouped.rename(columns={'start': 'open_time'})
+
+
+@pytest.mark.parametrize("interval,freq", [("4h", "4h"), ("1d", "D")])
+def test_rollup_matches_pandas(interval, freq):
+    df = make_ohlcv(1000)
+    df['open_time'] = df['open_time'] + pd.Timedelta(hours=3)
+    result = resample_frame(df, interval)
+    pd.testing.assert_frame_equal(result, expected(df, df['open_time'].dt.floor(freq)), check_dtype=False)
+
+
+def test_weeks_open_on_monday():
+    df = make_ohlcv(24 * 30)
+    result = resample_frame(df, "1w")
+    weeks = df['open_time'].dt.to_period('W-SUN').dt.start_time
+    pd.testing.assert_frame_equal(result, expected(df, weeks), check_dtype=False)
+    assert (result['open_time'].dt.dayofweek == 0).all()
+
+    years = bucket_starts(np.array([pd.Timestamp('2024-12-31 23:00').value // 1_000_000]), "1y")
+    assert pd.Timestamp(years[0], unit='ms') == pd.Timestamp('2024-01-01')
+
+
+def test_incremental_updates_match_a_full_rollup():
+    market = frame_to_columns(make_ohlcv(600))
+    series = Rollup("4h", max_rows=1000)
+    # A sliding 500-candle window, one hour at a time; the newest candle is
+    # first seen while still open (close not final yet)
+    for end in range(500, 601):
+        window = {name: values[end - 500:end].copy() for name, values in market.items()}
+        if end < 600:
+            window['close'][-1] = -1.0
+        series.update(window)
+    full = rollup({name: values[-500:] for name, values in market.items()}, "4h")
+    for name in full:
+        np.testing.assert_array_equal(series.columns[name][-len(full[name]) + 1:], full[name][1:])
+    assert series.update({name: values[-10:] for name, values in market.items()}) is True
+    assert series.update({name: values[:10] for name, values in market.items()}) is False
+
+
+def test_engine_seeds_from_history_and_reuses_frames():
+    df = make_ohlcv(2000)
+    engine = RollupEngine(max_rows=100)
+    loads = []
+
+    def history(rows):
+        loads.append(rows)
+        return df.iloc[:-500].tail(rows)
+
+    first = engine.get('BTCUSDT', '1d', df.tail(500), history)
+    pd.testing.assert_frame_equal(first, resample_frame(df, '1d').tail(100).reset_index(drop=True))
+    assert loads == [100 * 24]
+    assert engine.get('BTCUSDT', '1d', df.tail(500), history) is first
+    assert engine.updates == 1
+    assert engine.get('BTCUSDT', '1h', df, history) is df
+
+
+def test_interval_parameter_on_endpoints(client):
+    app_module.predictor.rollups.clear()
+    forecast = client.get('/predict/AAA/forecast', params={'steps': 3, 'interval': '4h', 'format': 'columnar'})
+    assert forecast.status_code == 200
+    body = forecast.json()
+    assert np.diff(body['history']['time']).tolist() == [4 * 3600 * 1000] * 23
+    assert np.diff([body['history']['time'][-1]] + body['forecast']['time']).tolist() == [4 * 3600 * 1000] * 3
+    assert forecast.headers['etag'] != client.get('/predict/AAA/forecast', params={'steps': 3}).headers['etag']
+
+    history = client.get('/history/AAA', params={'interval': '1d', 'limit': 5}).json()
+    assert [candle['time'][11:] for candle in history['candles']] == ['00:00:00'] * 5
+    assert client.get('/predict/AAA/latest', params={'interval': '4h'}).status_code == 200
+    assert client.get('/history/AAA', params={'interval': '5m'}).status_code == 400
+
+
+def test_engine_reseeds_across_missing_candles():
+    df = make_ohlcv(3000)
+    engine = RollupEngine(max_rows=1000)
+
+    def history(rows):
+        return df.iloc[:1500].tail(rows)
+
+    # The store ends where the live window starts
+    first = engine.get('BTCUSDT', '4h', df.iloc[1500:2000], history)
+    pd.testing.assert_frame_equal(first, resample_frame(df.iloc[:2000], '4h').tail(1000).reset_index(drop=True))
+    assert engine.reseeds == 0
+
+    # 500 hours went by unseen and the store did not catch up: the window alone is used
+    later = engine.get('BTCUSDT', '4h', df.iloc[2500:3000], history)
+    pd.testing.assert_frame_equal(later, resample_frame(df.iloc[2500:3000], '4h'))
+    assert engine.reseeds == 2
+
+
+def test_too_few_rolled_up_candles_are_rejected(client):
+    app_module.predictor.rollups.clear()
+    # 500 live hours give 3 weekly candles, too few for the features
+    assert client.get('/predict/AAA/latest', params={'interval': '1w'}).status_code == 503
+    assert client.get('/predict/AAA/forecast', params={'interval': '1w'}).status_code == 503
+    assert client.get('/predict/AAA/forecast', params={'interval': '1w', 'mode': 'monte_carlo'}).status_code == 503
+    assert client.get('/predict/AAA/latest', params={'interval': '4h'}).status_code == 200
@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from sentiment import SentimentEngine
+
+
+def test_whole_words_and_inflections():
+    engine = SentimentEngine()
+    # "ban" in "urban", "bull" in "bullish" style substrings no longer count
+    assert engine.score("Urban planners discuss suburban transit") == ("Neutral", 50)
+    assert engine.score("Exchange HACKED as prices plunged") == ("Bearish", 10)
+    assert engine.score("Bitcoin surged to a record") == ("Bullish", 90)
+
+
+def test_multiword_keyword_counts_contained_keywords():
+    engine = SentimentEngine()
+    # "all-time high" also counts "high", as the substring matcher did
+    assert engine.score("BTC reaches an all-time high") == ("Bullish", 80)
+    assert engine.score("high high high") == ("Bullish", 70)
+
+
+def test_batch_matches_single_scores_and_memoizes_by_id():
+    engine = SentimentEngine()
+    articles = [
+        {"id": 1, "title": "ETF approval sparks rally", "body": "Record inflows"},
+        {"id": 2, "title": "Exchange hack", "body": None},
+        {"id": None, "title": "Quiet day", "body": "nothing"},
+        # A keyword split across two articles must not match
+        {"id": 3, "title": "all-time", "body": ""},
+        {"id": 4, "title": "high", "body": ""},
+    ]
+    results = engine.score_articles(articles)
+    expected = [engine.score(f"{a['title']} {a['body'] or ''}") for a in articles]
+    assert results == expected
+    assert results[3] == ("Neutral", 50)
+
+    engine.score_articles(articles)
+    assert engine.hits == 4 and engine.misses == 6
+
+    small = SentimentEngine(memo_size=2)
+    small.score_articles(articles)
+    assert len(small._memo) == 2
+
+
+def test_batch_offsets_survive_lowercasing_that_changes_length():
+    engine = SentimentEngine()
+    # "İ".lower() is two code points, pushing "rally" past the original end of the first text
+    texts = ["İİİİİİ rally", "quiet"]
+    assert engine.score_texts(texts) == [engine.score(text) for text in texts]
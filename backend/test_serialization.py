@@ -0,0 +1,66 @@
+import sys
+import os
+import json
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import serialization
+from predictor import Predictor
+from serialization import dumps, epoch_ms, iso_times, to_points
+from testing import fit_pair, make_ohlcv
+from test_upstream import client, stub_server  # noqa: F401 (fixtures)
+
+
+def test_points_keep_the_original_shape():
+    df = make_ohlcv(300)
+    p = Predictor()
+    p.registry.register('AAA', *fit_pair(LinearRegression()))
+    p._fetch_binance_data = lambda coin: df
+
+    points = p.predict_forecast('AAA', steps=5)
+    last_time = df['open_time'].iloc[-1]
+    assert points['history'] == [{"time": row.open_time.isoformat(), "price": float(row.close)}
+                                 for row in df.tail(24).itertuples()]
+    assert [point['time'] for point in points['forecast']] == \
+        [(last_time + timedelta(hours=i + 1)).isoformat() for i in range(5)]
+
+    columns = p.predict_forecast('AAA', steps=5, columnar=True)
+    assert columns['forecast']['time'].dtype == np.int64
+    assert columns['forecast']['price'].tolist() == [point['price'] for point in points['forecast']]
+    assert to_points(columns) == points
+
+
+def test_iso_times_match_isoformat():
+    times = pd.Series(pd.to_datetime(['2024-01-01 00:00:00', '2024-03-05 17:00:00.250'], format='ISO8601'))
+    assert iso_times(epoch_ms(times)) == [t.isoformat() for t in times]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_encodes_numpy(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    payload = {"time": np.array([1, 2], dtype=np.int64), "price": np.array([1.5, 2.5]), "n": np.float64(3.0)}
+    assert json.loads(dumps(payload)) == {"time": [1, 2], "price": [1.5, 2.5], "n": 3.0}
+
+
+def test_forecast_endpoint_columnar_format(client, stub_server):
+    points = client.get('/predict/AAA/forecast', params={'steps': 4}).json()
+    columnar = client.get('/predict/AAA/forecast', params={'steps': 4, 'format': 'columnar'}).json()
+    assert columnar['forecast']['price'] == [point['price'] for point in points['forecast']]
+    assert all(isinstance(t, int) for t in columnar['history']['time'])
+    assert iso_times(np.array(columnar['forecast']['time'])) == [point['time'] for point in points['forecast']]
+
+    bands = client.get('/predict/AAA/forecast', params={'steps': 4, 'format': 'columnar', 'mode': 'monte_carlo',
+                                                       'paths': 50, 'seed': 1}).json()['bands']
+    assert set(bands) == {'time', 'p5', 'p50', 'p95'} and len(bands['p50']) == 4
+    assert client.get('/predict/AAA/forecast', params={'format': 'csv'}).status_code == 400
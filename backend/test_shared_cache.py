@@ -0,0 +1,180 @@
+import sys
+import os
+import asyncio
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from indicators import FEATURE_COLS, latest_feature_row
+from predictor import Predictor
+from shared_cache import SharedMarketCache, fcntl
+from testing import FakeClock, make_ohlcv
+
+
+def test_reader_sees_published_frame_without_copying(tmp_path):
+    clock = FakeClock(3600 * 10 + 60)
+    writer = SharedMarketCache(str(tmp_path), role="writer", clock=clock)
+    reader = SharedMarketCache(str(tmp_path), role="reader", clock=clock)
+    assert reader.read('BTCUSDT', '1h') is None
+
+    df = make_ohlcv(300)
+    assert writer.publish('BTCUSDT', '1h', df, latest_feature_row(df))
+    assert not reader.publish('BTCUSDT', '1h', df, latest_feature_row(df))
+
+    entry = reader.read('BTCUSDT', '1h')
+    pd.testing.assert_frame_equal(entry.frame, df, check_dtype=False)
+    assert entry.frame['open_time'].dtype == 'datetime64[ms]'
+    np.testing.assert_allclose(entry.features, latest_feature_row(df))
+    assert entry.valid_until == 3600 * 11
+    # Views of the mapping, not copies
+    assert not entry.frame['close'].to_numpy().flags.owndata
+    with pytest.raises(ValueError):
+        entry.frame['close'].to_numpy()[0] = 0.0
+
+    clock.now = 3600 * 11
+    assert reader.read('BTCUSDT', '1h') is None
+    assert reader.stats()['hits'] == 1
+    writer.close()
+    reader.close()
+
+
+def test_reader_never_uses_a_slot_being_overwritten(tmp_path):
+    writer = SharedMarketCache(str(tmp_path), role="writer", clock=lambda: 0.0)
+    reader = SharedMarketCache(str(tmp_path), role="reader", clock=lambda: 0.0)
+    first, second = make_ohlcv(50, seed=1), make_ohlcv(60, seed=2)
+    writer.publish('ETHUSDT', '1h', first, latest_feature_row(first))
+    segment = reader._segment('ETHUSDT', '1h')
+    seq = int(segment.seq[0])
+
+    # A publish in progress leaves the published slot readable
+    writer._segment('ETHUSDT', '1h').seq[0] = seq + 1
+    assert len(segment.read().frame) == 50
+
+    # Once the writer starts on the slot a reader is using, the read is retried
+    writer._segment('ETHUSDT', '1h').seq[0] = seq
+    writer.publish('ETHUSDT', '1h', second, latest_feature_row(second))
+    writer._segment('ETHUSDT', '1h').seq[0] = seq + 3
+    assert len(segment.read().frame) == 60
+    writer.close()
+    reader.close()
+
+
+def test_reader_reopens_a_replaced_file(tmp_path):
+    clock = FakeClock(0.0)
+    reader = SharedMarketCache(str(tmp_path), role="reader", clock=clock)
+    writer = SharedMarketCache(str(tmp_path), role="writer", capacity=100, clock=clock)
+    df = make_ohlcv(150)
+    writer.publish('BTCUSDT', '1h', df, latest_feature_row(df))
+    assert len(reader.read('BTCUSDT', '1h').frame) == 100
+
+    # A writer started later finds no (or an incompatible) file and creates a new one
+    writer.close()
+    os.remove(writer._path('BTCUSDT', '1h'))
+    writer = SharedMarketCache(str(tmp_path), role="writer", capacity=200, clock=clock)
+    clock.now = 3600.0
+    writer.publish('BTCUSDT', '1h', df, latest_feature_row(df))
+    # The reader's mapping of the old file is stale, so it looks for a replacement
+    assert len(reader.read('BTCUSDT', '1h').frame) == 150
+    writer.close()
+    reader.close()
+
+
+def _hold_writer_lock(directory, started, release):
+    cache = SharedMarketCache(directory)
+    started.put(cache.writer)
+    release.wait(10)
+    cache.close()
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl.flock")
+def test_one_process_is_elected_writer(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    started, release = ctx.Queue(), ctx.Event()
+    process = ctx.Process(target=_hold_writer_lock, args=(str(tmp_path), started, release))
+    process.start()
+    try:
+        assert started.get(timeout=30) is True
+        cache = SharedMarketCache(str(tmp_path))
+        assert cache.writer is False
+        cache.close()
+    finally:
+        release.set()
+        process.join(30)
+    # The lock is released with its holder
+    cache = SharedMarketCache(str(tmp_path))
+    assert cache.writer is True
+    cache.close()
+
+
+def test_predictor_reads_klines_published_by_another_worker(tmp_path):
+    writer = Predictor()
+    writer.shared = SharedMarketCache(str(tmp_path), role="writer")
+    df = make_ohlcv(500)
+    writer._fetch_binance_data = lambda coin: df
+    writer._get_market_data('BTC')
+    assert writer.shared.stats()['published'] == 1
+
+    reader = Predictor()
+    reader.shared = SharedMarketCache(str(tmp_path), role="reader")
+    reader._fetch_binance_data = lambda coin: pytest.fail("fetched despite the shared cache")
+    assert len(reader._get_market_data('BTC')) == 500
+    features = reader.get_latest_features('BTC')
+    assert list(features) == FEATURE_COLS
+    np.testing.assert_allclose(list(features.values()), latest_feature_row(df))
+    writer.shared.close()
+    reader.shared.close()
+
+
+def test_reader_waits_for_the_writers_publish(tmp_path):
+    clock = FakeClock(3600 * 10 + 5)
+    writer = SharedMarketCache(str(tmp_path), role="writer", clock=clock)
+    reader = SharedMarketCache(str(tmp_path), role="reader", clock=clock)
+    df = make_ohlcv(300)
+    publisher = threading.Timer(0.2, lambda: writer.publish('BTCUSDT', '1h', df, latest_feature_row(df)))
+    publisher.start()
+    entry = reader.wait('BTCUSDT', '1h', timeout=10)
+    publisher.join()
+    assert entry is not None and len(entry.frame) == 300
+    assert reader.stats()['waits'] == 1 and reader.stats()['timeouts'] == 0
+
+    # A writer that does not publish in time is not waited for again in the same candle
+    started = time.monotonic()
+    assert asyncio.run(reader.wait_async('ETHUSDT', '1h', timeout=0.2)) is None
+    assert reader.wait('ETHUSDT', '1h', timeout=10) is None
+    assert time.monotonic() - started < 5
+    assert reader.stats()['timeouts'] == 1
+    clock.now += 3600
+    assert reader.wait('ETHUSDT', '1h', timeout=0.1) is None
+    assert reader.stats()['timeouts'] == 2
+    writer.close()
+    reader.close()
+
+
+def test_reader_worker_does_not_fetch_while_the_writer_publishes(tmp_path):
+    df = make_ohlcv(500)
+    writer = Predictor()
+    writer.shared = SharedMarketCache(str(tmp_path), role="writer")
+    writer._fetch_binance_data = lambda coin: df
+
+    reader = Predictor()
+    reader.shared = SharedMarketCache(str(tmp_path), role="reader")
+
+    async def fetch(coin):
+        pytest.fail("reader fetched although the writer published")
+
+    reader._fetch_binance_data_async = fetch
+    # Both workers start refreshing at candle close; the writer's fetch lands a little later
+    publisher = threading.Timer(0.2, writer._get_market_data, args=('BTC',))
+    publisher.start()
+    assert len(asyncio.run(reader._get_market_data_async('BTC'))) == 500
+    publisher.join()
+    writer.shared.close()
+    reader.shared.close()
@@ -0,0 +1,104 @@
+import sys
+import os
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import static_assets
+from static_assets import IMMUTABLE_CACHE, StaticIndex, precompress
+
+BUNDLE = b"console.log('crypto sight');\n" * 200
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-3f9a1c.js").write_bytes(BUNDLE)
+    (tmp_path / "index.html").write_bytes(b"<!doctype html><div id=root></div>")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 8)
+    (tmp_path.parent / "secret.txt").write_bytes(b"secret")
+    index = StaticIndex(str(tmp_path))
+    assert index.load() == 3
+
+    app = FastAPI()
+
+    @app.get("/{full_path:path}")
+    async def serve(full_path: str, request: Request):
+        return index.serve(full_path, request.headers)
+
+    return TestClient(app), index
+
+
+def test_hashed_assets_are_compressed_and_immutable(static_client):
+    client, _ = static_client
+    response = client.get("/assets/index-3f9a1c.js", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == BUNDLE  # Decoded by the client
+
+    plain = client.get("/assets/index-3f9a1c.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.content == BUNDLE
+    assert plain.headers["etag"] != response.headers["etag"]
+
+
+def test_spa_fallback_and_not_found(static_client):
+    client, _ = static_client
+    for path in ["/", "/dashboard/btc"]:
+        response = client.get(path)
+        assert response.status_code == 200 and b"id=root" in response.content
+        assert response.headers["cache-control"] == "no-cache"
+    assert client.get("/assets/missing.js").status_code == 404
+    assert client.get("/logo.png").headers["content-type"] == "image/png"
+
+
+def test_traversal_is_rejected_without_filesystem_access(static_client, monkeypatch):
+    _, index = static_client
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError("filesystem accessed")
+    monkeypatch.setattr(static_assets.os.path, "exists", no_disk)
+    monkeypatch.setattr("builtins.open", no_disk)
+    for path in ["../secret.txt", "assets/../../secret.txt", "assets\\..\\x", "a\x00b", "C:/x"]:
+        assert index.serve(path, {}).status_code == 404
+    # Absolute-looking paths are just unknown client routes
+    assert b"id=root" in index.serve("/etc/passwd", {}).body
+    assert index.serve("assets/index-3f9a1c.js", {}).status_code == 200
+
+
+def test_etag_revalidation_and_ranges(static_client):
+    client, _ = static_client
+    first = client.get("/assets/index-3f9a1c.js", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["etag"]
+    assert client.get("/assets/index-3f9a1c.js", headers={"If-None-Match": etag}).status_code == 304
+
+    partial = client.get("/assets/index-3f9a1c.js", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == BUNDLE[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(BUNDLE)}"
+    assert client.get("/assets/index-3f9a1c.js", headers={"Range": "bytes=-5"}).content == BUNDLE[-5:]
+    assert client.get("/assets/index-3f9a1c.js", headers={"Range": f"bytes={len(BUNDLE)}-"}).status_code == 416
+    # A stale If-Range gets the whole file
+    stale = client.get("/assets/index-3f9a1c.js", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert stale.status_code == 200 and stale.content == BUNDLE
+
+
+def test_precompressed_files_are_used(tmp_path):
+    (tmp_path / "assets").mkdir()
+    bundle = tmp_path / "assets" / "app-1.js"
+    bundle.write_bytes(BUNDLE)
+    (tmp_path / "index.html").write_bytes(b"<html></html>")
+    assert str(bundle) + ".gz" in precompress(str(tmp_path))
+
+    index = StaticIndex(str(tmp_path))
+    assert index.load() == 2  # The .gz copy is a variant, not its own asset
+    asset = index.assets["assets/app-1.js"]
+    assert asset.variants["gzip"] == (tmp_path / "assets" / "app-1.js.gz").read_bytes()
+    assert gzip.decompress(asset.variants["gzip"]) == BUNDLE
@@ -0,0 +1,125 @@
+import sys
+import os
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+from precompute import PrecomputeScheduler
+from streaming import ForecastBroadcaster
+from testing import make_ohlcv
+from test_precompute import make_predictor
+
+
+class ReplayKlineSource:
+    """Replays recorded candles one at a time in place of the live exchange."""
+
+    def __init__(self, df: pd.DataFrame, window: int = 500):
+        self.df = df
+        self.window = window
+        self.position = window
+
+    def advance(self) -> None:
+        self.position = min(self.position + 1, len(self.df))
+
+    async def fetch(self, coin: str) -> pd.DataFrame:
+        return self.df.iloc[self.position - self.window:self.position].reset_index(drop=True)
+
+
+def make_stack():
+    source = ReplayKlineSource(make_ohlcv(520))
+    predictor = make_predictor()
+    predictor._fetch_binance_data_async = source.fetch
+    scheduler = PrecomputeScheduler(predictor, coins=['AAA'])
+    return source, predictor, scheduler
+
+
+def test_each_update_is_computed_once_and_fanned_out():
+    source, predictor, scheduler = make_stack()
+    calls = []
+
+    async def compute(coin):
+        calls.append(coin)
+        return await scheduler.compute(coin)
+
+    async def main():
+        broadcaster = ForecastBroadcaster(compute)
+        subscribers = [broadcaster.subscribe({'AAA'}) for _ in range(3)]
+        received = []
+        for _ in range(3):
+            source.advance()
+            predictor.market_cache.invalidate()
+            await broadcaster.tick()
+            received.append([s.queue.get_nowait() for s in subscribers])
+        return received
+
+    received = asyncio.run(main())
+    assert calls == ['AAA'] * 3
+    for updates, position in zip(received, [501, 502, 503]):
+        assert all(u is updates[0] for u in updates)
+        assert updates[0]['current_price'] == pytest.approx(source.df['close'].iloc[position - 1])
+        assert updates[0]['next_forecast'] is not None
+    assert received[0][0]['predicted_price'] != received[1][0]['predicted_price']
+
+
+def test_snapshot_refresh_pushes_to_subscribers():
+    source, predictor, scheduler = make_stack()
+
+    async def main():
+        broadcaster = ForecastBroadcaster(scheduler.compute)
+        scheduler.listeners.append(lambda snapshot: broadcaster.publish_entries(snapshot.coins))
+        subscriber = broadcaster.subscribe({'AAA', 'BBB'})
+        await scheduler.refresh()
+        return subscriber.queue.get_nowait(), subscriber.queue.empty()
+
+    update, empty = asyncio.run(main())
+    assert update['coin'] == 'AAA'
+    assert update['predicted_price'] == pytest.approx(scheduler.get('AAA')['predicted_price'])
+    assert empty
+
+
+def test_sse_endpoint(monkeypatch):
+    source, predictor, scheduler = make_stack()
+    monkeypatch.setattr(app_module, 'broadcaster', ForecastBroadcaster(scheduler.compute))
+    monkeypatch.setattr(app_module, 'PRECOMPUTE', False)
+
+    response = TestClient(app_module.app).get('/predict/aaa/stream', params={'max_events': 1})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    event, data = response.text.strip().split('\n')
+    assert event == 'event: forecast'
+    payload = json.loads(data[len('data: '):])
+    assert payload['coin'] == 'AAA'
+    assert payload['current_price'] == pytest.approx(source.df['close'].iloc[499])
+
+
+def test_stop_cancels_pending_first_updates():
+    started = []
+
+    async def compute(coin):
+        started.append(coin)
+        await asyncio.sleep(3600)
+
+    async def main():
+        broadcaster = ForecastBroadcaster(compute)
+        stream = broadcaster.events({'AAA'})
+        reader = asyncio.create_task(stream.__anext__())
+        await asyncio.sleep(0.01)
+        tasks = set(broadcaster._prime_tasks)
+        await broadcaster.stop()
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        return tasks, broadcaster
+
+    tasks, broadcaster = asyncio.run(main())
+    assert started == ['AAA']
+    assert len(tasks) == 1 and all(task.cancelled() for task in tasks)
+    assert not broadcaster._prime_tasks and not broadcaster._priming
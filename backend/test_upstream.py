@@ -0,0 +1,162 @@
+import sys
+import os
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LinearRegression
+
+# Ensure backend directory is in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import app as app_module
+import predictor as predictor_module
+from http_client import UpstreamClient
+from testing import fit_pair, make_ohlcv
+
+
+def klines_payload(rows: int = 500) -> list:
+    """Binance-style klines (values as strings, times in ms)."""
+    df = make_ohlcv(rows)
+    payload = []
+    for row in df.itertuples():
+        open_ms = int(row.open_time.timestamp() * 1000)
+        payload.append([open_ms, str(row.open), str(row.high), str(row.low), str(row.close), str(row.volume),
+                        open_ms + 3599999, "0", 0, "0", "0", "0"])
+    return payload
+
+
+NEWS = {
+    "BTC": [{"id": 1, "title": "Bitcoin ETF approval sparks rally", "url": "u", "imageurl": "i",
+             "source_info": {"name": "s"}, "published_on": 1, "body": "Record high"}],
+    "Market,Trading,Blockchain": [{"id": 2, "title": "Exchange hack triggers crash", "url": "u",
+                                   "imageurl": "i", "source_info": {"name": "s"}, "published_on": 2,
+                                   "body": ""}],
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stands in for both Binance (/api/v3/klines) and CryptoCompare (/data/v2/news/)."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.hits.append(url.path)
+        if url.path == "/api/v3/klines":
+            body = self.server.klines
+        elif url.path == "/data/v2/news/":
+            body = {"Data": NEWS.get(query["categories"][0], [])}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits = []
+    server.klines = klines_payload()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(predictor_module, "BINANCE_API_URL", base_url)
+    monkeypatch.setattr(app_module, "CRYPTOCOMPARE_API_URL", base_url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_server, monkeypatch):
+    monkeypatch.setattr(app_module, "PRECOMPUTE", False)
+    predictor = app_module.predictor
+    predictor.market_cache.invalidate()
+    app_module.NEWS_CACHE.clear()
+    predictor.registry.register('AAA', *fit_pair(LinearRegression()))
+    with TestClient(app_module.app) as client:
+        yield client
+    predictor.registry.unregister('AAA')
+    predictor.market_cache.invalidate()
+
+
+def test_latest_and_forecast_share_one_kline_fetch(client, stub_server):
+    latest = client.get('/predict/AAA/latest')
+    assert latest.status_code == 200
+
+    forecast = client.get('/predict/AAA/forecast', params={'steps': 5})
+    assert forecast.status_code == 200
+    body = forecast.json()
+    assert len(body['forecast']) == 5
+    assert len(body['history']) == 24
+    assert body['current_price'] == pytest.approx(float(stub_server.klines[-1][4]))
+
+    assert stub_server.hits.count('/api/v3/klines') == 1
+
+
+def test_news_from_stub_with_fallback_category(client, stub_server):
+    btc = client.get('/news/btc').json()
+    assert btc['source'] == 'api'
+    assert btc['news'][0]['sentiment'] == 'Bullish'
+
+    other = client.get('/news/xyz').json()
+    assert [item['id'] for item in other['news']] == [2]
+    assert other['news'][0]['sentiment'] == 'Bearish'
+
+    assert client.get('/news/btc').json()['source'] == 'cache'
+    assert stub_server.hits.count('/data/v2/news/') == 3
+
+
+def test_forecast_runs_off_the_event_loop(client, monkeypatch):
+    predictor = app_module.predictor
+    on_loop = []
+    compute = predictor._forecast_from_frame
+
+    def record(*args):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return compute(*args)
+
+    monkeypatch.setattr(predictor, '_forecast_from_frame', record)
+    assert client.get('/predict/AAA/forecast', params={'steps': 3}).status_code == 200
+    assert on_loop == [False]
+
+
+@pytest.mark.parametrize("fmt", ["points", "columnar"])
+def test_negative_steps_give_an_empty_forecast(client, fmt):
+    for params in [{'steps': -1}, {'steps': -3, 'mode': 'monte_carlo', 'seed': 1}]:
+        response = client.get('/predict/AAA/forecast', params={**params, 'format': fmt})
+        assert response.status_code == 200
+        forecast = response.json()['forecast']
+        assert len(forecast if fmt == "points" else forecast['time']) == 0
+
+
+def test_pool_of_a_finished_loop_is_released(stub_server, monkeypatch):
+    # Keep-alive, so the first loop's connection stays pooled
+    monkeypatch.setattr(StubHandler, "protocol_version", "HTTP/1.1")
+    url = f"http://127.0.0.1:{stub_server.server_port}/api/v3/klines"
+    http = UpstreamClient()
+    asyncio.run(http.get_json(url))
+    (connection,) = http._client._transport._pool.connections
+    sock = connection._connection._network_stream.get_extra_info("socket")
+
+    assert asyncio.run(http.get_json(url)) == stub_server.klines
+    with pytest.raises(OSError):
+        sock.getpeername()
@@ -0,0 +1,83 @@
+# Synthetic data and reference implementations shared by the tests and benchmark scripts
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from indicators import FEATURE_COLS
+
+
+def make_ohlcv(rows: int = 300, seed: int = 0) -> pd.DataFrame:
+    """Random-walk hourly candles, large enough for every indicator window."""
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 150, rows))
+    spread = np.abs(rng.normal(0, 80, rows))
+    return pd.DataFrame({
+        'open_time': pd.date_range('2024-01-01', periods=rows, freq='h'),
+        'open': close + rng.normal(0, 20, rows),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(100, 1000, rows),
+    })
+
+
+def pandas_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The original pandas feature pipeline, kept as the reference for the NumPy kernel."""
+    df = df.copy()
+    df['close'] = df['close'].astype(float)
+
+    df['SMA_20'] = df['close'].rolling(20).mean()
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rs = gain / loss
+    df['RSI_14'] = 100 - (100 / (1 + rs))
+
+    for lag in [1, 2, 3, 7]:
+        df[f'close_lag_{lag}'] = df['close'].shift(lag)
+
+    df['volatility_20'] = df['close'].rolling(20).std()
+
+    exp1 = df['close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = exp1 - exp2
+    df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_hist'] = df['MACD'] - df['MACD_signal']
+
+    df['BB_upper'] = df['SMA_20'] + (df['volatility_20'] * 2)
+    df['BB_lower'] = df['SMA_20'] - (df['volatility_20'] * 2)
+    df['BB_width'] = (df['BB_upper'] - df['BB_lower']) / df['SMA_20']
+
+    high_low = df['high'] - df['low']
+    high_close = np.abs(df['high'] - df['close'].shift())
+    low_close = np.abs(df['low'] - df['close'].shift())
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = np.max(ranges, axis=1)
+    df['ATR'] = true_range.rolling(14).mean()
+
+    df['OBV'] = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
+    return df
+
+
+def random_features(rows: int, seed: int = 0) -> np.ndarray:
+    """Feature rows around a 30000 price, for model tests that need no candles."""
+    rng = np.random.default_rng(seed)
+    return rng.normal(30000, 500, size=(rows, len(FEATURE_COLS)))
+
+
+def fit_pair(model, seed: int = 0):
+    """`model` fitted on scaled random features with a known linear target, and its scaler."""
+    X = random_features(200, seed)
+    y = X @ np.linspace(-1, 1, X.shape[1]) + 10
+    scaler = StandardScaler().fit(X)
+    return model.fit(scaler.transform(X), y), scaler
+
+
+class FakeClock:
+    """Clock for time-based expiry tests; advance it by setting `now`."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
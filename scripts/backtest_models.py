@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import sys
+
+# Backtesting code lives with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from backtest import DEFAULT_HORIZONS, DEFAULT_STARTS, run_backtests
+from model_registry import ModelRegistry
+
+
+def print_report(report: dict):
+    if "error" in report:
+        print(f"   [!] {report['coin']}: {report['error']}")
+        return
+    cached = " (cached)" if report.get("cached") else ""
+    print(f"   {report['coin']}: {report['rows']} rows {report['start']} -> {report['end']}, "
+          f"model {report['model']}, data {report['data']}{cached}")
+    rows = [("1 (all rows)", report["one_step"])] + [(h, m) for h, m in report["horizons"].items()]
+    print(f"      {'horizon':>12} {'count':>7} {'MAE':>12} {'RMSE':>12} {'MAPE %':>8} {'direction':>9}")
+    for horizon, m in rows:
+        if not m["count"]:
+            print(f"      {horizon:>12} {0:>7}  (not enough history)")
+            continue
+        print(f"      {horizon:>12} {m['count']:>7} {m['mae']:>12.2f} {m['rmse']:>12.2f} "
+              f"{m['mape']:>8.2f} {m['direction_accuracy']:>9.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the trained models over local history")
+    parser.add_argument("coins", nargs="*", help="Coins to backtest (default: every coin with a model)")
+    parser.add_argument("--horizons", default=",".join(map(str, DEFAULT_HORIZONS)),
+                        help="Comma separated forecast horizons in hours")
+    parser.add_argument("--starts", type=int, default=DEFAULT_STARTS, help="Forecast start points per coin")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached reports")
+    parser.add_argument("--json", help="Also write the reports to this file")
+    args = parser.parse_args()
+
+    coins = [coin.upper() for coin in args.coins] or ModelRegistry().coins()
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    print(f"Backtesting {', '.join(coins)}...")
+    reports = run_backtests(coins, workers=args.workers, horizons=horizons, starts=args.starts, refresh=args.refresh)
+    for report in reports:
+        print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"Saved reports to {args.json}")
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+import timeit
+
+# Feature code and its pandas reference live with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from indicators import feature_frame, latest_feature_row
+from testing import make_ohlcv, pandas_features
+
+def bench(rows: int, repeat: int = 5, number: int = 20):
+    """Best-of-`repeat` milliseconds per call for the pandas reference and the NumPy kernel."""
+    df = make_ohlcv(rows)
+    cases = {
+        "pandas (full)": lambda: pandas_features(df),
+        "kernel (full)": lambda: feature_frame(df),
+        "kernel (last row)": lambda: latest_feature_row(df),
+    }
+    results = {}
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, repeat=repeat, number=number)) / number
+        results[name] = best * 1000
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature kernel microbenchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[200, 500, 5000, 50000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        results = bench(rows)
+        baseline = results["pandas (full)"]
+        print(f"{rows} rows:")
+        for name, ms in results.items():
+            print(f"   {name:<18} {ms:9.3f} ms  ({baseline / ms:5.1f}x)")
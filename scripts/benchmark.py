@@ -0,0 +1,221 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# The code under test lives with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from indicators import FEATURE_COLS, feature_frame
+from monte_carlo import DEFAULT_PERCENTILES
+from predictor import DATA_DIR, Predictor
+from sentiment import SentimentEngine
+from testing import make_ohlcv
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Allowed p50 slowdown against the baseline before a benchmark counts as a regression
+REGRESSION_THRESHOLD = 1.2
+
+# History lengths for the feature pipeline: one live fetch up to ~3 years of hourly candles
+FEATURE_ROWS = [500, 2000, 8000, 26000]
+FORECAST_STEPS = [1, 24, 168]
+MC_PATHS = [1000, 10000]
+
+HEADLINES = [
+    "Bitcoin ETF approval sparks rally as price hits record high",
+    "Exchange hack triggers crash, regulators open investigation",
+    "Ethereum upgrade launch scheduled after short delay",
+    "Analysts see support holding despite correction risk",
+    "Dogecoin community celebrates partnership with payment provider",
+]
+
+
+def load_history(coin: str, rows: int) -> tuple:
+    """(frame, source): the coin's ML-ready CSV if it can be read, otherwise synthetic candles."""
+    path = os.path.join(DATA_DIR, f"{coin}_ML_ready.csv")
+    try:
+        df = pd.read_csv(path, usecols=['open_time', 'open', 'high', 'low', 'close', 'volume'])
+        df['open_time'] = pd.to_datetime(df['open_time'])
+        if len(df) >= max(FEATURE_ROWS):
+            return df, os.path.relpath(path, os.path.dirname(DATA_DIR))
+    except (OSError, ValueError, pd.errors.ParserError):
+        pass  # Missing file or an un-pulled git-lfs pointer
+    return make_ohlcv(rows), "synthetic"
+
+
+def offline_predictor(coin: str, history: pd.DataFrame) -> tuple:
+    """
+    Predictor whose Binance fetch is replaced by the last 500 rows of `history`.
+    Uses the coin's model if it loads, otherwise a linear model fitted on `history`.
+    """
+    predictor = Predictor()
+    predictor._fetch_binance_data = lambda c: history.tail(500).reset_index(drop=True)
+    try:
+        return predictor, predictor.registry.get(coin).source
+    except Exception:
+        from sklearn.linear_model import LinearRegression
+        from sklearn.preprocessing import StandardScaler
+        df = feature_frame(history.tail(5000)).dropna()
+        X, y = df[FEATURE_COLS].to_numpy()[:-1], df['close'].to_numpy()[1:]
+        scaler = StandardScaler().fit(X)
+        predictor.registry.register(coin, LinearRegression().fit(scaler.transform(X), y), scaler)
+        return predictor, "synthetic"
+
+
+def measure(fn, iterations: int, warmup: int = 3) -> dict:
+    """Latency distribution (microseconds) plus tracemalloc allocations per call."""
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+
+    # Allocations are measured on separate calls; tracing slows everything down
+    allocation_calls = max(1, min(iterations, 5))
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    for _ in range(allocation_calls):
+        fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    allocated = sum(max(stat.size_diff, 0) for stat in stats)
+    blocks = sum(max(stat.count_diff, 0) for stat in stats)
+
+    samples.sort()
+    quantiles = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {
+        "iterations": iterations,
+        "min_us": samples[0],
+        "p50_us": quantiles[49],
+        "p90_us": quantiles[89],
+        "p99_us": quantiles[98],
+        "max_us": samples[-1],
+        "mean_us": statistics.fmean(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "peak_bytes": peak - baseline,
+        "retained_bytes_per_call": allocated / allocation_calls,
+        "retained_blocks_per_call": blocks / allocation_calls,
+    }
+
+
+def run_suite(coin: str = "BTC", iterations: int = 50, only: str = None) -> dict:
+    history, data_source = load_history(coin, max(FEATURE_ROWS))
+    predictor, model_source = offline_predictor(coin, history)
+    features = predictor.get_latest_features(coin)
+
+    def latest_features():
+        # Drop the cached klines so every call runs the (stubbed) fetch and the features
+        predictor.market_cache.invalidate()
+        return predictor.get_latest_features(coin)
+
+    def forecast(steps):
+        def run():
+            predictor.market_cache.invalidate()
+            return predictor.predict_forecast(coin, steps=steps)
+        return run
+
+    cases = {
+        "predict": (lambda: predictor.predict(coin, features), iterations * 20),
+        "get_latest_features": (latest_features, iterations),
+    }
+    for steps in FORECAST_STEPS:
+        cases[f"predict_forecast[steps={steps}]"] = (forecast(steps), iterations)
+    for paths in MC_PATHS:
+        cases[f"monte_carlo[paths={paths},steps=168]"] = (
+            lambda paths=paths: predictor._monte_carlo_from_frame(coin, history.tail(500), 168, paths,
+                                                                  DEFAULT_PERCENTILES, seed=0),
+            max(3, iterations // 10))
+    for rows in FEATURE_ROWS:
+        frame = history.tail(rows).reset_index(drop=True)
+        cases[f"prepare_features[rows={rows}]"] = (lambda frame=frame: predictor._prepare_features(frame),
+                                                   max(5, iterations * 500 // rows))
+
+    sentiment_engine = SentimentEngine()
+    cases["analyze_sentiment"] = (lambda: [sentiment_engine.score(text) for text in HEADLINES], iterations * 20)
+    cases["sentiment_batch"] = (lambda: sentiment_engine.score_texts(HEADLINES), iterations * 20)
+
+    results = {}
+    for name, (fn, count) in cases.items():
+        if only and only not in name:
+            continue
+        results[name] = measure(fn, count)
+        print(f"   {name:<34} p50 {results[name]['p50_us']:>11.1f} us   "
+              f"p99 {results[name]['p99_us']:>11.1f} us   peak {results[name]['peak_bytes'] / 1024:>9.1f} KiB")
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "coin": coin,
+            "data": data_source,
+            "model": model_source,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Prints p50 changes against a baseline and returns the names that regressed."""
+    regressions = []
+    if baseline["meta"].get("data") != report["meta"]["data"]:
+        print(f"   [!] Baseline used data '{baseline['meta'].get('data')}', this run '{report['meta']['data']}'")
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = result["p50_us"] / previous["p50_us"] if previous["p50_us"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"   {name:<34} {previous['p50_us']:>11.1f} -> {result['p50_us']:>11.1f} us  ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the prediction hot paths")
+    parser.add_argument("--coin", default="BTC")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this string")
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    print(f"Benchmarking {args.coin} ({args.iterations} iterations)...")
+    report = run_suite(args.coin, args.iterations, args.only)
+    print(f"Data: {report['meta']['data']}, model: {report['meta']['model']}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare} ({baseline['meta']['created_at']}):")
+        regressions = compare(report, baseline, args.threshold)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.threshold:.2f}x the baseline")
+        sys.exit(1)
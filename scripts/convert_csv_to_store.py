@@ -0,0 +1,53 @@
+import os
+import re
+import sys
+import pandas as pd
+
+# Shared storage code lives with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ohlcv_store import OHLCVStore
+
+# Scripts are in Crypto-Sight/scripts/, Data is in Crypto-Sight/data/
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# {COIN}_ML_ready.csv holds hourly candles; {SYMBOL}_{interval}.csv comes from fetch_all_binance.py
+ML_READY_PATTERN = re.compile(r"^([A-Z0-9]+)_ML_ready\.csv$")
+RAW_PATTERN = re.compile(r"^([A-Z0-9]+USDT)_(1h|1d)\.csv$")
+
+def series_for(filename: str):
+    """Maps a CSV file name to its (symbol, interval) in the store, or None."""
+    match = ML_READY_PATTERN.match(filename)
+    if match:
+        return f"{match.group(1)}USDT", "1h"
+    match = RAW_PATTERN.match(filename)
+    if match:
+        return match.group(1), match.group(2)
+    return None
+
+def convert_all(store: OHLCVStore = None):
+    """
+    One-time conversion of the CSVs in data/ into the columnar store.
+    Raw Binance CSVs take precedence over ML-ready ones for the same series.
+    """
+    store = store or OHLCVStore()
+    files = sorted(os.listdir(DATA_DIR), key=lambda name: RAW_PATTERN.match(name) is not None)
+
+    for filename in files:
+        series = series_for(filename)
+        if series is None:
+            continue
+        symbol, interval = series
+        path = os.path.join(DATA_DIR, filename)
+        try:
+            df = pd.read_csv(path, usecols=["open_time", "open", "high", "low", "close", "volume"])
+        except (ValueError, pd.errors.ParserError) as e:
+            print(f"   [!] Skipping {filename}: {e}")
+            continue
+        df["open_time"] = pd.to_datetime(df["open_time"])
+        rows = store.write(symbol, interval, df)
+        print(f"   {filename} -> {symbol}/{interval} ({rows} rows)")
+
+if __name__ == "__main__":
+    print("Converting CSV history to the columnar store...")
+    convert_all()
+    print("Done.")
@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+
+# Model loading code lives with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from model_registry import COMPACT_JSON, COMPACT_NPZ, MODELS_DIR, ModelRegistry, save_compact
+
+def export_all(fmt: str = "npz", models_dir: str = MODELS_DIR):
+    """
+    Writes the fused coefficients of every pickled model next to it, so the API
+    can load them without unpickling or importing sklearn. Re-run after retraining.
+    """
+    name = COMPACT_JSON if fmt == "json" else COMPACT_NPZ
+    registry = ModelRegistry(models_dir)
+    for coin in registry.coins():
+        try:
+            version = registry.get(coin)
+        except Exception as e:
+            print(f"   [!] Skipping {coin}: {e}")
+            continue
+        if version.linear is None:
+            print(f"   [!] Skipping {coin}: model does not fold into linear coefficients")
+            continue
+        path = save_compact(os.path.join(models_dir, coin, name), *version.linear)
+        print(f"   {coin} {version.version} -> {os.path.relpath(path, models_dir)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export compact model coefficients")
+    parser.add_argument("--format", choices=["npz", "json"], default="npz")
+    args = parser.parse_args()
+    print("Exporting compact model coefficients...")
+    export_all(args.format)
+    print("Done.")
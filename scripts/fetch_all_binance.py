@@ -1,9 +1,17 @@
+import argparse
 import os
+import sys
 import time
-import requests
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 
+# Shared storage code lives with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from ohlcv_store import OHLCVStore, SeriesWriter, frame_to_columns
+from rollup import BASE_INTERVAL, resample_frame, rollup
+from ingest_scheduler import IngestJob, IngestionScheduler
+
 # --- Configuration ---
 load_dotenv()
 API_KEY = os.getenv("BINANCE_API_KEY") # Optional for public data
@@ -15,38 +23,23 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "DOGEUSDT"]
 
-def get_klines(symbol: str, interval: str, limit: int=1000, startTime: int=None) -> pd.DataFrame:
+# Only the hourly series is downloaded; these are rolled up from it after each run
+DERIVED_INTERVALS = ["1d"]
+
+# Columnar store read by the backend (data/store/{SYMBOL}/{interval}/)
+STORE = OHLCVStore()
+
+KLINE_COLUMNS = [
+    "open_time","open","high","low","close","volume",
+    "close_time","quote_volume","trades",
+    "taker_buy_base","taker_buy_quote","ignore"
+]
+
+def klines_to_frame(data: list) -> pd.DataFrame:
     """
-    Fetches raw klines from Binance API v3.
+    Converts a raw klines payload into a typed DataFrame.
     """
-    url = BASE_URL + "/api/v3/klines"
-    params = {
-        "symbol": symbol,
-        "interval": interval,
-        "limit": limit
-    }
-    if startTime:
-        params["startTime"] = startTime
-
-    headers = {}
-    if API_KEY:
-        headers["X-MBX-APIKEY"] = API_KEY
-
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except Exception as e:
-        print(f"Request failed: {e}")
-        return pd.DataFrame()
-
-    cols = [
-        "open_time","open","high","low","close","volume",
-        "close_time","quote_volume","trades",
-        "taker_buy_base","taker_buy_quote","ignore"
-    ]
-
-    df = pd.DataFrame(data, columns=cols)
+    df = pd.DataFrame(data, columns=KLINE_COLUMNS)
     if df.empty:
         return df
 
@@ -59,81 +52,174 @@ def get_klines(symbol: str, interval: str, limit: int=1000, startTime: int=None)
 
     return df
 
-def fetch_full_history(symbol: str, interval: str, years: int=3) -> pd.DataFrame:
+def klines_to_columns(klines: list) -> dict:
     """
-    Pagination loop to fetch long-term history.
+    Converts a raw klines page straight into the store's typed column arrays.
     """
-    end_ms = int(time.time() * 1000)
-    start_ms = end_ms - years * 365 * 24 * 60 * 60 * 1000
-
-    all_parts = []
-    current_start = start_ms
-
-    print(f"Downloading {interval} data for {symbol}...")
-    
-    while True:
-        df = get_klines(symbol, interval, limit=1000, startTime=current_start)
-
-        if df.empty:
-            break
-
-        all_parts.append(df)
-
-        # Update start time for next batch
-        last_close_ms = int(df["close_time"].iloc[-1].timestamp() * 1000)
-        if last_close_ms >= end_ms:
-            break
+    n = len(klines)
+    columns = {"open_time": np.fromiter((k[0] for k in klines), dtype=np.int64, count=n)}
+    for i, name in enumerate(["open", "high", "low", "close", "volume"], start=1):
+        columns[name] = np.fromiter((float(k[i]) for k in klines), dtype=np.float64, count=n)
+    return columns
 
-        current_start = last_close_ms + 1
-        time.sleep(0.1)  # Respect rate limits
+def drop_seen(klines: list, last_open_ms: int) -> list:
+    """
+    Drops the leading klines at or before the last open_time already written.
+    Pages arrive sorted, so checking this boundary replaces a full drop_duplicates.
+    """
+    if last_open_ms is None:
+        return klines
+    first = 0
+    while first < len(klines) and klines[first][0] <= last_open_ms:
+        first += 1
+    return klines[first:]
+
+class SeriesSink:
+    """
+    Writes the pages of one symbol/interval series to disk as soon as they arrive.
 
-    if not all_parts:
-        return pd.DataFrame()
+    Without `resume_from` the series (and optional CSV export) is rebuilt in a
+    staging copy that close() swaps in. With `resume_from` (the last stored
+    open_time) pages are appended to the stored series; the first page replaces
+    the stored last candle, which may have been saved before it closed (or by
+    an interrupted run).
+    """
 
-    final_df = pd.concat(all_parts).drop_duplicates().sort_values("open_time")
-    return final_df
+    def __init__(self, symbol: str, interval: str, resume_from: int=None, csv_path: str=None):
+        self.symbol = symbol
+        self.interval = interval
+        self.resume_from = resume_from
+        self.rows_before = STORE.count(symbol, interval) if resume_from is not None else 0
+        self.writer = SeriesWriter(STORE, symbol, interval, replace=resume_from is None)
+        self.last_open_ms = None
+        self.csv_path = csv_path
+        self.csv_tmp = csv_path + ".tmp" if csv_path else None
+        if self.csv_tmp and os.path.exists(self.csv_tmp):
+            os.remove(self.csv_tmp)
+
+    def write(self, klines: list):
+        klines = drop_seen(klines, self.last_open_ms)
+        if not klines:
+            return
+
+        if self.last_open_ms is None and self.resume_from is not None and klines[0][0] == self.resume_from:
+            STORE.truncate(self.symbol, self.interval, self.rows_before - 1)
+
+        self.writer.append(klines_to_columns(klines))
+        if self.csv_tmp:
+            header = not os.path.exists(self.csv_tmp)
+            klines_to_frame(klines).to_csv(self.csv_tmp, mode="a", header=header, index=False)
+        self.last_open_ms = klines[-1][0]
+
+    def close(self) -> int:
+        """Publishes what was written and returns the number of new candles."""
+        rows = self.writer.commit()
+        if self.csv_tmp and os.path.exists(self.csv_tmp):
+            os.replace(self.csv_tmp, self.csv_path)
+        if self.resume_from is not None:
+            return STORE.count(self.symbol, self.interval) - self.rows_before
+        return rows
+
+    def abort(self):
+        self.writer.abort()
+        if self.csv_tmp and os.path.exists(self.csv_tmp):
+            os.remove(self.csv_tmp)
+
+def update_derived(symbol: str, interval: str, incremental: bool=False, csv_path: str=None) -> int:
+    """
+    Rolls the stored hourly series up into `interval` candles in the store.
+    Incremental runs only re-aggregate the hourly candles from the last stored
+    (possibly unfinished) candle on; full runs rebuild the series and export
+    it to `csv_path`. Returns the number of new candles.
+    """
+    last_open_ms = STORE.last_open_time(symbol, interval) if incremental else None
+    if last_open_ms is None:
+        derived = resample_frame(STORE.range(symbol, BASE_INTERVAL), interval)
+        STORE.write(symbol, interval, derived)
+        if csv_path:
+            derived.to_csv(csv_path, index=False)
+        return len(derived)
+
+    base = STORE.range(symbol, BASE_INTERVAL, start=pd.Timestamp(last_open_ms, unit="ms"))
+    if base.empty:
+        return 0
+    rows_before = STORE.count(symbol, interval)
+    STORE.truncate(symbol, interval, rows_before - 1)
+    STORE.append(symbol, interval, rollup(frame_to_columns(base), interval))
+    return STORE.count(symbol, interval) - rows_before
 
 def build_yearly(daily_df: pd.DataFrame) -> pd.DataFrame:
-    """Resamples daily data to yearly candles (for macro view)."""
-    df = daily_df.copy()
-    df = df.set_index("open_time")
-
-    yearly = df.resample("Y").agg({
-        "open": "first",
-        "high": "max",
-        "low": "min",
-        "close": "last",
-        "volume": "sum"
-    })
-    return yearly.reset_index()
-
-def fetch_for_all(years: int=3):
-    print(f"\n--- Starting Data Ingestion ({years} years) ---\n")
+    """
+    Rolls daily data up to yearly candles (for macro view). Rows keep the
+    year-end label of the original resample("YE") export (e.g. 2024-12-31).
+    """
+    yearly = resample_frame(daily_df, "1y")
+    yearly["open_time"] = yearly["open_time"] + pd.offsets.YearEnd(0)
+    return yearly
 
-    for symbol in SYMBOLS:
-        print(f">> Processing {symbol}")
+def fetch_for_all(years: int=3, incremental: bool=False, workers: int=4):
+    """
+    Downloads 1h history for every symbol. All symbol series are paginated
+    concurrently by the rate-limit-aware IngestionScheduler, and each page is
+    written to disk as it arrives so memory stays bounded. The daily and yearly
+    series are then rolled up from the stored hourly candles.
+    In incremental mode only the store is updated; CSV exports are produced by full runs.
+    """
+    mode = "incremental" if incremental else f"{years} years"
+    print(f"\n--- Starting Data Ingestion ({mode}, {workers} workers) ---\n")
 
-        # 1. Hourly Data (Core for ML)
-        df_1h = fetch_full_history(symbol, "1h", years=years)
-        if not df_1h.empty:
-            path = os.path.join(DATA_DIR, f"{symbol}_1h.csv")
-            df_1h.to_csv(path, index=False)
-            print(f"   Saved {len(df_1h)} hourly records to {path}")
+    end_ms = int(time.time() * 1000)
+    history_start_ms = end_ms - years * 365 * 24 * 60 * 60 * 1000
 
-        # 2. Daily Data
-        df_1d = fetch_full_history(symbol, "1d", years=years)
+    jobs, sinks = [], {}
+    for symbol in SYMBOLS:
+        for interval in [BASE_INTERVAL]:
+            last_open_ms = STORE.last_open_time(symbol, interval) if incremental else None
+            if last_open_ms is None:
+                job = IngestJob(symbol, interval, history_start_ms, end_ms)
+                csv_path = None if incremental else os.path.join(DATA_DIR, f"{symbol}_{interval}.csv")
+                sinks[job.name] = SeriesSink(symbol, interval, csv_path=csv_path)
+            else:
+                job = IngestJob(symbol, interval, last_open_ms, end_ms)
+                sinks[job.name] = SeriesSink(symbol, interval, resume_from=last_open_ms)
+            jobs.append(job)
+
+    scheduler = IngestionScheduler(BASE_URL, api_key=API_KEY, workers=workers)
+    report = scheduler.run(jobs, lambda job, klines: sinks[job.name].write(klines))
+
+    for job in jobs:
+        sink = sinks[job.name]
+        if job.error is not None:
+            sink.abort()
+            print(f">> {job.name}: skipped ({job.error})")
+            continue
+        added = sink.close()
+        print(f">> {job.name}: {added} new records ({STORE.count(job.symbol, job.interval)} stored)")
+
+    # Daily series rolled up from the hourly one, and yearly data (macro view) from the daily series
+    for symbol in SYMBOLS:
+        if not STORE.exists(symbol, BASE_INTERVAL):
+            continue
+        for interval in DERIVED_INTERVALS:
+            csv_path = None if incremental else os.path.join(DATA_DIR, f"{symbol}_{interval}.csv")
+            added = update_derived(symbol, interval, incremental=incremental, csv_path=csv_path)
+            print(f">> {symbol} {interval}: {added} new records rolled up ({STORE.count(symbol, interval)} stored)")
+        df_1d = STORE.range(symbol, "1d")
         if not df_1d.empty:
-            path = os.path.join(DATA_DIR, f"{symbol}_1d.csv")
-            df_1d.to_csv(path, index=False)
-            print(f"   Saved {len(df_1d)} daily records to {path}")
-
-            # 3. Yearly Data
-            df_1y = build_yearly(df_1d)
             path_y = os.path.join(DATA_DIR, f"{symbol}_1y.csv")
-            df_1y.to_csv(path_y, index=False)
+            build_yearly(df_1d).to_csv(path_y, index=False)
             print(f"   Saved yearly records to {path_y}")
-            
-    print("\nData Ingestion Complete.")
+
+    print(f"\nData Ingestion Complete: {report['rows']} rows, {report['requests']} requests "
+          f"({report['retries']} retries) in {report['seconds']:.1f}s "
+          f"({report['rows_per_second']:.0f} rows/s).")
+    return report
 
 if __name__ == "__main__":
-    fetch_for_all(years=3)
+    parser = argparse.ArgumentParser(description="Download Binance klines into data/")
+    parser.add_argument("--years", type=int, default=3, help="History length for full downloads")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only fetch candles newer than the last stored one (nightly refresh)")
+    parser.add_argument("--workers", type=int, default=4, help="Series downloaded concurrently")
+    args = parser.parse_args()
+    fetch_for_all(years=args.years, incremental=args.incremental, workers=args.workers)
@@ -0,0 +1,213 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import requests
+
+# Binance request weight budget per IP and minute (api.binance.com), and the
+# share of it we allow ourselves so other clients on the same IP keep working
+WEIGHT_LIMIT_1M = 6000
+WEIGHT_HEADROOM = 0.8
+
+# Request weight of GET /api/v3/klines
+KLINES_WEIGHT = 2
+
+# Seconds to wait after a 429/418 that carries no Retry-After header
+DEFAULT_BACKOFF = 5.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at capacity / period.
+
+    The bucket follows the server's view of our usage (X-MBX-USED-WEIGHT-1M)
+    and can be paused entirely after a 429/418 response.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight: float) -> None:
+        """Blocks until `weight` tokens are available and takes them."""
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                else:
+                    wait = (weight - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def observe_used_weight(self, used: float, limit: float) -> None:
+        """Aligns the bucket with the weight the server says we have used."""
+        with self._lock:
+            self.tokens = min(self.tokens, self.capacity * (1 - used / limit))
+
+    def pause(self, seconds: float) -> None:
+        """Stops handing out tokens for `seconds` (rate limited or banned)."""
+        with self._lock:
+            now = self.clock()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = now
+
+
+class IngestJob:
+    """Pagination state and progress of one symbol/interval download."""
+
+    def __init__(self, symbol: str, interval: str, start_ms: int, end_ms: int):
+        self.symbol = symbol
+        self.interval = interval
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.pages = 0
+        self.rows = 0
+        self.position_ms = start_ms
+        self.error = None
+        self.seconds = 0.0
+
+    @property
+    def name(self) -> str:
+        return f"{self.symbol} {self.interval}"
+
+    @property
+    def progress(self) -> float:
+        span = self.end_ms - self.start_ms
+        return 1.0 if span <= 0 else min(1.0, (self.position_ms - self.start_ms) / span)
+
+
+class IngestionScheduler:
+    """
+    Runs kline pagination for many symbols/intervals at once.
+
+    Every request first takes KLINES_WEIGHT tokens from a shared bucket sized
+    to the Binance weight budget. Used-weight headers tighten the bucket, and
+    429/418 responses pause all workers for the Retry-After period before the
+    page is retried. Each page is handed to `sink(job, klines)` as soon as it
+    arrives; pages of one job are delivered in order from a single thread.
+    """
+
+    def __init__(self, base_url: str, api_key: str = None, workers: int = 4,
+                 weight_limit: int = WEIGHT_LIMIT_1M, headroom: float = WEIGHT_HEADROOM,
+                 max_retries: int = 5, bucket: TokenBucket = None, log: Callable[[str], None] = print):
+        self.url = base_url + "/api/v3/klines"
+        self.headers = {"X-MBX-APIKEY": api_key} if api_key else {}
+        self.workers = workers
+        self.weight_limit = weight_limit
+        self.bucket = bucket or TokenBucket(weight_limit * headroom)
+        self.max_retries = max_retries
+        self.log = log
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        # One keep-alive session per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _count(self, retry: bool = False) -> None:
+        with self._lock:
+            self.requests += 1
+            self.retries += retry
+
+    def _get_page(self, job: IngestJob, start_ms: int) -> list:
+        params = {"symbol": job.symbol, "interval": job.interval, "limit": 1000, "startTime": start_ms}
+        backoff = 1.0
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire(KLINES_WEIGHT)
+            self._count(retry=attempt > 0)
+            try:
+                response = self._session().get(self.url, params=params, headers=self.headers, timeout=10)
+            except requests.RequestException as e:
+                self.log(f"   [!] {job.name}: {e}, retrying in {backoff:.0f}s")
+                self.bucket.sleep(backoff)
+                backoff *= 2
+                continue
+
+            used = response.headers.get("X-MBX-USED-WEIGHT-1M")
+            if used is not None:
+                self.bucket.observe_used_weight(float(used), self.weight_limit)
+
+            if response.status_code in (418, 429):
+                retry_after = float(response.headers.get("Retry-After", DEFAULT_BACKOFF))
+                self.log(f"   [!] {job.name}: HTTP {response.status_code}, pausing {retry_after:.0f}s")
+                self.bucket.pause(retry_after)
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+        raise RuntimeError(f"{job.name}: giving up after {self.max_retries + 1} attempts")
+
+    def _run_job(self, job: IngestJob, sink: Callable[[IngestJob, list], None]) -> None:
+        started = time.monotonic()
+        current = job.start_ms
+        try:
+            while True:
+                klines = self._get_page(job, current)
+                if not klines:
+                    break
+
+                sink(job, klines)
+                last_close_ms = int(klines[-1][6])
+                job.pages += 1
+                job.rows += len(klines)
+                job.position_ms = min(last_close_ms, job.end_ms)
+                self.log(f"   {job.name}: {job.rows} rows ({job.progress:.0%})")
+
+                if last_close_ms >= job.end_ms or last_close_ms < current:
+                    break
+                current = last_close_ms + 1
+        except Exception as e:
+            job.error = e
+            self.log(f"   [!] {job.name} failed: {e}")
+        finally:
+            job.seconds = time.monotonic() - started
+
+    def run(self, jobs: List[IngestJob], sink: Callable[[IngestJob, list], None]) -> Dict:
+        """Runs all jobs and returns a throughput / per-job progress report."""
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(lambda job: self._run_job(job, sink), jobs))
+        seconds = time.monotonic() - started
+
+        rows = sum(job.rows for job in jobs)
+        return {
+            "seconds": seconds,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rows": rows,
+            "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+            "requests_per_second": self.requests / seconds if seconds > 0 else 0.0,
+            "jobs": {
+                job.name: {
+                    "pages": job.pages,
+                    "rows": job.rows,
+                    "progress": job.progress,
+                    "seconds": job.seconds,
+                    "error": str(job.error) if job.error else None,
+                }
+                for job in jobs
+            },
+        }
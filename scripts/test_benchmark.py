@@ -0,0 +1,24 @@
+import sys
+import os
+
+# Ensure scripts and backend directories are in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(current_dir, "..", "backend"))
+
+import benchmark
+
+
+def test_suite_runs_offline_and_flags_regressions():
+    report = benchmark.run_suite("BTC", iterations=3, only="predict")
+    results = report["results"]
+    assert set(results) == {"predict", "predict_forecast[steps=1]", "predict_forecast[steps=24]",
+                            "predict_forecast[steps=168]"}
+    for result in results.values():
+        assert result["min_us"] <= result["p50_us"] <= result["p99_us"] <= result["max_us"]
+        assert result["peak_bytes"] >= 0
+
+    baseline = {"meta": dict(report["meta"]), "results": {name: dict(r) for name, r in results.items()}}
+    assert benchmark.compare(report, baseline) == []
+    baseline["results"]["predict"]["p50_us"] = results["predict"]["p50_us"] / 2
+    assert benchmark.compare(report, baseline) == ["predict"]
@@ -0,0 +1,127 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Ensure scripts and backend directories are in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(current_dir, "..", "backend"))
+
+import fetch_all_binance
+from ohlcv_store import OHLCVStore
+
+HOUR_MS = 3600 * 1000
+
+
+def make_klines(rows: int, start_ms: int) -> pd.DataFrame:
+    """Frame shaped like klines_to_frame() output."""
+    open_ms = start_ms + np.arange(rows) * HOUR_MS
+    close = 100 + np.arange(rows, dtype=float)
+    return pd.DataFrame({
+        "open_time": pd.to_datetime(open_ms, unit="ms"),
+        "open": close, "high": close + 1, "low": close - 1, "close": close,
+        "volume": np.ones(rows),
+        "close_time": pd.to_datetime(open_ms + HOUR_MS - 1, unit="ms"),
+    })
+
+
+def to_raw(df: pd.DataFrame) -> list:
+    """Binance-style raw klines for the rows of `df`."""
+    open_ms = df["open_time"].astype("datetime64[ms]").astype("int64")
+    close_ms = df["close_time"].astype("datetime64[ms]").astype("int64")
+    return [[int(o), str(r.open), str(r.high), str(r.low), str(r.close), str(r.volume), int(c), "0", 0, "0", "0", "0"]
+            for o, c, r in zip(open_ms, close_ms, df.itertuples())]
+
+
+def serve_from(monkeypatch, tmp_path, market: pd.DataFrame, requests: list, now_ms: int, overlap: int = 0) -> OHLCVStore:
+    """
+    Points fetch_for_all at a store in tmp_path and replaces the scheduler's
+    page request with pages cut from `market` (optionally repeating `overlap` rows).
+    """
+    def fake_get_page(self, job, start_ms):
+        requests.append(start_ms)
+        start = pd.to_datetime(start_ms, unit="ms") - pd.Timedelta(hours=overlap)
+        return to_raw(market[market["open_time"] >= start].head(1000))
+
+    store = OHLCVStore(str(tmp_path / "store"))
+    monkeypatch.setattr(fetch_all_binance, "STORE", store)
+    monkeypatch.setattr(fetch_all_binance, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(fetch_all_binance, "SYMBOLS", ["BTCUSDT"])
+    monkeypatch.setattr(fetch_all_binance.IngestionScheduler, "_get_page", fake_get_page)
+    monkeypatch.setattr(fetch_all_binance.time, "time", lambda: now_ms / 1000)
+    return store
+
+
+def test_incremental_update_fetches_only_new_candles(tmp_path, monkeypatch):
+    now_ms = int(pd.Timestamp("2024-03-01").value // 1_000_000)
+    market = make_klines(2500, now_ms - 2500 * HOUR_MS)
+    requests = []
+    store = serve_from(monkeypatch, tmp_path, market, requests, now_ms)
+
+    # The last stored candle was saved before it closed
+    stale = market.iloc[:2400].copy()
+    stale.loc[2399, "close"] = -1.0
+    store.write("BTCUSDT", "1h", stale)
+
+    report = fetch_all_binance.fetch_for_all(incremental=True, workers=1)
+    assert requests[0] == int(market["open_time"].iloc[2399].value // 1_000_000)
+    assert report["jobs"]["BTCUSDT 1h"]["rows"] == 101
+
+    stored = store.tail("BTCUSDT", "1h", 2500)
+    np.testing.assert_array_equal(stored["close"].to_numpy(), market["close"].to_numpy())
+
+
+def test_incremental_update_without_new_candles(tmp_path, monkeypatch):
+    market = make_klines(50, 0)
+    store = serve_from(monkeypatch, tmp_path, market, [], 50 * HOUR_MS)
+    store.write("BTCUSDT", "1h", market)
+
+    fetch_all_binance.fetch_for_all(incremental=True, workers=1)
+    assert store.count("BTCUSDT", "1h") == 50
+    np.testing.assert_array_equal(store.tail("BTCUSDT", "1h", 50)["close"].to_numpy(), market["close"].to_numpy())
+
+
+def test_full_history_streams_overlapping_pages(tmp_path, monkeypatch):
+    market = make_klines(3000, 0)
+    # Every page repeats the last 5 candles of the previous one
+    store = serve_from(monkeypatch, tmp_path, market, [], 3000 * HOUR_MS, overlap=5)
+
+    fetch_all_binance.fetch_for_all(years=1, workers=1)
+    stored = store.tail("BTCUSDT", "1h", 3000)
+    assert len(stored) == 3000
+    np.testing.assert_array_equal(stored["close"].to_numpy(), market["close"].to_numpy())
+    assert len(pd.read_csv(tmp_path / "BTCUSDT_1h.csv")) == 3000
+
+
+def test_derived_daily_series_follows_the_hourly_one(tmp_path, monkeypatch):
+    store = OHLCVStore(str(tmp_path))
+    monkeypatch.setattr(fetch_all_binance, "STORE", store)
+    market = make_klines(24 * 40, 0)
+    store.write("BTCUSDT", "1h", market.iloc[:24 * 30 + 5])
+
+    csv_path = str(tmp_path / "BTCUSDT_1d.csv")
+    assert fetch_all_binance.update_derived("BTCUSDT", "1d", csv_path=csv_path) == 31
+    assert len(pd.read_csv(csv_path)) == 31
+
+    # New hourly candles complete the open day and add nine more
+    store.append("BTCUSDT", "1h", fetch_all_binance.klines_to_columns(to_raw(market.iloc[24 * 30 + 5:])))
+    assert fetch_all_binance.update_derived("BTCUSDT", "1d", incremental=True) == 9
+
+    daily = store.tail("BTCUSDT", "1d", 100)
+    assert len(daily) == 40
+    np.testing.assert_array_equal(daily["close"].to_numpy(), market["close"].to_numpy()[23::24])
+    np.testing.assert_array_equal(daily["volume"].to_numpy(), np.full(40, 24.0))
+
+    yearly = fetch_all_binance.build_yearly(daily)
+    assert yearly["open_time"].tolist() == [pd.Timestamp("1970-12-31")]
+    assert yearly["high"].iloc[0] == market["high"].max()
+
+
+def test_yearly_candles_keep_the_year_end_label():
+    daily = make_klines(800, 0)[["open_time", "open", "high", "low", "close", "volume"]]
+    daily["open_time"] = pd.date_range("2023-03-01", periods=800, freq="D")
+    expected = daily.set_index("open_time").resample("YE").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).reset_index()
+    pd.testing.assert_frame_equal(fetch_all_binance.build_yearly(daily), expected, check_dtype=False)
@@ -0,0 +1,124 @@
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Ensure scripts and backend directories are in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(current_dir, "..", "backend"))
+
+import fetch_all_binance
+from ingest_scheduler import IngestJob, IngestionScheduler, TokenBucket
+from ohlcv_store import OHLCVStore
+
+INTERVAL_MS = {"1h": 3600 * 1000, "1d": 24 * 3600 * 1000}
+END_MS = 1_700_000_000_000 // INTERVAL_MS["1d"] * INTERVAL_MS["1d"]
+
+
+class FakeKlinesHandler(BaseHTTPRequestHandler):
+    """Serves deterministic klines up to END_MS; rate limits the first request per symbol in `throttle`."""
+
+    def do_GET(self):
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        symbol, interval = query["symbol"], query["interval"]
+        step = INTERVAL_MS[interval]
+        start = -(-int(query["startTime"]) // step) * step
+        limit = int(query["limit"])
+
+        with self.server.lock:
+            self.server.calls += 1
+            throttled = symbol in self.server.throttle
+            self.server.throttle.discard(symbol)
+
+        if throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        klines = []
+        t = start
+        while t < END_MS and len(klines) < limit:
+            price = str(100 + t // step % 50)
+            klines.append([t, price, price, price, price, "1.0", t + step - 1, "0", 0, "0", "0", "0"])
+            t += step
+
+        body = json.dumps(klines).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-MBX-USED-WEIGHT-1M", str(2 * self.server.calls))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_binance():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeKlinesHandler)
+    server.lock = threading.Lock()
+    server.calls = 0
+    server.throttle = {"ETHUSDT"}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_scheduler_paginates_concurrently_and_retries_429(fake_binance):
+    server, base_url = fake_binance
+    start_ms = END_MS - 2500 * INTERVAL_MS["1h"]
+    jobs = [IngestJob(symbol, "1h", start_ms, END_MS) for symbol in ["BTCUSDT", "ETHUSDT", "BNBUSDT"]]
+    received = {job.name: [] for job in jobs}
+
+    scheduler = IngestionScheduler(base_url, workers=3, log=lambda msg: None)
+    report = scheduler.run(jobs, lambda job, klines: received[job.name].extend(k[0] for k in klines))
+
+    assert report["retries"] == 1
+    assert report["rows"] == 3 * 2500
+    for job in jobs:
+        assert job.error is None
+        assert report["jobs"][job.name]["pages"] == 3
+        assert report["jobs"][job.name]["progress"] == pytest.approx(1.0)
+        assert received[job.name] == sorted(received[job.name])
+        assert len(received[job.name]) == 2500
+
+
+def test_token_bucket_waits_and_pauses():
+    now = [0.0]
+    bucket = TokenBucket(10, period=10.0, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+
+    bucket.acquire(10)
+    bucket.acquire(5)
+    assert now[0] == pytest.approx(5.0)
+
+    bucket.pause(30)
+    bucket.acquire(1)
+    assert now[0] == pytest.approx(35.0 + 0.1, rel=0.05)
+
+    bucket.observe_used_weight(used=900, limit=1000)
+    assert bucket.tokens <= 1.0
+
+
+def test_fetch_for_all_writes_store(tmp_path, monkeypatch, fake_binance):
+    _, base_url = fake_binance
+    store = OHLCVStore(str(tmp_path / "store"))
+    monkeypatch.setattr(fetch_all_binance, "BASE_URL", base_url)
+    monkeypatch.setattr(fetch_all_binance, "STORE", store)
+    monkeypatch.setattr(fetch_all_binance, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(fetch_all_binance, "SYMBOLS", ["BTCUSDT", "ETHUSDT"])
+    monkeypatch.setattr(fetch_all_binance.time, "time", lambda: END_MS / 1000)
+
+    report = fetch_all_binance.fetch_for_all(years=1, workers=4)
+    assert report["retries"] == 1
+    assert store.count("BTCUSDT", "1h") == 365 * 24
+    assert store.count("ETHUSDT", "1d") == 365
+    assert os.path.exists(tmp_path / "BTCUSDT_1h.csv")
@@ -0,0 +1,50 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Ensure scripts and backend directories are in path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+sys.path.append(os.path.join(current_dir, "..", "backend"))
+
+pytest.importorskip("seaborn")
+import visualize_predictions as vp
+from indicators import FEATURE_COLS, feature_frame, latest_feature_row
+from model_registry import COMPACT_NPZ, ModelRegistry, save_compact
+from ohlcv_store import OHLCVStore
+from test_backtest import fitted_version
+from testing import make_ohlcv
+
+
+def test_forecast_uses_features_of_the_full_history(tmp_path):
+    df = make_ohlcv(1000)
+    version = fitted_version(df)
+    store = OHLCVStore(str(tmp_path / "store"))
+    store.write("AAAUSDT", "1h", df)
+    history = vp.load_history("AAA", str(tmp_path), store)
+    assert len(history) == 1000
+
+    prices = vp.forecast(history, version, 3)
+    # OBV (and the EMAs) run from the first candle, as in the full-frame features
+    assert prices[0] == pytest.approx(version.predict(feature_frame(df)[FEATURE_COLS].to_numpy()[-1]))
+    candle = {'open_time': df['open_time'].iloc[-1] + pd.Timedelta(hours=1), 'open': prices[0], 'high': prices[0],
+              'low': prices[0], 'close': prices[0], 'volume': df['volume'].iloc[-1]}
+    extended = pd.concat([df, pd.DataFrame([candle])], ignore_index=True)
+    assert prices[1] == pytest.approx(version.predict(latest_feature_row(extended)))
+
+
+def test_render_all_in_process_pool(tmp_path):
+    df = make_ohlcv(800)
+    for coin in ["AAA", "BBB"]:
+        df.to_csv(tmp_path / f"{coin}_ML_ready.csv", index=False)
+        (tmp_path / "models" / coin).mkdir(parents=True)
+        save_compact(str(tmp_path / "models" / coin / COMPACT_NPZ), *fitted_version(df).linear)
+
+    saved = vp.render_all(["AAA", "BBB", "ZZZ"], workers=2, windows=[100, 300], horizons=[1, 12],
+                          formats=["png", "svg"], plots_dir=str(tmp_path / "plots"),
+                          data_dir=str(tmp_path), models_dir=str(tmp_path / "models"))
+    assert len(saved) == 2 * 2 * 2 * 2
+    assert os.path.exists(tmp_path / "plots" / "AAA_prediction.png")
+    assert os.path.exists(tmp_path / "plots" / "BBB_prediction_300w_12h.svg")
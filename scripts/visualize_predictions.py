@@ -1,10 +1,22 @@
-import pandas as pd
-import numpy as np
-import joblib
+import argparse
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+import matplotlib
+matplotlib.use("Agg")  # Headless: render straight to files, also inside worker processes
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import seaborn as sns
-from datetime import timedelta
+
+# Feature engineering and model loading are shared with the backend
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+from indicators import MIN_HISTORY, BatchIndicatorEngine, latest_features
+from model_registry import ModelRegistry
+from ohlcv_store import OHLCVStore
 
 # --- Configuration ---
 # Scripts are in Crypto-Sight/scripts/, Data in Crypto-Sight/data/, Models in Crypto-Sight/models/
@@ -12,155 +24,182 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
 PLOTS_DIR = os.path.join(BASE_DIR, 'scripts', 'plots')
-os.makedirs(PLOTS_DIR, exist_ok=True)
 
 COINS = ['ADA', 'BNB', 'BTC', 'DOGE', 'ETH']
 USD_TO_INR = 90.0
 
-def prepare_features(df: pd.DataFrame):
+# Candles shown before the forecast, and hours forecast, for a plain run
+DEFAULT_WINDOW = 100
+DEFAULT_HORIZON = 1
+
+FIGSIZE = (12, 6)
+# One figure per process, cleared and reused for every plot it renders
+_figure = None
+
+
+def load_history(coin: str, data_dir: str = DATA_DIR, store: Optional[OHLCVStore] = None) -> pd.DataFrame:
     """
-    Feature engineering logic. Must match predictor.py EXACTLY.
+    Full hourly history: the columnar store if built (memory-mapped, so this
+    is cheap), otherwise the ML-ready CSV. OBV is a running total over the
+    whole series, so the features need every candle, not just the plotted tail.
     """
-    df = df.copy()
-    df['close'] = df['close'].astype(float)
-    
-    # 1. Moving Averages & RSI
-    df['SMA_20'] = df['close'].rolling(20).mean()
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-    rs = gain / loss
-    df['RSI_14'] = 100 - (100 / (1 + rs))
-    
-    # 2. Lag Features
-    for lag in [1, 2, 3, 7]:
-        df[f'close_lag_{lag}'] = df['close'].shift(lag)
-        
-    # 3. Volatility
-    df['volatility_20'] = df['close'].rolling(20).std()
-
-    # 4. MACD
-    exp1 = df['close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['MACD_signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    df['MACD_hist'] = df['MACD'] - df['MACD_signal']
-
-    # 5. Bollinger Bands
-    df['BB_upper'] = df['SMA_20'] + (df['volatility_20'] * 2)
-    df['BB_lower'] = df['SMA_20'] - (df['volatility_20'] * 2)
-    df['BB_width'] = (df['BB_upper'] - df['BB_lower']) / df['SMA_20']
-
-    # 6. ATR
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift())
-    low_close = np.abs(df['low'] - df['close'].shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    df['ATR'] = true_range.rolling(14).mean()
-
-    # 7. OBV
-    df['OBV'] = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-    
-    df_clean = df.dropna().reset_index(drop=True)
-    
-    feature_cols = ['SMA_20', 'RSI_14', 'volatility_20', 'close_lag_1', 'close_lag_2', 'close_lag_3', 'close_lag_7',
-                    'MACD', 'MACD_signal', 'MACD_hist', 'BB_upper', 'BB_lower', 'BB_width', 'ATR', 'OBV']
-    
-    return df_clean, feature_cols
-
-def visualize_coin(coin: str):
-    print(f">> Visualizing {coin}...")
-    
-    data_path = os.path.join(DATA_DIR, f"{coin}_ML_ready.csv")
-    model_path = os.path.join(MODELS_DIR, coin, 'LinearRegression_model.pkl')
-    scaler_path = os.path.join(MODELS_DIR, coin, 'scaler.pkl')
-    
-    if not os.path.exists(data_path):
-        print(f"   [!] Data missing: {data_path}")
-        return
-    if not os.path.exists(model_path):
-        print(f"   [!] Model missing: {model_path}")
-        return
+    store = store or OHLCVStore()
+    symbol = f"{coin}USDT"
+    if store.exists(symbol, "1h"):
+        return store.range(symbol, "1h")
 
-    # Load Data
+    data_path = os.path.join(data_dir, f"{coin}_ML_ready.csv")
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data missing: {data_path}")
     df = pd.read_csv(data_path)
     if 'open_time' in df.columns:
         df['open_time'] = pd.to_datetime(df['open_time'])
-    
-    # Feature Engineering
-    df_proc, feature_cols = prepare_features(df)
-    
-    if df_proc.empty:
-        print(f"   [!] Not enough data features")
-        return
-
-    # Load Model
-    try:
-        model = joblib.load(model_path)
-        scaler = joblib.load(scaler_path)
-    except Exception as e:
-        print(f"   [!] Load error: {e}")
-        return
-    
-    # Predict on LAST row
-    last_row_features = df_proc[feature_cols].iloc[-1].values.reshape(1, -1)
-    
-    try:
-        last_row_scaled = scaler.transform(last_row_features)
-        pred_price_usd = model.predict(last_row_scaled)[0]
-    except Exception as e:
-        print(f"   [!] Prediction error: {e}")
-        return
-    
-    # --- Visualization ---
-    plt.figure(figsize=(12, 6))
-    
-    # Plot last 100 points
-    plot_df = df.iloc[-100:].copy()
-    
-    # Get last actual price BEFORE conversion
-    last_price_usd = plot_df['close'].iloc[-1]
-    last_time = plot_df['open_time'].iloc[-1] if 'open_time' in plot_df.columns else len(plot_df)
+    return df
+
+
+def forecast(df: pd.DataFrame, version, steps: int) -> np.ndarray:
+    """
+    Iterative forecast of the next `steps` closes, fed back like
+    Predictor.predict_forecast. The first step uses the backend's feature
+    kernel on the full history; later steps continue from that state.
+    """
+    if len(df) < MIN_HISTORY:
+        raise ValueError("Not enough data features")
+    high, low, close, volume = (df[name].to_numpy(dtype=float) for name in ('high', 'low', 'close', 'volume'))
+    features = latest_features(high, low, close, volume)
+    engine = BatchIndicatorEngine.from_history(high, low, close, volume, [len(close) - 1])
+    last_volume = volume[-1:]
+    prices = np.empty(steps)
+    for i in range(steps):
+        prices[i] = price = float(version.predict(features))
+        candle = np.array([price])
+        engine.update(candle, candle, candle, last_volume)
+        features = engine.feature_matrix()[0]
+    return prices
+
+
+def plot_name(coin: str, window: int, horizon: int) -> str:
+    # The default plot keeps its original file name
+    if (window, horizon) == (DEFAULT_WINDOW, DEFAULT_HORIZON):
+        return f"{coin}_prediction"
+    return f"{coin}_prediction_{window}w_{horizon}h"
+
+
+def _get_figure():
+    global _figure
+    if _figure is None:
+        sns.set_style("whitegrid")
+        _figure = plt.figure(figsize=FIGSIZE)
+    _figure.clf()
+    return _figure
+
+
+def render(coin: str, df: pd.DataFrame, prices: np.ndarray, window: int, paths: List[str]) -> None:
+    """Draws the last `window` candles and the forecast `prices` and saves the figure to each path."""
+    fig = _get_figure()
+    ax = fig.add_subplot()
+
+    # Plot the last `window` points
+    plot_df = df.iloc[-window:]
+    last_price_usd = float(plot_df['close'].iloc[-1])
+    has_time = 'open_time' in plot_df.columns
+    last_time = plot_df['open_time'].iloc[-1] if has_time else len(df) - 1
+    x_axis = plot_df['open_time'] if has_time else range(len(df) - len(plot_df), len(df))
+    steps = range(1, len(prices) + 1)
+    next_times = [last_time + timedelta(hours=i) for i in steps] if has_time else [last_time + i for i in steps]
 
     # Convert to INR
-    plot_df['close_inr'] = plot_df['close'] * USD_TO_INR
-    pred_price_inr = pred_price_usd * USD_TO_INR
+    history_inr = plot_df['close'].to_numpy() * USD_TO_INR
+    prices_inr = prices * USD_TO_INR
     last_price_inr = last_price_usd * USD_TO_INR
-    
-    x_axis = plot_df['open_time'] if 'open_time' in plot_df.columns else range(len(plot_df))
-    
+
     # Historical Line
-    plt.plot(x_axis, plot_df['close_inr'], label='Historical (INR)', color='#3B82F6', linewidth=2)
-    
-    # Prediction Point
-    next_time = last_time + timedelta(hours=1) if isinstance(last_time, pd.Timestamp) else last_time + 1
-    
-    plt.scatter(next_time, pred_price_inr, color='#EF4444', s=100, label=f'Forecast: ₹{pred_price_inr:,.2f}', zorder=5)
-    
-    # Dotted Connection Line
-    plt.plot([last_time, next_time], [last_price_inr, pred_price_inr], color='#EF4444', linestyle='--', alpha=0.7)
-    
+    ax.plot(x_axis, history_inr, label='Historical (INR)', color='#3B82F6', linewidth=2)
+
+    # Forecast: dotted line from the last close, marker on the final point
+    ax.plot([last_time] + next_times, np.concatenate([[last_price_inr], prices_inr]),
+            color='#EF4444', linestyle='--', alpha=0.7)
+    ax.scatter(next_times[-1], prices_inr[-1], color='#EF4444', s=100,
+               label=f'Forecast: ₹{prices_inr[-1]:,.2f}', zorder=5)
+
     # Annotation
-    pct_change = (pred_price_usd - last_price_usd) / last_price_usd * 100
-    change_str = f"{pct_change:+.2f}%"
-    plt.text(next_time, pred_price_inr, f"  {change_str}", verticalalignment='center', fontweight='bold')
-
-    plt.title(f'{coin} Price Forecast (1 Hour Ahead)', fontsize=14)
-    plt.xlabel('Time')
-    plt.ylabel('Price (INR)')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    save_path = os.path.join(PLOTS_DIR, f"{coin}_prediction.png")
-    plt.savefig(save_path)
-    plt.close()
-    print(f"   Saved plot to {save_path}")
+    pct_change = (prices[-1] - last_price_usd) / last_price_usd * 100
+    ax.text(next_times[-1], prices_inr[-1], f"  {pct_change:+.2f}%", verticalalignment='center', fontweight='bold')
+
+    hours = len(prices)
+    ax.set_title(f'{coin} Price Forecast ({hours} Hour{"s" if hours > 1 else ""} Ahead)', fontsize=14)
+    ax.set_xlabel('Time')
+    ax.set_ylabel('Price (INR)')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+
+    for path in paths:
+        fig.savefig(path)
+
+
+def visualize_coin(coin: str, windows: Sequence[int] = (DEFAULT_WINDOW,), horizons: Sequence[int] = (DEFAULT_HORIZON,),
+                   formats: Sequence[str] = ("png",), plots_dir: str = PLOTS_DIR, data_dir: str = DATA_DIR,
+                   models_dir: str = MODELS_DIR) -> List[str]:
+    """
+    Renders one plot per (window, horizon) for a coin, each saved in every
+    format. The history and the model are loaded once. Returns the saved paths.
+    """
+    print(f">> Visualizing {coin}...")
+    try:
+        df = load_history(coin, data_dir)
+        version = ModelRegistry(models_dir).get(coin)
+        # The longest forecast also contains every shorter one
+        prices = forecast(df, version, max(horizons))
+    except Exception as e:
+        print(f"   [!] {coin}: {e}")
+        return []
+
+    os.makedirs(plots_dir, exist_ok=True)
+    saved = []
+    for window in windows:
+        for horizon in horizons:
+            name = plot_name(coin, window, horizon)
+            paths = [os.path.join(plots_dir, f"{name}.{fmt}") for fmt in formats]
+            render(coin, df, prices[:horizon], window, paths)
+            saved.extend(paths)
+    print(f"   Saved {len(saved)} plot(s) for {coin} to {plots_dir}")
+    return saved
+
+
+def render_all(coins: Sequence[str], workers: Optional[int] = None, **kwargs) -> List[str]:
+    """Renders every coin, one coin per task in a process pool (in-process when workers == 1)."""
+    if workers == 1 or len(coins) <= 1:
+        results = [visualize_coin(coin, **kwargs) for coin in coins]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_visualize_coin_kwargs, coins, [kwargs] * len(coins)))
+    return [path for paths in results for path in paths]
+
+
+def _visualize_coin_kwargs(coin: str, kwargs: dict) -> List[str]:
+    return visualize_coin(coin, **kwargs)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
 
 if __name__ == "__main__":
-    sns.set_style("whitegrid")
-    print(f"Generating predictions for {len(COINS)} coins...")
-    for coin in COINS:
-        visualize_coin(coin)
-    print("Done.")
+    parser = argparse.ArgumentParser(description="Render price forecast plots for many coins in parallel")
+    parser.add_argument("--coins", default=",".join(COINS), help="Comma separated coins")
+    parser.add_argument("--windows", type=_int_list, default=[DEFAULT_WINDOW],
+                        help="Comma separated numbers of historical candles to show")
+    parser.add_argument("--horizons", type=_int_list, default=[DEFAULT_HORIZON],
+                        help="Comma separated forecast horizons in hours")
+    parser.add_argument("--formats", default="png", help="Comma separated output formats (png, svg, pdf, ...)")
+    parser.add_argument("--out", default=PLOTS_DIR, help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    coins = [coin.strip().upper() for coin in args.coins.split(",") if coin.strip()]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+    print(f"Generating predictions for {len(coins)} coins...")
+    saved = render_all(coins, workers=args.workers, windows=args.windows, horizons=args.horizons,
+                       formats=formats, plots_dir=args.out)
+    print(f"Done. {len(saved)} file(s) written.")